@@ -1,9 +1,16 @@
+from __future__ import annotations
+
 from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING
 
 from ui.model.heuristic_type import HeuristicType
 from core.board import Board
 from core.color import Color
 from core.move import Move
+from ui.debug import Debug, DebugType
+
+if TYPE_CHECKING:
+    from agent.opening_book import OpeningBook
 
 
 class BaseAgent(ABC):
@@ -11,6 +18,8 @@ class BaseAgent(ABC):
     An abstract class for an Abalone agent.
     """
 
+    _opening_book = None
+
     @property
     @abstractmethod
     def is_searching(self) -> bool:
@@ -46,6 +55,20 @@ class BaseAgent(ABC):
         :param heuristic_type: The heuristic type.
         """
 
+    def close(self):
+        """
+        Stops the search and releases any worker processes the agent holds.
+        Called once the agent's game is over.
+        """
+        self.stop()
+
+    def set_time_limit(self, time_limit: float):
+        """
+        Sets the time available to each search.
+        Agents that do not manage their own time are stopped by the turn timer instead.
+        :param time_limit: the time limit in seconds
+        """
+
     def apply_move(self, move: Move):
         """
         Enables the agent to respond when a move is determined during search.
@@ -53,3 +76,25 @@ class BaseAgent(ABC):
         """
         # stops search by default if a move is applied
         self.stop()
+
+    def set_opening_book(self, opening_book: OpeningBook | None):
+        """
+        Sets the opening book to play moves from instead of searching.
+        :param opening_book: an OpeningBook, or None to always search
+        """
+        self._opening_book = opening_book
+
+    def get_book_move(self, board: Board, player: Color) -> Move | None:
+        """
+        Gets the opening book move for the given position, to be played instead of searching.
+        :param board: a Board
+        :param player: the Color to move
+        :return: a Move if the position is in the agent's opening book else None
+        """
+        if self._opening_book is None:
+            return None
+
+        move = self._opening_book.get_move(board, player)
+        Debug.log(f"opening book {'hit' if move else 'miss'} {board.get_hash(player)} -> {move}",
+            DebugType.Agent)
+        return move
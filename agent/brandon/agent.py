@@ -7,26 +7,32 @@ from core.color import Color
 from ui.model.heuristic_type import HeuristicType
 
 
-def search_worker(search, board, color, on_find, on_complete):
+def search_worker(search, board, color, time_limit, on_find, on_complete):
     """
     Manages the default search task.
     :param search: a Search instance
     :param board: a Board
     :param color: a Color
+    :param time_limit: the time limit in seconds, or None to search to a fixed depth
     :param on_find: a Callable[Move]
     :param on_complete: a Callable
     """
-    search.start(board, color, on_find=on_find)
+    search.start(board, color, on_find=on_find, time_limit=time_limit)
     on_complete()
 
 
 class BrandonAgent(BaseAgent):
     """
-    A basic 2-ply negamax agent.
+    A basic iterative deepening negamax agent.
     """
 
-    def __init__(self):
-        self._search = Search()
+    def __init__(self, search: Search = None):
+        """
+        Initializes the agent.
+        :param search: the Search to run, defaulting to a single-threaded Search
+        """
+        self._search = search or Search()
+        self._time_limit = None
         self._thread = None
 
     @property
@@ -34,7 +40,7 @@ class BrandonAgent(BaseAgent):
         return self._thread is not None and self._thread.is_alive()
 
     def start(self, board: Board, player: Color, on_find: callable, on_complete: callable):
-        thread = Thread(target=search_worker, args=(self._search, board, player, on_find, on_complete))
+        thread = Thread(target=search_worker, args=(self._search, board, player, self._time_limit, on_find, on_complete))
         thread.daemon = True
         thread.start()
         self._thread = thread
@@ -42,8 +48,17 @@ class BrandonAgent(BaseAgent):
     def stop(self):
         self._search.stop()
 
+    def close(self):
+        self.stop()
+        if self._thread is not None:
+            self._thread.join()
+        self._search.close()
+
     def toggle_paused(self):
         self._search.toggle_paused()
 
     def set_heuristic_type(self, heuristic_type: HeuristicType):
-        self._search.heuristic = heuristic_type
+        self._search.heuristic = heuristic_type.resolve()
+
+    def set_time_limit(self, time_limit: float):
+        self._time_limit = time_limit
@@ -0,0 +1,15 @@
+"""
+Defines Lazy SMP agent implementation logic.
+"""
+
+from agent.brandon.agent import BrandonAgent
+from agent.brandon.lazy_smp_search import LazySMPSearch
+
+
+class BrandonLazySMPAgent(BrandonAgent):
+    """
+    A negamax agent that runs one search per core over a shared transposition table.
+    """
+
+    def __init__(self):
+        super().__init__(search=LazySMPSearch())
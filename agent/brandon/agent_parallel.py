@@ -0,0 +1,15 @@
+"""
+Defines parallel agent implementation logic.
+"""
+
+from agent.brandon.agent import BrandonAgent
+from agent.brandon.parallel_search import ParallelSearch
+
+
+class BrandonParallelAgent(BrandonAgent):
+    """
+    A negamax agent that splits root moves across one worker process per core.
+    """
+
+    def __init__(self):
+        super().__init__(search=ParallelSearch())
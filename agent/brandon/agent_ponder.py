@@ -8,36 +8,39 @@ from threading import Thread
 
 from agent.ponderer import PonderingAgent
 from agent.brandon.search import Search
+from agent.heuristics.mask_evaluator import create_evaluator
 from agent.state_generator import StateGenerator
-from agent.zobrist import Zobrist
 from core.board import Board
 from core.color import Color
 from core.move import Move
+from core.move_encoding import decode_move, NO_MOVE
 from ui.model.heuristic_type import HeuristicType
 from ui.debug import Debug, DebugType
 from ui.constants import DEBUG
 
 
-def search_worker(search, board, color, on_find, on_complete):
+def search_worker(search, board, color, time_limit, on_find, on_complete):
     """
     Manages the default search task.
     :param search: a Search instance
     :param board: a Board
     :param color: a Color
+    :param time_limit: the time limit in seconds, or None to search to a fixed depth
     :param on_find: a Callable[Move]
     :param on_complete: a Callable
     """
-    search.start(board, color, on_find=on_find)
+    search.start(board, color, on_find=on_find, time_limit=time_limit)
     on_complete()
 
-def ponder_worker(search, refutation_table, board, color, on_find, on_complete):
+def ponder_worker(search, refutation_table, board, color, depth, on_find, on_complete):
     """
     Manages the pondering search task.
     Caches a defined number of refutations for each opponent move.
     :param search: a Search instance
-    :param refutation_table: a dict[Board, Move]
+    :param refutation_table: a dict mapping position hashes to refutation move codes and search depths
     :param board: a Board
     :param color: a Color
+    :param depth: the depth to search refutations to
     :param on_find: a Callable[Move, Move] mapping predictions to refutations
     :param on_complete: a Callable
     """
@@ -48,41 +51,36 @@ def ponder_worker(search, refutation_table, board, color, on_find, on_complete):
     NUM_PREDICTIONS = inf
 
     temp_board = deepcopy(board)
-    def find_move_score(move):
-        temp_board.apply_move(move)
-        move_score = search.heuristic.call(temp_board, color)
-        temp_board.copy_state(board)
+    evaluator = create_evaluator(temp_board)
+    def find_move_score(move_code):
+        move_record = evaluator.make_move(move_code)
+        move_score = search.heuristic.evaluate_incremental(temp_board, color, evaluator)
+        evaluator.unmake_move(move_record)
         return move_score
 
     # find x amount of most likely moves (ordered by heuristic)
-    opponent_moves = StateGenerator.enumerate_board(board, color)
-    opponent_moves.sort(key=find_move_score, reverse=True)
+    opponent_moves = sorted(StateGenerator.enumerate_codes(board, color), key=find_move_score, reverse=True)
 
     if NUM_PREDICTIONS != inf:
         opponent_moves = opponent_moves[:NUM_PREDICTIONS]
 
-    best_move = None
-    def set_best_move(move):
-        nonlocal best_move
-        best_move = move
-
     # determine refutations for each opponent move
     for opponent_move in opponent_moves:
-        temp_board.apply_move(opponent_move)
-
-        best_move = None
-        exhausted = search.start(temp_board, Color.next(color), on_find=set_best_move)
-        if exhausted and best_move:
-            Debug.log(f"set refutation for {opponent_move} -> {best_move}", DebugType.Agent)
-            opponent_hash = Zobrist.create_board_hash(temp_board)
-            refutation_table[opponent_hash] = best_move
+        move_record = temp_board.make_move_code(opponent_move)
+
+        exhausted = search.start(temp_board, Color.next(color), depth=depth)
+        best_move = search.best_move_code
+        if exhausted and best_move != NO_MOVE:
+            Debug.log(f"set refutation for {decode_move(opponent_move)} -> {decode_move(best_move)}",
+                DebugType.Agent)
+            refutation_table[temp_board.get_hash(Color.next(color))] = (best_move, search.best_depth)
             if on_find:
-                on_find(opponent_move, best_move)
+                on_find(decode_move(opponent_move), decode_move(best_move))
 
         if search.stopped:
             break
 
-        temp_board.copy_state(board)
+        temp_board.unmake_move(move_record)
 
     if on_complete:
         on_complete()
@@ -91,11 +89,17 @@ def ponder_worker(search, refutation_table, board, color, on_find, on_complete):
 class BrandonPonderer(PonderingAgent):
     """
     Demonstrates usage of the pondering agent interface.
+    Refutations are searched as deep as the agent's last search on its own
+    turn reached, so that they can be played in its place.
     """
 
+    # the depth to ponder to before the agent has searched on its own turn
+    PONDER_DEPTH = 2
+
     def __init__(self):
         super().__init__()
         self._search = Search()
+        self._time_limit = None
         self._search_mode = None
         self._thread = None
 
@@ -105,12 +109,18 @@ class BrandonPonderer(PonderingAgent):
 
     def _create_normal_search_thread(self, board: Board, player: Color,
                                      on_find: callable, on_complete: callable):
+        def on_search_complete():
+            if self._search.best_depth:
+                self._search_depth = self._search.best_depth
+            on_complete()
+
         return Thread(target=search_worker, args=(
             self._search,
             board,
             player,
+            self._time_limit,
             on_find,
-            on_complete
+            on_search_complete
         ))
 
     def _create_ponder_search_thread(self, board: Board, player: Color,
@@ -120,6 +130,7 @@ class BrandonPonderer(PonderingAgent):
             self._refutation_table,
             board,
             player,
+            self._search_depth or self.PONDER_DEPTH,
             on_find,
             on_complete
         ))
@@ -145,6 +156,12 @@ class BrandonPonderer(PonderingAgent):
         self._search.stop()
         self._search_mode = None
 
+    def close(self):
+        self.stop()
+        if self._thread is not None:
+            self._thread.join()
+        self._search.close()
+
     def toggle_paused(self):
         self._search.toggle_paused()
 
@@ -152,4 +169,7 @@ class BrandonPonderer(PonderingAgent):
         self.stop()
 
     def set_heuristic_type(self, heuristic_type: HeuristicType):
-        self._search.heuristic = heuristic_type
+        self._search.heuristic = heuristic_type.resolve()
+
+    def set_time_limit(self, time_limit: float):
+        self._time_limit = time_limit
@@ -0,0 +1,239 @@
+"""
+Defines Lazy SMP search logic for Brandon's agent.
+"""
+
+import multiprocessing
+import weakref
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from multiprocessing.shared_memory import SharedMemory
+from os import cpu_count
+from queue import Empty
+from core.move_encoding import decode_move, NO_MOVE
+from agent.brandon.search import Search
+from agent.brandon.search_stats import SearchStats
+from agent.brandon.transposition_table import TranspositionTable
+from agent.brandon.worker_search import WorkerSearch
+from ui.constants import FPS
+from ui.debug import Debug, DebugType
+
+
+# the search owned by the current worker process; see `_init_worker`
+_worker_search = None
+_worker_shared_memory = None
+
+
+class _HelperSearch(WorkerSearch):
+    """
+    A worker search that searches the whole position against a shared transposition table.
+    Odd-numbered workers search one ply deeper than even-numbered ones so
+    that workers fill the table with different depths instead of duplicating work.
+    """
+
+    def __init__(self, results, stop_flag, paused_flag, transposition_table):
+        """
+        Initializes a helper search.
+        :param results: a Queue to put (search id, depth, move code) tuples in as iterations complete
+        :param stop_flag: a shared byte set when the parent search stops
+        :param paused_flag: a shared byte set while the parent search is paused
+        :param transposition_table: the shared TranspositionTable
+        """
+        super().__init__(stop_flag, paused_flag, transposition_table=transposition_table)
+        self._results = results
+        self._depth_offset = 0
+        self._completed_depth = 0
+
+    def search_position(self, worker_id, board, color, heuristic, depth, deadline, search_id):
+        """
+        Searches the given position until stopped, out of time, or at the given depth.
+        :param worker_id: the index of the worker, which determines its depth offset
+        :param board: the root Board
+        :param color: the Color to move at the root
+        :param heuristic: the HeuristicEvaluator to evaluate leaves with
+        :param depth: the depth to search to
+        :param deadline: the time at which to stop searching, or None
+        :param search_id: identifies the parent search
+        :return: a tuple of the worker id, the depth and code of its best completed move, and its SearchStats
+        """
+        self._begin(heuristic, deadline, search_id)
+        self._depth_offset = worker_id % 2
+        self._best_move = NO_MOVE
+        self._best_depth = 0
+        self._completed_depth = 0
+
+        try:
+            self._search(board, color, depth)
+        except StopIteration:
+            pass
+
+        return worker_id, self._completed_depth, self._best_move, self._stats
+
+    def _search_root(self, board, color, moves, depth):
+        depth += self._depth_offset
+        best_move = super()._search_root(board, color, moves, depth)
+        self._completed_depth = depth
+        self._results.put((self._search_id, depth, best_move))
+        return best_move
+
+
+def _init_worker(shared_memory_name, tt_memory_budget, results, stop_flag, paused_flag):
+    """
+    Sets up the search for a worker process.
+    """
+    global _worker_search, _worker_shared_memory
+    _worker_shared_memory = SharedMemory(name=shared_memory_name)
+
+    transposition_table = TranspositionTable(tt_memory_budget, buffer=_worker_shared_memory.buf)
+    _worker_search = _HelperSearch(results, stop_flag, paused_flag, transposition_table)
+
+    # workers report through the parent search
+    for debug_type in DebugType:
+        Debug.ACTIVE_DEBUG_TYPES[debug_type] = False
+
+
+def _search_position(*args):
+    """
+    Searches a position in a worker process.
+    See `_HelperSearch.search_position`.
+    """
+    return _worker_search.search_position(*args)
+
+
+def _release_shared_memory(shared_memory, transposition_table):
+    """
+    Frees the shared transposition table once its search is gone.
+    Worker processes keep their mappings until they exit.
+    """
+    transposition_table.release()
+    shared_memory.close()
+    shared_memory.unlink()
+
+
+class LazySMPSearch(Search):
+    """
+    A Lazy SMP search.
+    Every worker process searches the whole position with iterative deepening,
+    at staggered depths, sharing a single transposition table held in shared
+    memory. Workers speed each other up through the table alone; the search
+    ends as soon as any worker reaches the target depth or runs out of time.
+    """
+
+    def __init__(self, num_workers: int = None,
+                 tt_memory_budget: int = TranspositionTable.DEFAULT_MEMORY_BUDGET):
+        """
+        Initializes a Lazy SMP search.
+        Worker processes are started on the first search.
+        :param num_workers: the number of worker processes, defaulting to one per core
+        :param tt_memory_budget: the approximate number of bytes the shared transposition table may hold
+        """
+        shared_memory = SharedMemory(create=True, size=TranspositionTable.get_buffer_size(tt_memory_budget))
+        super().__init__(transposition_table=TranspositionTable(tt_memory_budget, buffer=shared_memory.buf))
+        self._shared_memory = shared_memory
+        self._tt_memory_budget = tt_memory_budget
+        weakref.finalize(self, _release_shared_memory, shared_memory, self._transposition_table)
+
+        self._num_workers = num_workers or cpu_count()
+        self._worker_stats = []
+
+        # spawn rather than fork, since the app runs agents alongside other threads
+        self._context = multiprocessing.get_context("spawn")
+        self._results = self._context.Queue()
+        self._stop_flag = self._context.RawValue("b", 0)
+        self._paused_flag = self._context.RawValue("b", 0)
+        self._executor = None
+        self._search_id = 0
+
+    @property
+    def worker_stats(self) -> list[SearchStats]:
+        """
+        Gets the stats of each worker for the current or last search.
+        :return: a list of SearchStats, by worker id
+        """
+        return self._worker_stats
+
+    def start(self, board, color, depth=2, on_find=None, time_limit=None):
+        self._stop_flag.value = 0
+        self._search_id += 1
+        exhausted = super().start(board, color, depth, on_find, time_limit)
+
+        for worker_id, stats in enumerate(self._worker_stats):
+            Debug.log(f"worker {worker_id}: {stats.num_nodes_explored} nodes explored"
+                f" ({stats.num_nodes_enumerated} enumerated)")
+
+        return exhausted
+
+    def close(self):
+        if self._executor:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+    def stop(self):
+        super().stop()
+        self._paused_flag.value = 0
+        self._stop_flag.value = 1
+
+    def toggle_paused(self):
+        super().toggle_paused()
+        self._paused_flag.value = self._paused
+
+    def _get_executor(self):
+        if not self._executor:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self._num_workers,
+                mp_context=self._context,
+                initializer=_init_worker,
+                initargs=(self._shared_memory.name, self._tt_memory_budget,
+                    self._results, self._stop_flag, self._paused_flag),
+            )
+        return self._executor
+
+    def _search(self, board, color, depth, on_find=None):
+        if self._is_quiescent(board) and depth > 1 and not self._deadline:
+            depth = 1
+
+        executor = self._get_executor()
+        futures = [executor.submit(_search_position, worker_id, board, color, self.heuristic,
+            depth, self._deadline, self._search_id) for worker_id in range(self._num_workers)]
+        self._worker_stats = [SearchStats() for _ in futures]
+
+        try:
+            while self._best_depth < depth and not any(future.done() for future in futures):
+                self._handle_interrupts()
+                self._read_results(on_find)
+                wait(futures, timeout=1 / FPS, return_when=FIRST_COMPLETED)
+
+            # workers also finish early when the search is stopped
+            self._handle_interrupts()
+        finally:
+            self._stop_flag.value = 1
+            wait(futures)
+            for future in futures:
+                worker_id, worker_depth, move_code, stats = future.result()
+                self._worker_stats[worker_id] = stats
+                self._stats.merge(stats)
+                self._report_move(worker_depth, move_code, on_find)
+
+    def _read_results(self, on_find=None):
+        """
+        Reports moves from iterations completed by workers so far.
+        """
+        while True:
+            try:
+                search_id, depth, move_code = self._results.get_nowait()
+            except Empty:
+                break
+
+            if search_id == self._search_id:
+                self._report_move(depth, move_code, on_find)
+
+    def _report_move(self, depth, move_code, on_find=None):
+        """
+        Takes the given move as the best move if it was searched deeper than the current best move.
+        """
+        if depth <= self._best_depth or move_code == NO_MOVE:
+            return
+
+        self._best_move = move_code
+        self._best_depth = depth
+        if on_find:
+            on_find(decode_move(move_code))
+        Debug.log(f"new best move {decode_move(move_code)} at depth {depth}")
@@ -0,0 +1,198 @@
+"""
+Defines root-parallel search logic for Brandon's agent.
+"""
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from math import inf
+from os import cpu_count
+from core.move_encoding import decode_move, NO_MOVE
+from agent.brandon.search import Search
+from agent.brandon.transposition_table import TranspositionTable
+from agent.brandon.worker_search import WorkerSearch
+from agent.heuristics.mask_evaluator import create_evaluator
+from ui.constants import FPS
+from ui.debug import Debug
+
+
+# the search owned by the current worker process; see `_init_worker`
+_worker_search = None
+
+
+class _RootWorkerSearch(WorkerSearch):
+    """
+    A worker search that searches single root moves.
+    Reads its alpha bound from memory shared with the parent search.
+    """
+
+    def __init__(self, alpha, stop_flag, paused_flag, tt_memory_budget):
+        """
+        Initializes a root move search.
+        :param alpha: a shared double holding the best root score found so far
+        :param stop_flag: a shared byte set when the parent search stops
+        :param paused_flag: a shared byte set while the parent search is paused
+        :param tt_memory_budget: the approximate number of bytes the transposition table may hold
+        """
+        super().__init__(stop_flag, paused_flag, tt_memory_budget)
+        self._alpha = alpha
+
+    def search_root_move(self, board, color, heuristic, move_code, depth, is_pv, deadline, search_id, table_id):
+        """
+        Searches a single root move.
+        :param board: the root Board
+        :param color: the Color to move at the root
+        :param heuristic: the HeuristicEvaluator to evaluate leaves with
+        :param move_code: the encoded root move
+        :param depth: the depth of the root iteration
+        :param is_pv: whether or not the move is the first root move of the iteration
+        :param deadline: the time at which to stop searching, or None
+        :param search_id: identifies the parent search
+        :param table_id: identifies the parent's table, which changes when the parent is cleared
+        :return: a tuple of the move's score, or None if the search was interrupted, and its SearchStats
+        """
+        self._begin(heuristic, deadline, search_id, table_id)
+
+        self._evaluator = create_evaluator(board)
+        self._evaluator.make_move(move_code)
+        try:
+            move_score = -self._negascout(
+                board=board,
+                color=color,
+                depth=depth - 1,
+                alpha=self._alpha.value,
+                beta=inf,
+                perspective=-1,
+                is_pv=is_pv
+            )
+        except StopIteration:
+            move_score = None
+
+        return move_score, self._stats
+
+
+def _init_worker(alpha, stop_flag, paused_flag, tt_memory_budget):
+    """
+    Sets up the search for a worker process.
+    """
+    global _worker_search
+    _worker_search = _RootWorkerSearch(alpha, stop_flag, paused_flag, tt_memory_budget)
+
+
+def _search_root_move(*args):
+    """
+    Searches a single root move in a worker process.
+    See `_RootWorkerSearch.search_root_move`.
+    """
+    return _worker_search.search_root_move(*args)
+
+
+class ParallelSearch(Search):
+    """
+    A search that splits root moves across worker processes.
+    The first root move of each iteration is searched alone to establish an
+    alpha bound. The best root score found so far is kept in shared memory,
+    and each worker reads it once as it starts searching a root move, so
+    moves started later in an iteration are searched with tighter bounds.
+    Each worker keeps its own transposition table between searches.
+    """
+
+    def __init__(self, num_workers: int = None,
+                 tt_memory_budget: int = TranspositionTable.DEFAULT_MEMORY_BUDGET):
+        """
+        Initializes a parallel search.
+        Worker processes are started on the first search.
+        :param num_workers: the number of worker processes, defaulting to one per core
+        :param tt_memory_budget: the approximate number of bytes the transposition tables may hold in total
+        """
+        super().__init__(tt_memory_budget=0)  # the root is never looked up
+        self._num_workers = num_workers or cpu_count()
+        self._worker_tt_memory_budget = tt_memory_budget // self._num_workers
+
+        # spawn rather than fork, since the app runs agents alongside other threads
+        self._context = multiprocessing.get_context("spawn")
+        self._alpha = self._context.Value("d", -inf)
+        self._stop_flag = self._context.RawValue("b", 0)
+        self._paused_flag = self._context.RawValue("b", 0)
+        self._executor = None
+        self._futures = {}
+        self._search_id = 0
+        self._table_id = 0
+
+    def start(self, board, color, depth=2, on_find=None, time_limit=None):
+        self._stop_flag.value = 0
+        self._search_id += 1
+        try:
+            return super().start(board, color, depth, on_find, time_limit)
+        finally:
+            self._cancel_futures()
+
+    def clear(self):
+        super().clear()
+        # workers clear their own tables when they next see a new table id
+        self._table_id += 1
+
+    def close(self):
+        if self._executor:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+    def stop(self):
+        super().stop()
+        self._paused_flag.value = 0
+        self._stop_flag.value = 1
+
+    def toggle_paused(self):
+        super().toggle_paused()
+        self._paused_flag.value = self._paused
+
+    def _get_executor(self):
+        if not self._executor:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self._num_workers,
+                mp_context=self._context,
+                initializer=_init_worker,
+                initargs=(self._alpha, self._stop_flag, self._paused_flag, self._worker_tt_memory_budget),
+            )
+        return self._executor
+
+    def _search_root(self, board, color, moves, depth):
+        executor = self._get_executor()
+        self._alpha.value = -inf
+        best_move = NO_MOVE
+
+        # search the first move alone to give the other workers a bound
+        for is_pv, batch in ((True, moves[:1]), (False, moves[1:])):
+            for move in batch:
+                future = executor.submit(_search_root_move, board, color, self.heuristic,
+                    move, depth, is_pv, self._deadline, self._search_id, self._table_id)
+                self._futures[future] = move
+
+            while self._futures:
+                self._handle_interrupts()
+                done, _ = wait(self._futures, timeout=1 / FPS, return_when=FIRST_COMPLETED)
+                for future in done:
+                    move = self._futures.pop(future)
+                    move_score, stats = future.result()
+                    self._stats.merge(stats)
+
+                    # workers only give up once the search is stopped or out of time
+                    if move_score is None:
+                        raise StopIteration
+
+                    if move_score > self._alpha.value:
+                        self._alpha.value = move_score
+                        best_move = move
+                        Debug.log(f"new best move {decode_move(move)}/{move_score:.2f}")
+
+        return best_move
+
+    def _cancel_futures(self):
+        """
+        Stops all outstanding root move searches and waits for the workers to finish them.
+        """
+        self._stop_flag.value = 1
+        for future in self._futures:
+            future.cancel()
+
+        wait(self._futures)
+        self._futures.clear()
@@ -4,11 +4,16 @@ Defines common search logic for Brandon's agent.
 
 from math import inf
 from time import time, sleep
+from array import array
 from copy import deepcopy
 from core.board import Board
 from core.color import Color
-from agent.zobrist import Zobrist
+from core.move_encoding import decode_move, get_move_kind, get_move_size, NO_MOVE, NUM_MOVE_IDS, \
+    MOVE_ID_MASK, MOVE_KIND_PUSH
+from agent.brandon.search_stats import SearchStats
 from agent.brandon.transposition_table import TranspositionTable
+from agent.heuristics.evaluation_cache import EvaluationCache
+from agent.heuristics.mask_evaluator import create_evaluator
 from agent.state_generator import StateGenerator
 from ui.constants import FPS
 from ui.debug import Debug
@@ -19,11 +24,29 @@ class Search:
     An interface around Abalone search logic.
     """
 
+    # the deepest iteration a time-limited search will attempt
+    MAX_DEPTH = 10
+
+    # the fraction of a time limit to spend searching,
+    # leaving headroom for the caller to apply the move
+    TIME_LIMIT_USAGE = 0.9
+
+    # the number of captures the quiescence search may make past each leaf, 0 to disable it
+    QUIESCENCE_NODE_BUDGET = 32
+
+    # the number of moves remembered per depth for causing cutoffs
+    NUM_KILLER_MOVES = 2
+
     @staticmethod
-    def _estimate_move_score(board, move):
+    def _estimate_move_score(move_code):
+        """
+        Estimates how promising a move is without applying it.
+        :param move_code: a move code generated against the board it is to be made on
+        :return: a number, higher for more promising moves
+        """
         WEIGHT_SUMITO = 10 # consider sumitos first
-        return (len(move.get_cells())
-            + WEIGHT_SUMITO * move.is_sumito(board))
+        return (get_move_size(move_code)
+            + WEIGHT_SUMITO * (get_move_kind(move_code) >= MOVE_KIND_PUSH))
 
     @staticmethod
     def _is_quiescent(board):
@@ -39,23 +62,86 @@ class Search:
         return True
 
     @classmethod
-    def _order_moves(cls, board, moves, best_move=None):
-        if best_move:
-            # list principal variation first
-            return [best_move, *[move for move in moves if move != best_move]]
-
-        return sorted(moves, key=lambda move: cls._estimate_move_score(board, move), reverse=True)
+    def _create_killer_moves(cls, depth):
+        """
+        Creates empty killer move slots.
+        :param depth: the deepest depth to be searched
+        :return: a list of lists of `NUM_KILLER_MOVES` move ids, indexed by remaining depth
+        """
+        return [[NO_MOVE] * cls.NUM_KILLER_MOVES for _ in range(depth + 1)]
 
-    def __init__(self):
+    def _order_moves(self, moves, best_move=NO_MOVE):
+        """
+        Orders root moves, listing the principal variation first, then moves that caused
+        cutoffs most often in previous searches, then the most promising looking moves.
+        :param moves: a sequence of move codes
+        :param best_move: the move code to list first, if any
+        :return: the ordered list of move codes
+        """
+        history = self._history
+        best_id = best_move & MOVE_ID_MASK
+        return sorted(moves, reverse=True, key=lambda move: (
+            move & MOVE_ID_MASK == best_id,
+            history[move & MOVE_ID_MASK],
+            self._estimate_move_score(move)))
+
+    def _order_moves_by_score(self, moves, scores, perspective, depth, best_move=NO_MOVE):
+        """
+        Orders moves best first: the principal variation, then the killer moves for the
+        given depth, then the remaining moves by the given heuristic scores.
+        :param moves: a sequence of move codes
+        :param scores: the heuristic score of each move from the root player's perspective
+        :param perspective: 1 if the root player is to move, otherwise -1
+        :param depth: the remaining depth of the node the moves are made from
+        :param best_move: the move code to list first, if any
+        :return: a tuple of the ordered move codes and their scores
+        """
+        killer_moves = self._killer_moves[depth]
+        best_id = best_move & MOVE_ID_MASK
+        order = sorted(range(len(moves)), reverse=True, key=lambda i: (
+            moves[i] & MOVE_ID_MASK == best_id,
+            moves[i] & MOVE_ID_MASK in killer_moves,
+            scores[i] * perspective))
+        return [moves[i] for i in order], [scores[i] for i in order]
+
+    def _record_cutoff(self, move, depth):
+        """
+        Remembers a move that caused a beta cutoff, so that it is tried early in other nodes.
+        Moves are remembered by id, since the same move may push in one position and not another.
+        :param move: the move code
+        :param depth: the remaining depth of the node the move was made from
+        """
+        move_id = move & MOVE_ID_MASK
+        killer_moves = self._killer_moves[depth]
+        if move_id not in killer_moves:
+            killer_moves.pop()
+            killer_moves.insert(0, move_id)
+        self._history[move_id] += depth * depth
+
+    def __init__(self, tt_memory_budget: int = TranspositionTable.DEFAULT_MEMORY_BUDGET,
+                 transposition_table: TranspositionTable = None,
+                 eval_cache_capacity: int = EvaluationCache.DEFAULT_CAPACITY):
+        """
+        Initializes a search.
+        :param tt_memory_budget: the approximate number of bytes the transposition table may hold
+        :param transposition_table: a TranspositionTable to use instead of allocating one, e.g. a shared table
+        :param eval_cache_capacity: the number of heuristic values the evaluation cache may hold
+        """
         self.heuristic = None
         self._stopped = False
         self._paused = False
-        self._transposition_table = {}
-        self.__debug_num_tt_reads = 0
-        self.__debug_num_tt_hits = 0
-        self.__debug_num_nodes_enumerated = 0
-        self.__debug_num_nodes_pruned = 0
-        self.__debug_num_plies_expanded = 0
+        self._deadline = None
+        self._best_move = NO_MOVE
+        self._best_depth = 0
+        self._evaluator = None
+        self._quiescence_nodes_left = 0
+        self._killer_moves = self._create_killer_moves(self.MAX_DEPTH)
+        self._history = array("L", [0]) * NUM_MOVE_IDS  # move id -> cutoff score
+        self._transposition_table = (transposition_table
+            if transposition_table is not None
+            else TranspositionTable(tt_memory_budget))
+        self._evaluation_cache = EvaluationCache(eval_cache_capacity)
+        self._stats = SearchStats()
 
     @property
     def stopped(self):
@@ -65,21 +151,91 @@ class Search:
         """
         return self._stopped
 
-    def start(self, board: Board, color: Color, depth: int = 2, on_find: callable = None):
+    @property
+    def stats(self):
+        """
+        Gets the stats of the current or last search.
+        :return: a SearchStats
+        """
+        return self._stats
+
+    @property
+    def best_move(self):
+        """
+        Gets the best move of the last completed iteration.
+        :return: a Move, or None if no iteration has completed
+        """
+        return decode_move(self._best_move)
+
+    @property
+    def best_move_code(self):
+        """
+        Gets the code of the best move of the last completed iteration.
+        :return: a move code, or NO_MOVE if no iteration has completed
+        """
+        return self._best_move
+
+    @property
+    def best_depth(self):
+        """
+        Gets the depth of the last completed iteration.
+        :return: an int
+        """
+        return self._best_depth
+
+    def start(self, board: Board, color: Color, depth: int = 2, on_find: callable = None,
+              time_limit: float = None):
         """
         Starts the search.
+        If a time limit is given, the search deepens one ply at a time until the
+        next iteration is not expected to finish in time, up to `MAX_DEPTH`.
+        :param time_limit: the number of seconds available to the search, or None to search to `depth`
         :return: a bool denoting whether the search was completed or not
         """
         self._stopped = False
+        self._deadline = (time() + time_limit * self.TIME_LIMIT_USAGE
+            if time_limit is not None
+            else None)
+        self._best_move = NO_MOVE
+        self._best_depth = 0
+        self._transposition_table.new_search()
+        self._stats = SearchStats()
+
+        # time-limited searches deepen up to `MAX_DEPTH` rather than to `depth`
+        search_depth = self.MAX_DEPTH if self._deadline else depth
+
+        # killer moves are specific to the position searched, but
+        # which moves tend to be good carries over, if less so over time
+        self._killer_moves = self._create_killer_moves(search_depth)
+        for move_id, score in enumerate(self._history):
+            if score:
+                self._history[move_id] = score >> 1
+
         try:
-            self._search(board, color, depth, on_find)
+            self._search(board, color, search_depth, on_find)
             exhausted = True
         except StopIteration:
-            exhausted = False
+            # running out of time is the expected outcome of a time-limited search
+            exhausted = not self._stopped
 
+        self._deadline = None
         self.__print_debug_report(exhausted)
         return exhausted
 
+    def clear(self):
+        """
+        Forgets what was learned from previous searches by emptying the transposition table and evaluation cache.
+        """
+        self._transposition_table.clear()
+        self._evaluation_cache.clear()
+        self._history = array("L", [0]) * NUM_MOVE_IDS
+
+    def close(self):
+        """
+        Releases any worker processes held by the search.
+        The search may still be started again afterwards.
+        """
+
     def stop(self):
         """
         Stops the search.
@@ -94,72 +250,104 @@ class Search:
         self._paused = not self._paused
 
     def _search(self, board: Board, color: Color, depth: int, on_find: callable = None):
-        if self._is_quiescent(board) and depth > 1:
+        # time-limited searches use their time to look past quiet positions instead
+        if self._is_quiescent(board) and depth > 1 and not self._deadline:
             return self._search(board, color, depth=1, on_find=on_find)
 
-        moves = StateGenerator.enumerate_board(board, color)
-        self.__debug_num_nodes_enumerated += len(moves)
-
-        root_hash = Zobrist.create_board_hash(board)
-        best_move = None
-        temp_board = deepcopy(board)
+        moves = StateGenerator.enumerate_codes(board, color)
+        self._stats.num_nodes_enumerated += len(moves)
 
         for d in range(1, depth + 1):
             time_start = time()
-            alpha = -inf
-            self.__debug_num_plies_expanded += 1
-
-            moves = self._order_moves(board, moves, best_move)
-            is_first_move = True
-
-            for move in moves:
-                self._handle_interrupts()
-                temp_board.apply_move(move)
-                move_hash = Zobrist.update_board_hash(root_hash, board, move)
-
-                move_score = -self._negascout(
-                    board=temp_board,
-                    board_hash=move_hash,
-                    color=color,
-                    depth=d - 1,
-                    alpha=alpha,
-                    beta=inf,
-                    perspective=-1,
-                    is_pv=is_first_move
-                )
-
-                if move_score > alpha:
-                    alpha = move_score
-                    best_move = move
-                    if on_find:
-                        on_find(move)
-                    Debug.log(f"new best move {move}/{move_score:.2f}")
-
-                temp_board.copy_state(board)
-                is_first_move = False
-
-            Debug.log(f"complete search at depth {d} in {time() - time_start:.2f}s")
-
-    def _negascout(self, board, board_hash, color, depth, alpha, beta, perspective, is_pv=False):
+            self._stats.num_plies_expanded += 1
+
+            moves = self._order_moves(moves, self._best_move)
+            self._best_move = self._search_root(board, color, moves, d)
+            self._best_depth = d
+
+            # only completed iterations are reported, since one cut short
+            # may not have compared the best move against the rest
+            if on_find and self._best_move != NO_MOVE:
+                on_find(decode_move(self._best_move))
+
+            time_taken = time() - time_start
+            Debug.log(f"complete search at depth {d} in {time_taken:.2f}s")
+
+            # the first iteration prunes nothing, so it can't measure the branching factor
+            if self._deadline and d > 1 and not self._can_deepen(time_taken):
+                break
+
+    def _search_root(self, board, color, moves, depth):
+        """
+        Searches each of the given root moves to the given depth.
+        :param board: the root Board
+        :param color: the Color to move
+        :param moves: the root move codes, best first
+        :param depth: the depth to search to
+        :return: the best move code
+        """
+        alpha = -inf
+        best_move = NO_MOVE
+        temp_board = deepcopy(board)  # walk the tree on a private board
+        self._evaluator = create_evaluator(temp_board)
+        is_first_move = True
+
+        for move in moves:
+            self._handle_interrupts()
+            move_record = self._evaluator.make_move(move)
+
+            move_score = -self._negascout(
+                board=temp_board,
+                color=color,
+                depth=depth - 1,
+                alpha=alpha,
+                beta=inf,
+                perspective=-1,
+                is_pv=is_first_move
+            )
+
+            if move_score > alpha:
+                alpha = move_score
+                best_move = move
+                Debug.log(f"new best move {decode_move(move)}/{move_score:.2f}")
+
+            self._evaluator.unmake_move(move_record)
+            is_first_move = False
+
+        return best_move
+
+    def _can_deepen(self, time_taken):
+        """
+        Estimates whether or not the next iteration will finish before the deadline.
+        Each iteration is assumed to take the effective branching factor times
+        as long as the last.
+        :param time_taken: the number of seconds taken by the last iteration
+        :return: a bool
+        """
+        return time() + time_taken * self._stats.effective_branching_factor < self._deadline
+
+    def _negascout(self, board, color, depth, alpha, beta, perspective, is_pv=False, static_score=None):
         if is_pv:
-            return self._negamax(board, board_hash, color, depth, -beta, -alpha, perspective)
+            return self._negamax(board, color, depth, -beta, -alpha, perspective, static_score)
 
-        move_score = self._negamax(board, board_hash, color, depth, -alpha - 1, -alpha, perspective)
+        move_score = self._negamax(board, color, depth, -alpha - 1, -alpha, perspective, static_score)
         if alpha < move_score < beta:
-            return self._negamax(board, board_hash, color, depth, -beta, -move_score, perspective)
+            return self._negamax(board, color, depth, -beta, -move_score, perspective, static_score)
 
         return move_score
 
-    def _negamax(self, board, board_hash, color, depth, alpha, beta, perspective):
+    def _negamax(self, board, color, depth, alpha, beta, perspective, static_score=None):
         self._handle_interrupts()
 
-        self.__debug_num_tt_reads += 1
-        cached_entry = (self._transposition_table[board_hash]
-            if board_hash in self._transposition_table
-            else None)
+        true_color = color if perspective == 1 else Color.next(color)
+        board_hash = board.get_hash(true_color)
 
-        if cached_entry:
-            self.__debug_num_tt_hits += 1
+        self._stats.num_tt_reads += 1
+        cached_entry = self._transposition_table.probe(board_hash)
+
+        # scores from shallower searches are only good for move ordering
+        if cached_entry and cached_entry.depth >= depth:
+            self._stats.num_tt_hits += 1
             if cached_entry.type == TranspositionTable.EntryType.PV:
                 return cached_entry.score
             elif cached_entry.type == TranspositionTable.EntryType.CUT:
@@ -171,34 +359,39 @@ class Search:
                 return cached_entry.score
 
         if depth == 0:
-            return self.heuristic.call(board, color) * perspective
+            if static_score is None:
+                static_score = self._evaluate(board, color, board_hash)
+            self._quiescence_nodes_left = self.QUIESCENCE_NODE_BUDGET
+            return self._quiesce(board, color, alpha, beta, perspective, static_score * perspective)
 
         alpha_old = alpha
         best_score = -inf
-        best_move = cached_entry.move if cached_entry else None
-        true_color = color if perspective == 1 else Color.next(color)
-        temp_board = deepcopy(board)
+        best_move = cached_entry.move if cached_entry else NO_MOVE
+
+        moves = StateGenerator.enumerate_codes(board, true_color)
+        self._stats.num_nodes_enumerated += len(moves)
+        self._stats.num_plies_expanded += 1
 
-        moves = StateGenerator.enumerate_board(board, true_color)
-        moves = self._order_moves(board, moves, best_move)
-        self.__debug_num_nodes_enumerated += len(moves)
-        self.__debug_num_plies_expanded += 1
+        # evaluate the children all at once to try the best looking ones first,
+        # which at the frontier also saves evaluating each leaf on its own
+        static_scores = self._evaluate_children(board, color, moves, board_hash)
+        moves, static_scores = self._order_moves_by_score(moves, static_scores, perspective, depth, best_move)
 
         is_first_move = True
-        for move in moves:
-            temp_board.apply_move(move)
-            move_hash = Zobrist.update_board_hash(board_hash, board, move)
+        for i, move in enumerate(moves):
+            move_record = self._evaluator.make_move(move)
 
             move_score = -self._negascout(
-                board=temp_board,
-                board_hash=move_hash,
+                board=board,
                 color=color,
                 depth=depth - 1,
                 alpha=alpha,
                 beta=beta,
                 perspective=-perspective,
-                is_pv=is_first_move
+                is_pv=is_first_move,
+                static_score=static_scores[i] if depth == 1 else None
             )
+            self._evaluator.unmake_move(move_record)
 
             if move_score > best_score:
                 best_score = move_score
@@ -206,55 +399,145 @@ class Search:
 
             alpha = max(alpha, best_score)
             if alpha >= beta:
-                self.__debug_num_nodes_pruned += len(moves) - moves.index(move) - 1
+                self._stats.num_nodes_pruned += len(moves) - i - 1
+                self._record_cutoff(move, depth)
                 break
 
-            temp_board.copy_state(board)
             is_first_move = False
 
-        if board_hash in self._transposition_table:
-            cached_entry = self._transposition_table[board_hash]
-        else:
-            cached_entry = TranspositionTable.Entry()
-            self._transposition_table[board_hash] = cached_entry
-
-        cached_entry.score = best_score
-        cached_entry.move = best_move
-        cached_entry.depth = depth
-
         if best_score <= alpha_old:
-            cached_entry.type = TranspositionTable.EntryType.ALL
+            entry_type = TranspositionTable.EntryType.ALL
         elif best_score >= beta:
-            cached_entry.type = TranspositionTable.EntryType.CUT
+            entry_type = TranspositionTable.EntryType.CUT
         else:
-            cached_entry.type = TranspositionTable.EntryType.PV
+            entry_type = TranspositionTable.EntryType.PV
+
+        self._transposition_table.store(board_hash, best_score, depth, best_move, entry_type)
+        return best_score
+
+    def _quiesce(self, board, color, alpha, beta, perspective, stand_pat):
+        """
+        Extends a leaf through captures until the position is quiet, so that leaves
+        are not scored in the middle of a pushing exchange.
+        The side to move may always stand pat, i.e. decline to capture and take the static score.
+        :param board: the Board tracked by the search's evaluator
+        :param color: the root Color
+        :param alpha: the score the side to move is already assured of
+        :param beta: the score the opponent is already assured of, negated
+        :param perspective: 1 if the root player is to move, otherwise -1
+        :param stand_pat: the static score of the board for the side to move
+        :return: the score of the board for the side to move
+        """
+        if stand_pat >= beta or self._quiescence_nodes_left <= 0:
+            return stand_pat
+
+        alpha = max(alpha, stand_pat)
+        true_color = color if perspective == 1 else Color.next(color)
+        moves = StateGenerator.enumerate_captures(board, true_color)
+        if not moves:
+            return stand_pat
+
+        static_scores = self.heuristic.evaluate_children(board, color, moves)
+        moves, static_scores = self._order_moves_by_score(moves, static_scores, perspective, depth=0)
+
+        best_score = stand_pat
+        for move, static_score in zip(moves, static_scores):
+            # delta pruning: the opponent may stand pat after a capture, so a capture is worth
+            # at most its static score, and neither it nor any capture after it can raise alpha
+            if static_score * perspective <= alpha or self._quiescence_nodes_left <= 0:
+                break
+
+            self._quiescence_nodes_left -= 1
+            self._stats.num_quiescence_nodes += 1
+            move_record = self._evaluator.make_move(move)
+            move_score = -self._quiesce(board, color, -beta, -alpha, -perspective, -static_score * perspective)
+            self._evaluator.unmake_move(move_record)
+
+            best_score = max(best_score, move_score)
+            alpha = max(alpha, best_score)
+            if alpha >= beta:
+                break
 
         return best_score
 
+    def _evaluate(self, board, color, board_hash):
+        """
+        Evaluates a leaf, reusing its value if the position was evaluated before.
+        :param board: the Board tracked by the search's evaluator
+        :param color: the Color to evaluate for
+        :param board_hash: the hash of the board with the side to move
+        :return: the heuristic value
+        """
+        cache_key = self._evaluation_cache.get_key(board_hash, self.heuristic, color)
+        score = self._evaluation_cache.get(cache_key)
+        if score is not None:
+            self._stats.num_eval_cache_hits += 1
+            return score
+
+        self._stats.num_eval_cache_misses += 1
+        score = self.heuristic.evaluate_incremental(board, color, self._evaluator)
+        self._evaluation_cache.put(cache_key, score)
+        return score
+
+    def _evaluate_children(self, board, color, moves, board_hash):
+        """
+        Evaluates the children of a node, reusing their values if the node was expanded before.
+        Moves are enumerated in the same order for the same position, so values are kept in enumeration order.
+        :param board: the parent Board
+        :param color: the Color to evaluate for
+        :param moves: the moves enumerated for the board
+        :param board_hash: the hash of the board with the side to move
+        :return: the heuristic value of each move's child, in move order
+        """
+        cache_key = self._evaluation_cache.get_key(board_hash, self.heuristic, color, children=True)
+        scores = self._evaluation_cache.get(cache_key)
+        if scores is not None and len(scores) == len(moves):
+            self._stats.num_eval_cache_hits += 1
+            return list(scores)
+
+        self._stats.num_eval_cache_misses += 1
+        scores = self.heuristic.evaluate_children(board, color, moves)
+        self._evaluation_cache.put(cache_key, tuple(scores))
+        return scores
+
     def _handle_interrupts(self):
-        while self._paused:
-            sleep(1 / FPS)
+        if self._paused:
+            time_paused = time()
+            while self._paused:
+                sleep(1 / FPS)
+
+            # the turn timer is paused too, so pausing should not eat into the deadline
+            if self._deadline:
+                self._deadline += time() - time_paused
 
-        if self._stopped:
+        if self._stopped or self._deadline and time() >= self._deadline:
             raise StopIteration
 
     def __print_debug_report(self, exhausted):
         Debug.log(f"search result: {'exhausted' if exhausted else 'interrupted'}")
 
-        prune_rate = self.__debug_num_nodes_pruned / (self.__debug_num_nodes_enumerated or 1)
-        prune_percent = prune_rate * 100
-        Debug.log(f"nodes enumerated: {self.__debug_num_nodes_enumerated}")
-        Debug.log(f"nodes pruned: {self.__debug_num_nodes_pruned} ({prune_percent:.2f}%)")
+        prune_percent = self._stats.prune_rate * 100
+        Debug.log(f"nodes enumerated: {self._stats.num_nodes_enumerated}")
+        Debug.log(f"nodes pruned: {self._stats.num_nodes_pruned} ({prune_percent:.2f}%)")
 
-        tt_hit_rate = self.__debug_num_tt_hits / (self.__debug_num_tt_reads or 1)
-        tt_hit_percent = tt_hit_rate * 100
-        Debug.log(f"transposition table size: {len(self._transposition_table)} nodes")
+        tt_hit_percent = self._stats.tt_hit_rate * 100
+        Debug.log(f"transposition table size: {len(self._transposition_table)}"
+            f"/{self._transposition_table.capacity} nodes")
         Debug.log(f"transposition table hit rate:"
-            f" {self.__debug_num_tt_hits}/{self.__debug_num_tt_reads}"
+            f" {self._stats.num_tt_hits}/{self._stats.num_tt_reads}"
             f" ({tt_hit_percent:.2f}%)")
 
-        num_nodes_explored = self.__debug_num_nodes_enumerated - self.__debug_num_nodes_pruned
-        branching_factor = self.__debug_num_nodes_enumerated / self.__debug_num_plies_expanded
-        effective_branching_factor = num_nodes_explored / self.__debug_num_plies_expanded
+        Debug.log(f"quiescence nodes searched: {self._stats.num_quiescence_nodes}")
+
+        eval_cache_hit_percent = self._stats.eval_cache_hit_rate * 100
+        Debug.log(f"evaluation cache size: {len(self._evaluation_cache)}"
+            f"/{self._evaluation_cache.capacity} entries")
+        Debug.log(f"evaluation cache hit rate:"
+            f" {self._stats.num_eval_cache_hits}"
+            f"/{self._stats.num_eval_cache_hits + self._stats.num_eval_cache_misses}"
+            f" ({eval_cache_hit_percent:.2f}%)")
+
+        Debug.log(f"deepest completed iteration: {self._best_depth}")
+
         Debug.log("effective branching factor: "
-                  f"{effective_branching_factor:.2f}/{branching_factor:.2f}")
+                  f"{self._stats.effective_branching_factor:.2f}/{self._stats.branching_factor:.2f}")
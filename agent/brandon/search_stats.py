@@ -0,0 +1,79 @@
+"""
+Defines search statistics for Brandon's agent.
+"""
+
+from __future__ import annotations
+from dataclasses import dataclass, fields
+
+
+@dataclass
+class SearchStats:
+    """
+    Counts the work done by a search.
+    Stats are plain ints so that they may be sent between processes and merged.
+    """
+
+    num_tt_reads: int = 0
+    num_tt_hits: int = 0
+    num_nodes_enumerated: int = 0
+    num_nodes_pruned: int = 0
+    num_plies_expanded: int = 0
+    num_eval_cache_hits: int = 0
+    num_eval_cache_misses: int = 0
+    num_quiescence_nodes: int = 0
+
+    @property
+    def num_nodes_explored(self) -> int:
+        """
+        Gets the number of enumerated nodes that were not pruned.
+        :return: an int
+        """
+        return self.num_nodes_enumerated - self.num_nodes_pruned
+
+    @property
+    def prune_rate(self) -> float:
+        """
+        Gets the fraction of enumerated nodes that were pruned.
+        :return: a float in the domain 0..1
+        """
+        return self.num_nodes_pruned / (self.num_nodes_enumerated or 1)
+
+    @property
+    def tt_hit_rate(self) -> float:
+        """
+        Gets the fraction of transposition table reads that were usable.
+        :return: a float in the domain 0..1
+        """
+        return self.num_tt_hits / (self.num_tt_reads or 1)
+
+    @property
+    def eval_cache_hit_rate(self) -> float:
+        """
+        Gets the fraction of evaluations served by the evaluation cache.
+        :return: a float in the domain 0..1
+        """
+        return self.num_eval_cache_hits / ((self.num_eval_cache_hits + self.num_eval_cache_misses) or 1)
+
+    @property
+    def branching_factor(self) -> float:
+        """
+        Gets the average number of moves enumerated per expanded node.
+        :return: a float
+        """
+        return self.num_nodes_enumerated / (self.num_plies_expanded or 1)
+
+    @property
+    def effective_branching_factor(self) -> float:
+        """
+        Gets the average number of moves explored per expanded node.
+        :return: a float
+        """
+        return self.num_nodes_explored / (self.num_plies_expanded or 1)
+
+    def merge(self, other: SearchStats):
+        """
+        Adds the counts of another search into these stats.
+        :param other: a SearchStats
+        """
+        for field in fields(self):
+            setattr(self, field.name, getattr(self, field.name) + getattr(other, field.name))
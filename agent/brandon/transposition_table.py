@@ -1,20 +1,200 @@
 from __future__ import annotations
-from enum import Enum, auto
-from dataclasses import dataclass
-from core.move import Move
+from array import array
+from enum import Enum
+from typing import NamedTuple
+from core.move_encoding import NO_MOVE
 
 
-@dataclass
 class TranspositionTable:
+    """
+    A fixed-size transposition table.
+    Entries are grouped into buckets of two slots: a depth-preferred slot that
+    keeps the deepest result for the current search, and an always-replace slot
+    that keeps the most recent result. Entries left over from previous searches
+    are replaced first.
+    Entries are packed into parallel typed arrays, one per field, with moves
+    stored as 16-bit codes (see `core.move_encoding`).
+    The arrays may instead be laid over a given buffer, e.g. shared memory, so that
+    one table can be read and written by several processes without locking. Keys
+    are stored XORed with a checksum of the rest of the entry, so that entries torn
+    by concurrent writes fail to match instead of returning mixed fields.
+    """
 
     class EntryType(Enum):
-        PV = auto()
-        CUT = auto()
-        ALL = auto()
-
-    @dataclass
-    class Entry:
-        score: float = None
-        depth: int = None
-        move: Move = None
-        type: TranspositionTable.EntryType = None
+        PV = 1
+        CUT = 2
+        ALL = 3
+
+    class Entry(NamedTuple):
+        score: float
+        depth: int
+        move: int  # a move code, or NO_MOVE
+        type: TranspositionTable.EntryType
+
+    # array typecodes for each column
+    KEY_TYPECODE = "Q"
+    SCORE_TYPECODE = "d"
+    DEPTH_TYPECODE = "b"
+    TYPE_TYPECODE = "B"  # 0 denotes an empty slot
+    MOVE_TYPECODE = "H"
+    AGE_TYPECODE = "B"
+
+    # memory footprint of an entry across all columns, in bytes
+    ENTRY_SIZE = sum(array(typecode).itemsize for typecode in (
+        KEY_TYPECODE, SCORE_TYPECODE, DEPTH_TYPECODE, TYPE_TYPECODE, MOVE_TYPECODE, AGE_TYPECODE))
+
+    SLOTS_PER_BUCKET = 2
+    DEFAULT_MEMORY_BUDGET = 64 * 1024 * 1024
+
+    # (attribute, typecode, empty value) for each column, widest first to keep buffer columns aligned
+    COLUMNS = (
+        ("_keys", KEY_TYPECODE, 0),
+        ("_scores", SCORE_TYPECODE, 0.0),
+        ("_moves", MOVE_TYPECODE, NO_MOVE),
+        ("_depths", DEPTH_TYPECODE, 0),
+        ("_types", TYPE_TYPECODE, 0),
+        ("_ages", AGE_TYPECODE, 0),
+    )
+
+    @classmethod
+    def get_num_slots(cls, memory_budget: int) -> int:
+        """
+        Determines the number of entries a table with the given budget holds.
+        :param memory_budget: the approximate number of bytes the table may hold
+        :return: an int
+        """
+        return max(1, memory_budget // (cls.ENTRY_SIZE * cls.SLOTS_PER_BUCKET)) * cls.SLOTS_PER_BUCKET
+
+    @classmethod
+    def get_buffer_size(cls, memory_budget: int) -> int:
+        """
+        Determines the size of the buffer needed by a table with the given budget.
+        :param memory_budget: the approximate number of bytes the table may hold
+        :return: an int
+        """
+        return cls.get_num_slots(memory_budget) * cls.ENTRY_SIZE
+
+    @staticmethod
+    def _get_checksum(score, depth, move_code, entry_type_value):
+        return hash((score, depth, move_code, entry_type_value)) & 0xFFFFFFFFFFFFFFFF
+
+    def __init__(self, memory_budget: int = DEFAULT_MEMORY_BUDGET, buffer=None):
+        """
+        Initializes a transposition table.
+        :param memory_budget: the approximate number of bytes the table may hold
+        :param buffer: a writable buffer of at least `get_buffer_size(memory_budget)` bytes
+        to store entries in, or None to allocate an empty table; entries already in the buffer are kept
+        """
+        num_slots = self.get_num_slots(memory_budget)
+        self._num_buckets = num_slots // self.SLOTS_PER_BUCKET
+
+        if buffer is None:
+            for name, typecode, value in self.COLUMNS:
+                setattr(self, name, array(typecode, [value]) * num_slots)
+        else:
+            # zeroed memory reads as an empty table, whatever the empty move code
+            view = memoryview(buffer)
+            offset = 0
+            for name, typecode, _ in self.COLUMNS:
+                size = num_slots * array(typecode).itemsize
+                setattr(self, name, view[offset:offset + size].cast(typecode))
+                offset += size
+
+        self._age = 0
+
+    def __len__(self):
+        """
+        Determines the number of entries in the table.
+        Counts the occupied slots, so this is slow for large tables.
+        :return: an int
+        """
+        return len(self._types) - self._types.tobytes().count(0)
+
+    @property
+    def capacity(self) -> int:
+        """
+        Gets the maximum number of entries the table can hold.
+        :return: an int
+        """
+        return len(self._keys)
+
+    def new_search(self, age: int = None):
+        """
+        Ages all entries in the table so that they are replaced first.
+        Call before each new search, e.g. once per move.
+        :param age: the age to give new entries, so that processes sharing a table agree;
+        defaults to the next age
+        """
+        self._age = (self._age + 1 if age is None else age) % 256
+
+    def clear(self):
+        """
+        Removes all entries from the table.
+        """
+        self._types[:] = array(self.TYPE_TYPECODE, [0]) * len(self._types)
+
+    def release(self):
+        """
+        Releases the table's views of the buffer it was given, so that the buffer may be closed.
+        The table is unusable afterwards.
+        """
+        for name, _, _ in self.COLUMNS:
+            column = getattr(self, name)
+            if isinstance(column, memoryview):
+                column.release()
+
+    def _get_key(self, slot):
+        return self._keys[slot] ^ self._get_checksum(
+            self._scores[slot], self._depths[slot], self._moves[slot], self._types[slot])
+
+    def probe(self, key: int) -> TranspositionTable.Entry:
+        """
+        Finds the entry for the given position.
+        Callers should only trust entry scores when `entry.depth` is at least
+        the depth being searched; the entry move is useful for ordering regardless.
+        :param key: the Zobrist hash of the position
+        :return: an Entry, or None if the position is not in the table
+        """
+        i = key % self._num_buckets * self.SLOTS_PER_BUCKET
+        for slot in range(i, i + self.SLOTS_PER_BUCKET):
+            entry_type_value = self._types[slot]
+            if not entry_type_value:
+                continue
+
+            # read each field once so that the checksum covers exactly what is returned
+            score = self._scores[slot]
+            depth = self._depths[slot]
+            move_code = self._moves[slot]
+            if self._keys[slot] ^ self._get_checksum(score, depth, move_code, entry_type_value) == key:
+                return TranspositionTable.Entry(
+                    score=score,
+                    depth=depth,
+                    move=move_code,
+                    type=TranspositionTable.EntryType(entry_type_value),
+                )
+        return None
+
+    def store(self, key: int, score: float, depth: int, move_code: int, entry_type: TranspositionTable.EntryType):
+        """
+        Stores a search result for the given position.
+        :param key: the Zobrist hash of the position
+        :param score: the score of the position
+        :param depth: the depth the position was searched to
+        :param move_code: the code of the best move found for the position, or NO_MOVE
+        :param entry_type: the type of bound the score represents
+        """
+        i = key % self._num_buckets * self.SLOTS_PER_BUCKET
+        if (not self._types[i]
+                or self._get_key(i) == key
+                or self._ages[i] != self._age
+                or depth >= self._depths[i]):
+            slot = i
+        else:
+            slot = i + 1  # always-replace slot
+
+        self._keys[slot] = key ^ self._get_checksum(score, depth, move_code, entry_type.value)
+        self._scores[slot] = score
+        self._depths[slot] = depth
+        self._types[slot] = entry_type.value
+        self._moves[slot] = move_code
+        self._ages[slot] = self._age
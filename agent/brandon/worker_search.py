@@ -0,0 +1,64 @@
+"""
+Defines search logic for Brandon's agent within worker processes.
+"""
+
+from time import time, sleep
+from agent.brandon.search import Search
+from agent.brandon.search_stats import SearchStats
+from agent.brandon.transposition_table import TranspositionTable
+from ui.constants import FPS
+
+
+class WorkerSearch(Search):
+    """
+    A search run within a worker process on behalf of a parent search.
+    Reads its stop and pause signals from memory shared with the parent.
+    """
+
+    def __init__(self, stop_flag, paused_flag,
+                 tt_memory_budget: int = TranspositionTable.DEFAULT_MEMORY_BUDGET,
+                 transposition_table: TranspositionTable = None):
+        """
+        Initializes a worker search.
+        :param stop_flag: a shared byte set when the parent search stops
+        :param paused_flag: a shared byte set while the parent search is paused
+        :param tt_memory_budget: the approximate number of bytes the transposition table may hold
+        :param transposition_table: a TranspositionTable to use instead of allocating one, e.g. a shared table
+        """
+        super().__init__(tt_memory_budget, transposition_table)
+        self._stop_flag = stop_flag
+        self._paused_flag = paused_flag
+        self._search_id = None
+        self._table_id = None
+
+    def _begin(self, heuristic, deadline, search_id, table_id=None):
+        """
+        Prepares for a task from the parent search.
+        :param heuristic: the HeuristicEvaluator to evaluate leaves with
+        :param deadline: the time at which to stop searching, or None
+        :param search_id: identifies the parent search; table entries are aged once per parent search
+        :param table_id: identifies the parent's table; the table is cleared when it changes
+        """
+        if table_id != self._table_id:
+            self._table_id = table_id
+            self._transposition_table.clear()
+
+        if search_id != self._search_id:
+            self._search_id = search_id
+            self._transposition_table.new_search(age=search_id)
+
+        self.heuristic = heuristic
+        self._deadline = deadline
+        self._stats = SearchStats()
+
+    def _handle_interrupts(self):
+        if self._paused_flag.value:
+            time_paused = time()
+            while self._paused_flag.value:
+                sleep(1 / FPS)
+
+            if self._deadline:
+                self._deadline += time() - time_paused
+
+        if self._stop_flag.value or self._deadline and time() >= self._deadline:
+            raise StopIteration
@@ -1,4 +1,5 @@
 import math
+from copy import deepcopy
 from time import sleep
 
 from agent.state_generator import StateGenerator
@@ -7,7 +8,7 @@ from ui.model.heuristic_type import HeuristicType
 from core.board import Board
 from core.color import Color
 from core.constants import MAX_SELECTION_SIZE
-from core.move import Move
+from core.move_encoding import decode_move, get_move_kind, get_move_size, MOVE_KIND_PUSH
 from ui.debug import Debug, DebugType
 import ui.constants
 
@@ -22,6 +23,7 @@ class Search:
         self.prune_count = 0
         self.node_count = 0
         self.heuristic_type = None
+        self.heuristic = None
         self.on_find = None
 
     def set_heuristic_type(self, heuristic_type: HeuristicType):
@@ -30,9 +32,19 @@ class Search:
         :param heuristic_type: The heuristic type.
         """
         self.heuristic_type = heuristic_type
+        self.heuristic = heuristic_type.resolve()
 
     def _get_heuristic(self, board: Board, player: Color):
-        return self.heuristic_type.call(board, player)
+        return self.heuristic.evaluate(board, player)
+
+    def _get_frontier_heuristics(self, board: Board, player: Color, moves: list[int], depth: int):
+        """
+        Evaluates all children of a node at once if they are leaves.
+        :return: The heuristic value of each move's child, or None if the children are not leaves.
+        """
+        if depth != 1:
+            return None
+        return self.heuristic.evaluate_children(board, player, moves)
 
     def alpha_beta(self, board: Board, player: Color, on_find: callable):
         """
@@ -45,6 +57,9 @@ class Search:
 
         Debug.log(F"--- Search Start: {player} ---", DebugType.Agent)
 
+        # walk the tree on a private board via make/unmake
+        board = deepcopy(board)
+
         result = "Exhausted"
         try:
             self._alpha_beta_max(board, player, self.MIN, self.MAX,
@@ -77,32 +92,33 @@ class Search:
 
         best_heuristic = self.MIN
 
-        moves = StateGenerator.enumerate_board(board, player)
-        boards = StateGenerator.generate(board, moves)
-        transitions = list(zip(moves, boards))
+        moves = StateGenerator.enumerate_codes(board, player)
 
         if depth >= depth_limit:
-            self._order_nodes(board, transitions)
+            moves = self._order_nodes(moves)
 
-        for index, node in enumerate(transitions):
-            move, next_board = node
+        leaf_heuristics = self._get_frontier_heuristics(board, player, moves, depth)
 
-            if depth >= depth_limit:
-                original_move = move
-
-            heuristic = self._alpha_beta_min(next_board, player,
-                                             alpha, beta,
-                                             depth - 1, depth_limit)
+        for index, move in enumerate(moves):
+            if leaf_heuristics:
+                self.node_count += 1
+                heuristic = leaf_heuristics[index]
+            else:
+                move_record = board.make_move_code(move)
+                heuristic = self._alpha_beta_min(board, player,
+                                                 alpha, beta,
+                                                 depth - 1, depth_limit)
+                board.unmake_move(move_record)
 
             best_heuristic = max(best_heuristic, heuristic)
 
             if depth >= depth_limit:
                 if best_heuristic > alpha:
-                    Debug.log(F"Set Agent Move: {original_move}, {best_heuristic:0.4f}", DebugType.Agent)
-                    self.on_find(original_move)
+                    Debug.log(F"Set Agent Move: {decode_move(move)}, {best_heuristic:0.4f}", DebugType.Agent)
+                    self.on_find(decode_move(move))
 
             if best_heuristic > beta:
-                self.prune_count += len(transitions) - index
+                self.prune_count += len(moves) - index
                 return best_heuristic
 
             alpha = max(alpha, best_heuristic)
@@ -127,18 +143,24 @@ class Search:
 
         best_heuristic = self.MAX
 
-        moves = StateGenerator.enumerate_board(board, Color.next(player))
-        boards = StateGenerator.generate(board, moves)
+        moves = StateGenerator.enumerate_codes(board, Color.next(player))
+        leaf_heuristics = self._get_frontier_heuristics(board, player, moves, depth)
 
-        for index, next_board in enumerate(boards):
-            heuristic = self._alpha_beta_max(next_board, player,
-                                             alpha, beta,
-                                             depth - 1, depth_limit)
+        for index, move in enumerate(moves):
+            if leaf_heuristics:
+                self.node_count += 1
+                heuristic = leaf_heuristics[index]
+            else:
+                move_record = board.make_move_code(move)
+                heuristic = self._alpha_beta_max(board, player,
+                                                 alpha, beta,
+                                                 depth - 1, depth_limit)
+                board.unmake_move(move_record)
 
             best_heuristic = min(best_heuristic, heuristic)
 
             if best_heuristic < alpha:
-                self.prune_count += len(boards) - index
+                self.prune_count += len(moves) - index
                 return best_heuristic
 
             beta = min(beta, best_heuristic)
@@ -146,20 +168,20 @@ class Search:
         return best_heuristic
 
     @classmethod
-    def _order_nodes(cls, board: Board, transitions: list[tuple[Move, Board]]):
+    def _order_nodes(cls, moves: list[int]) -> list[int]:
         """
         Orders nodes based on their value
         """
-        transitions.sort(key=lambda transition: cls._order_move(transition[0], board), reverse=True)
+        return sorted(moves, key=cls._order_move, reverse=True)
 
     @staticmethod
-    def _order_move(move: Move, board: Board):
+    def _order_move(move: int):
         """
-        Gets a comparison value for a move, ordered by sumitos and then move selection size.
+        Gets a comparison value for a move code, ordered by sumitos and then move selection size.
         """
-        if move.is_sumito(board):
+        if get_move_kind(move) >= MOVE_KIND_PUSH:
             return MAX_SELECTION_SIZE + 1
-        return len(move.get_cells())
+        return get_move_size(move)
 
     def _alpha_beta_old(self, depth, first_layer_index, is_max, board, alpha, beta, player, on_find):
         # Minimax with alpha-beta pruning
@@ -0,0 +1,120 @@
+"""
+Contains logic for evaluating the heuristic terms of many positions at once with NumPy.
+"""
+
+import numpy as np
+
+from core.board import Board
+from core.cell_tables import NEIGHBOR_INDICES, NUM_CELLS, OFF_BOARD, BOARD_RADIUS, CENTER_DISTANCES
+from core.color import Color
+from core.move_encoding import find_move_changes
+
+
+# index -> manhattan distance from the center cell
+CENTER_DISTANCE_ARRAY = np.array(CENTER_DISTANCES, dtype=np.int16)
+
+# [index][direction index] -> neighbor index, where off-board neighbors point
+# at an always-empty padding cell appended after the last cell
+NEIGHBOR_INDEX_ARRAY = np.array([[NUM_CELLS if j == OFF_BOARD else j for j in neighbors]
+    for neighbors in NEIGHBOR_INDICES], dtype=np.intp)
+
+
+class BatchEvaluator:
+    """
+    Computes the per-player terms that the heuristics are built from for all
+    children of a position at once.
+    Children are stacked into an N×61 array of `Color.value`s (0 for empty),
+    and each term is reduced over the cell axis, so terms are arrays of
+    length N in move order rather than ints.
+
+    Getters mirror those of `IncrementalEvaluator`, so heuristics that read
+    their terms from an evaluator return an array of N scores when given a
+    batch evaluator.
+    """
+
+    @staticmethod
+    def stack_children(board: Board, move_codes: list[int]) -> np.ndarray:
+        """
+        Stacks the cell states of the positions reached by each move.
+        Moves are applied to rows of the parent's state rather than to the board.
+        :param board: the parent Board
+        :param move_codes: a sequence of encoded Moves valid on the board
+        :return: an N×61 int8 array of `Color.value`s
+        """
+        cells = [color.value if color else 0 for _, color in board.enumerate()]
+        states = np.tile(np.array(cells, dtype=np.int8), (len(move_codes), 1))
+        for row, move_code in zip(states, move_codes):
+            for i, value in find_move_changes(cells, move_code, empty=0):
+                row[i] = value
+        return states
+
+    def __init__(self, board: Board, move_codes: list[int]):
+        """
+        Computes the terms of the children of a position.
+        :param board: the parent Board
+        :param move_codes: a sequence of encoded Moves valid on the board
+        """
+        states = self.stack_children(board, move_codes)
+
+        # pad with an empty cell for off-board neighbors to point to
+        padded_states = np.pad(states, ((0, 0), (0, 1)))
+        neighbor_states = padded_states[:, NEIGHBOR_INDEX_ARRAY]  # N×61×6
+
+        # per-player terms, indexed by `Color.value`
+        self._marble_counts = [None, None, None]
+        self._distances = [None, None, None]
+        self._adjacencies = [None, None, None]
+        self._adjacency_squares = [None, None, None]
+        self._layout_counts = [None, None, None]
+
+        for color in Color:
+            owned = states == color.value
+            neighbor_counts = np.count_nonzero(neighbor_states == color.value, axis=2) * owned
+            self._marble_counts[color.value] = np.count_nonzero(owned, axis=1)
+            self._distances[color.value] = owned @ CENTER_DISTANCE_ARRAY
+            self._adjacencies[color.value] = neighbor_counts.sum(axis=1)
+            self._adjacency_squares[color.value] = (neighbor_counts * neighbor_counts).sum(axis=1)
+            self._layout_counts[color.value] = board.get_score(Color.next(color)) + board.get_marble_count(color)
+
+    def __len__(self):
+        """
+        Gets the number of positions evaluated.
+        """
+        return len(self._marble_counts[Color.BLACK.value])
+
+    def get_marble_count(self, player: Color) -> np.ndarray:
+        """
+        :return: Marble count for player.
+        """
+        return self._marble_counts[player.value]
+
+    def get_score(self, player: Color) -> np.ndarray:
+        """
+        :return: Score for player.
+        """
+        opponent = Color.next(player)
+        return self._layout_counts[opponent.value] - self._marble_counts[opponent.value]
+
+    def get_distance(self, player: Color) -> np.ndarray:
+        """
+        :return: The sum of the manhattan distances of the player's marbles from the center.
+        """
+        return self._distances[player.value]
+
+    def get_centralization(self, player: Color) -> np.ndarray:
+        """
+        :return: The sum of how far each of the player's marbles is from the edge of the board.
+        """
+        return BOARD_RADIUS * self._marble_counts[player.value] - self._distances[player.value]
+
+    def get_adjacency(self, player: Color) -> np.ndarray:
+        """
+        :return: The number of same colored neighbors summed over each of the player's marbles.
+        """
+        return self._adjacencies[player.value]
+
+    def get_adjacency_squared(self, player: Color) -> np.ndarray:
+        """
+        :return: The square of half the number of same colored neighbors summed over each of the player's marbles.
+        """
+        return self._adjacency_squares[player.value] / 4
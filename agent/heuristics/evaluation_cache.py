@@ -0,0 +1,95 @@
+"""
+Contains logic for remembering heuristic values of positions across a search.
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from numbers import Number
+
+from core.color import Color
+
+
+class EvaluationCache:
+    """
+    A least recently used cache of heuristic values, keyed by Zobrist hash.
+    The same position is often evaluated many times over a search, e.g. when
+    reached through different move orders or when pondering re-searches
+    sibling positions, so remembering values saves recomputing them.
+
+    A heuristic's value depends on more than the position, so keys also mix in
+    the heuristic, the player evaluated for, and the heuristic's turn bucket
+    (see `HeuristicEvaluator.get_turn_bucket`). Values may be either a single
+    score or the scores of every child of a position, which are keyed apart.
+    """
+
+    DEFAULT_CAPACITY = 1 << 16
+
+    # keys are kept to the width of a Zobrist hash
+    KEY_MASK = (1 << 64) - 1
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        """
+        Initializes an empty cache.
+        :param capacity: the number of values to hold before evicting the least recently used
+        """
+        self._capacity = capacity
+        self._entries = OrderedDict()
+        self._salts = {}  # (heuristic name, player value, turn bucket, children) -> salt
+
+    def __len__(self):
+        """
+        Gets the number of values held.
+        """
+        return len(self._entries)
+
+    @property
+    def capacity(self) -> int:
+        """
+        Gets the number of values the cache can hold.
+        """
+        return self._capacity
+
+    def get_key(self, board_hash: int, heuristic, player: Color, children: bool = False) -> int:
+        """
+        Gets the key to store a heuristic value of a position under.
+        :param board_hash: the Zobrist hash of the position
+        :param heuristic: the HeuristicEvaluator producing the value
+        :param player: the Color the value is evaluated for
+        :param children: whether the value is the scores of every child of the position
+        :return: an int
+        """
+        salt_key = (heuristic.name, player.value, heuristic.get_turn_bucket(), children)
+        salt = self._salts.get(salt_key)
+        if salt is None:
+            salt = self._salts[salt_key] = hash(salt_key) & self.KEY_MASK
+        return board_hash ^ salt
+
+    def get(self, key: int) -> Number | tuple[Number, ...] | None:
+        """
+        Finds a value and marks it as recently used.
+        :param key: a key from `get_key`
+        :return: the value, or None if it is not held
+        """
+        value = self._entries.get(key)
+        if value is not None:
+            self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: int, value: Number | tuple[Number, ...]):
+        """
+        Stores a value, evicting the least recently used value if the cache is full.
+        :param key: a key from `get_key`
+        :param value: a score or a tuple of scores
+        """
+        entries = self._entries
+        entries[key] = value
+        entries.move_to_end(key)
+        if len(entries) > self._capacity:
+            entries.popitem(last=False)
+
+    def clear(self):
+        """
+        Empties the cache.
+        """
+        self._entries.clear()
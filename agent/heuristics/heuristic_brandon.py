@@ -1,6 +1,6 @@
 from dataclasses import dataclass
-from core.hex import Hex
-from core.constants import BOARD_SIZE
+from core.color import Color
+from core.cell_tables import BOARD_RADIUS, CENTER_DISTANCES, ADJACENT_INDICES
 
 
 @dataclass(frozen=True)
@@ -16,11 +16,11 @@ class HeuristicWeights:
     adjacency_opponent: int
 
 
-def heuristic_offensive(board, color):
+def heuristic_offensive(board, color, evaluator=None):
     """
     An offensive heuristic.
     """
-    return heuristic(board, color, HeuristicWeights(
+    return heuristic(board, color, evaluator=evaluator, weights=HeuristicWeights(
         score=15,
         score_opponent=30,
         centralization=1,
@@ -29,11 +29,11 @@ def heuristic_offensive(board, color):
         adjacency_opponent=0.15
     ))
 
-def heuristic_defensive(board, color):
+def heuristic_defensive(board, color, evaluator=None):
     """
     A defensive heuristic.
     """
-    return heuristic(board, color, HeuristicWeights(
+    return heuristic(board, color, evaluator=evaluator, weights=HeuristicWeights(
         score=15,
         score_opponent=25,
         centralization=1,
@@ -43,34 +43,50 @@ def heuristic_defensive(board, color):
     ))
 
 
-def heuristic(board, color, weights):
+def heuristic(board, color, weights, evaluator=None):
+    """
+    Weighs marble counts, centralization and adjacency for both players.
+    If an IncrementalEvaluator tracking the board is given, the terms are read
+    from it instead of being calculated from the board.
+    """
     MAX_MARBLES = 14
-    BOARD_RADIUS = BOARD_SIZE - 1
-    BOARD_CENTER = Hex(BOARD_RADIUS, BOARD_RADIUS)
 
-    heuristic_score = MAX_MARBLES
-    heuristic_score_opponent = MAX_MARBLES
+    color_opponent = Color.next(color)
+    if evaluator is not None:
+        return (
+            weights.score * (MAX_MARBLES - evaluator.get_marble_count(color_opponent))
+            - weights.score_opponent * (MAX_MARBLES - evaluator.get_marble_count(color))
+            + weights.centralization * evaluator.get_centralization(color)
+            - weights.centralization_opponent * evaluator.get_centralization(color_opponent)
+            + weights.adjacency * evaluator.get_adjacency_squared(color)
+            - weights.adjacency_opponent * evaluator.get_adjacency_squared(color_opponent)
+        )
+
+    heuristic_score = MAX_MARBLES - board.get_marble_count(color_opponent)
+    heuristic_score_opponent = MAX_MARBLES - board.get_marble_count(color)
     heuristic_centralization = 0
     heuristic_centralization_opponent = 0
     heuristic_adjacency = 0
     heuristic_adjacency_opponent = 0
 
-    for cell, cell_color in board.enumerate_nonempty():
-        cell_centralization = BOARD_RADIUS - Hex.manhattan(cell, BOARD_CENTER)
-        cell_adjacency = sum([
-            board[n] == cell_color if n in board else 0
-                for n in Hex.neighbors(cell)
-        ])
+    cells = [cell_color for _, cell_color in board.enumerate()]
+    for i, cell_color in enumerate(cells):
+        if cell_color is None:
+            continue
+
+        cell_centralization = BOARD_RADIUS - CENTER_DISTANCES[i]
+        cell_adjacency = 0
+        for j in ADJACENT_INDICES[i]:
+            if cells[j] is cell_color:
+                cell_adjacency += 1
         cell_adjacency = pow(cell_adjacency / 2, 2)
 
         if cell_color == color:
             heuristic_centralization += cell_centralization
             heuristic_adjacency += cell_adjacency
-            heuristic_score_opponent -= 1
         else:
             heuristic_centralization_opponent += cell_centralization
             heuristic_adjacency_opponent += cell_adjacency
-            heuristic_score -= 1
 
     return (
         weights.score * heuristic_score
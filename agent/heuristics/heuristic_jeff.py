@@ -1,4 +1,5 @@
 from agent.heuristics.heuristic_jonathan import Heuristic
+from core.cell_tables import CENTER_DISTANCES
 from core.color import Color
 
 
@@ -8,10 +9,10 @@ def manhattan(board, player):
 
     opponent = Color.next(player)
 
-    for cell, color in board.enumerate():
+    for i, (_, color) in enumerate(board.enumerate()):
         if color == player:
-            player_manhattan_score += Heuristic.MAX_MANHATTAN_DISTANCE - cell.manhattan(Heuristic.BOARD_CENTER)
+            player_manhattan_score += Heuristic.MAX_MANHATTAN_DISTANCE - CENTER_DISTANCES[i]
         if color == opponent:
-            opponent_manhattan_score += Heuristic.MAX_MANHATTAN_DISTANCE - cell.manhattan(Heuristic.BOARD_CENTER)
+            opponent_manhattan_score += Heuristic.MAX_MANHATTAN_DISTANCE - CENTER_DISTANCES[i]
 
     return player_manhattan_score - opponent_manhattan_score
@@ -1,19 +1,43 @@
+from functools import wraps
 from math import inf
 from numbers import Number
 
+import numpy as np
+
 from core.board import Board
 from core.color import Color
-from core.constants import BOARD_SIZE, WIN_SCORE
-from core.hex import Hex
+from core.cell_tables import CELLS, CENTER_INDEX, BOARD_RADIUS, CENTER_DISTANCES, NEIGHBOR_INDICES, ADJACENT_INDICES
+from core.constants import WIN_SCORE
+from core.hex import HexDirection
+from agent.heuristics.batch_evaluator import BatchEvaluator
+from agent.heuristics.incremental_evaluator import IncrementalEvaluator
 from lib.clamp import clamp_01, clamp
 from lib.remap import remap_01, remap
 from ui import debug
 from ui.debug import DebugType, Debug
 
 
+def _ignore_batch_float_errors(evaluate: callable) -> callable:
+    """
+    Evaluates batches of positions with NumPy's floating point warnings
+    silenced. Terminal positions hold infinite score terms, which are
+    combined with the other terms just as in the scalar path, and would
+    otherwise warn on every batch that holds one.
+    """
+    @wraps(evaluate)
+    def evaluate_batch(cls, board: Board, player: Color, evaluator: IncrementalEvaluator = None):
+        if not isinstance(evaluator, BatchEvaluator):
+            return evaluate(cls, board, player, evaluator)
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return evaluate(cls, board, player, evaluator)
+
+    return evaluate_batch
+
+
 class Heuristic:
-    BOARD_CENTER = Hex(BOARD_SIZE - 1, BOARD_SIZE - 1)
-    MAX_MANHATTAN_DISTANCE = BOARD_SIZE - 1
+    BOARD_CENTER = CELLS[CENTER_INDEX]
+    MAX_MANHATTAN_DISTANCE = BOARD_RADIUS
 
     # Base Weights #
     WEIGHT_SCORE = 0.45
@@ -46,15 +70,27 @@ class Heuristic:
         cls._get_turn_count = lambda: clamp(0, cls.DYNAMIC_TURN_MAX, get_turn_count())
 
     @classmethod
-    def weighted(cls, board: Board, player: Color) -> float:
+    def get_turn_bucket(cls) -> int:
+        """
+        Gets the turn count the dynamic heuristic currently weighs by.
+        Dynamic heuristic values from different buckets are not comparable.
+        :return: The turn count clamped to DYNAMIC_TURN_MAX, or 0 if the handler is not setup.
+        """
+        return cls._get_turn_count() if cls._get_turn_count else 0
+
+    @classmethod
+    @_ignore_batch_float_errors
+    def weighted(cls, board: Board, player: Color, evaluator: IncrementalEvaluator = None) -> float:
         """
         Calculates a heuristic value using 6 base heuristics and individually weighting them.
+        :param evaluator: an IncrementalEvaluator tracking the board, or a BatchEvaluator of positions to
+                          evaluate at once, to read the base heuristics from
         :return: The heuristic value.
         """
         score, score_opponent, \
         manhattan_score, manhattan_opponent_score, \
         adjacency_score, adjacency_opponent_score, \
-        _, _ = cls._composite(board, player)
+        _, _ = cls._composite(board, player, evaluator)
 
         return cls.WEIGHT_SCORE * score \
                + cls.WEIGHT_OPPONENT_SCORE * score_opponent \
@@ -64,15 +100,18 @@ class Heuristic:
                + cls.WEIGHT_OPPONENT_ADJACENCY * adjacency_opponent_score
 
     @classmethod
-    def weighted_normalized(cls, board: Board, player: Color) -> float:
+    @_ignore_batch_float_errors
+    def weighted_normalized(cls, board: Board, player: Color, evaluator: IncrementalEvaluator = None) -> float:
         """
         Calculates a heuristic value using 6 base heuristics and converting them to a number between 0.0 and 1.0
         and then individually weighing those.
+        :param evaluator: an IncrementalEvaluator tracking the board, or a BatchEvaluator of positions to
+                          evaluate at once, to read the base heuristics from
         :return: The heuristic value.
         """
         score, score_opponent, \
         manhattan_score, manhattan_opponent_score, \
-        adjacency_score, adjacency_opponent_score = cls._composite_normalized(board, player)
+        adjacency_score, adjacency_opponent_score = cls._composite_normalized(board, player, evaluator)
 
         return cls.WEIGHT_NORMALIZED_SCORE * score \
                + cls.WEIGHT_NORMALIZED_OPPONENT_SCORE * score_opponent \
@@ -82,7 +121,8 @@ class Heuristic:
                + cls.WEIGHT_NORMALIZED_OPPONENT_ADJACENCY * adjacency_opponent_score
 
     @classmethod
-    def dynamic(cls, board: Board, player: Color) -> float:
+    @_ignore_batch_float_errors
+    def dynamic(cls, board: Board, player: Color, evaluator: IncrementalEvaluator = None) -> float:
         """
         Calculates a heuristic value using 6 base heuristics and converting them to a number between 0.0 and 1.0
         and then scaling those to certain values based on how far the game is from the start to the DYNAMIC_TURN_MAX.
@@ -104,11 +144,13 @@ class Heuristic:
         at the start of the game. As the game progresses it becomes more aggressive focusing on pushing the
         opponent marbles to the outside and off the board.
 
+        :param evaluator: an IncrementalEvaluator tracking the board, or a BatchEvaluator of positions to
+                          evaluate at once, to read the base heuristics from
         :return: The heuristic value.
         """
         score, score_opponent, \
         manhattan_score, manhattan_opponent_score, \
-        adjacency_score, adjacency_opponent_score = cls._composite_normalized(board, player)
+        adjacency_score, adjacency_opponent_score = cls._composite_normalized(board, player, evaluator)
 
         turn_count = 0
         if cls._get_turn_count:
@@ -194,9 +236,9 @@ class Heuristic:
         :return: The heuristic value.
         """
         score = 0
-        for cell, color in board.enumerate():
+        for i, (_, color) in enumerate(board.enumerate()):
             if color is player:
-                score += cls.MAX_MANHATTAN_DISTANCE - cell.manhattan(cls.BOARD_CENTER)
+                score += cls.MAX_MANHATTAN_DISTANCE - CENTER_DISTANCES[i]
         return score
 
     @classmethod
@@ -205,10 +247,11 @@ class Heuristic:
         Calculates heuristic value for centralization of opponent marbles on the board.
         :return: The heuristic value.
         """
+        opponent = Color.next(player)
         score = 0
-        for cell, color in board.enumerate():
-            if color is Color.next(player):
-                score += cell.manhattan(cls.BOARD_CENTER)
+        for i, (_, color) in enumerate(board.enumerate()):
+            if color is opponent:
+                score += CENTER_DISTANCES[i]
         return score
 
     @classmethod
@@ -217,13 +260,14 @@ class Heuristic:
         Calculates heuristic value for adjacency of marbles on the board.
         :return: The heuristic value.
         """
+        cells = [color for _, color in board.enumerate()]
         score = 0
-        for cell, color in board.enumerate():
+        for i, color in enumerate(cells):
             if color is not player:
                 continue
 
-            for neighbour in cell.neighbors():
-                if board.cell_in_bounds(neighbour) and board[neighbour] == player:
+            for j in ADJACENT_INDICES[i]:
+                if cells[j] is player:
                     score += 1
 
         return score
@@ -234,16 +278,18 @@ class Heuristic:
         Calculates heuristic value for adjacency of opponent marbles on the board.
         :return: The heuristic value.
         """
+        opponent = Color.next(player)
+        cells = [color for _, color in board.enumerate()]
         score = 0
-        for cell, color in board.enumerate():
-            if color is not Color.next(player):
+        for i, color in enumerate(cells):
+            if color is not opponent:
                 continue
 
-            for neighbour in cell.neighbors():
-                if not board.cell_in_bounds(neighbour):
-                    score += 1
-                elif board[neighbour] != Color.next(player):
-                    score += 1
+            # off-board neighbors count too
+            score += len(NEIGHBOR_INDICES[i])
+            for j in ADJACENT_INDICES[i]:
+                if cells[j] is opponent:
+                    score -= 1
 
         return score
 
@@ -255,6 +301,8 @@ class Heuristic:
         """
         floor = 0
         ceiling = WIN_SCORE
+        if isinstance(score, np.ndarray):
+            return np.where(score >= inf, inf, remap_01(score, floor, ceiling))
         if score >= inf:
             return inf
         return remap_01(score, floor, ceiling)
@@ -267,6 +315,8 @@ class Heuristic:
         """
         floor = 0
         ceiling = WIN_SCORE
+        if isinstance(score, np.ndarray):
+            return np.where(score <= -inf, -inf, remap_01(score, floor, ceiling))
         if score <= -inf:
             return -inf
         return remap_01(score, floor, ceiling)
@@ -283,7 +333,7 @@ class Heuristic:
         ceiling_max = 36
 
         ceiling = cls._map_limit_by_marble_count(marble_count, ceiling_min, ceiling_max)
-        return clamp_01(remap_01(score, floor, ceiling))
+        return cls._clamp_01(remap_01(score, floor, ceiling))
 
     @classmethod
     def _manhattan_opponent_normalized(cls, score: int, marble_count: int) -> float:
@@ -299,7 +349,7 @@ class Heuristic:
         floor = cls._map_limit_by_marble_count(marble_count, floor_min, floor_max)
         ceiling = cls._map_limit_by_marble_count(marble_count, ceiling_min, ceiling_max)
 
-        return clamp_01(remap_01(score, floor, ceiling))
+        return cls._clamp_01(remap_01(score, floor, ceiling))
 
     @classmethod
     def _adjacency_normalized(cls, score: int, marble_count: int) -> float:
@@ -313,7 +363,7 @@ class Heuristic:
 
         ceiling = cls._map_limit_by_marble_count(marble_count, ceiling_min, ceiling_max)
 
-        return clamp_01(remap_01(score, floor, ceiling))
+        return cls._clamp_01(remap_01(score, floor, ceiling))
 
     @classmethod
     def _adjacency_opponent_normalized(cls, score: int, marble_count: int) -> float:
@@ -329,16 +379,18 @@ class Heuristic:
         floor = cls._map_limit_by_marble_count(marble_count, floor_min, floor_max)
         ceiling = cls._map_limit_by_marble_count(marble_count, ceiling_min, ceiling_max)
 
-        return clamp_01(remap_01(score, floor, ceiling))
+        return cls._clamp_01(remap_01(score, floor, ceiling))
 
     @classmethod
-    def _composite(cls, board: Board, player: Color) -> tuple[int, int, int, int, int, int, int, int]:
+    def _composite(cls, board: Board, player: Color,
+                   evaluator: IncrementalEvaluator = None) -> tuple[int, int, int, int, int, int, int, int]:
         """
         Calculates all of the 6 base heuristics:
         (Score, Opponent Score, Manhattan, Opponent Manhattan, Adjacency, Opponent Adjacency)
 
-        Calculates these in the most optimal way, enumerating the board once to calculate all heuristics and enumerating
-        the board layout once to calculate score heuristics.
+        Calculates these in the most optimal way, enumerating the board once to calculate all heuristics,
+        or reading them from the given evaluator's running terms without enumerating the board at all.
+        Given a BatchEvaluator, each value is an array over the evaluator's positions.
 
         :return: The marbles counts for both players and heuristic values in a tuple of the format:
                  player_count, opponent_count,
@@ -346,6 +398,12 @@ class Heuristic:
                  manhattan_score, manhattan_opponent_score,
                  adjacency_score, adjacency_opponent_score
         """
+        if isinstance(evaluator, BatchEvaluator):
+            return cls._composite_batch(player, evaluator)
+
+        if evaluator is not None:
+            return cls._composite_incremental(board, player, evaluator)
+
         manhattan_score = 0
         manhattan_opponent_score = 0
         adjacency_score = 0
@@ -353,25 +411,22 @@ class Heuristic:
 
         player_count = 0
         opponent_count = 0
-        for cell, color in board.enumerate():
-            for neighbour in cell.neighbors():
-                if color is player:
-                    if board.cell_in_bounds(neighbour) and board[neighbour] == player:
-                        adjacency_score += 1
-                elif color is Color.next(player):
-                    if not board.cell_in_bounds(neighbour):
-                        adjacency_opponent_score += 1
-                    elif board[neighbour] != Color.next(player):
-                        adjacency_opponent_score += 1
-
+        opponent = Color.next(player)
+        cells = [color for _, color in board.enumerate()]
+        for i, color in enumerate(cells):
             if color is player:
                 player_count += 1
-                manhattan_score += cls.MAX_MANHATTAN_DISTANCE - cell.manhattan(cls.BOARD_CENTER)
-            elif color is Color.next(player):
+                manhattan_score += cls.MAX_MANHATTAN_DISTANCE - CENTER_DISTANCES[i]
+                for j in ADJACENT_INDICES[i]:
+                    if cells[j] is player:
+                        adjacency_score += 1
+            elif color is opponent:
                 opponent_count += 1
-                manhattan_opponent_score += cell.manhattan(cls.BOARD_CENTER)
-            else:
-                pass
+                manhattan_opponent_score += CENTER_DISTANCES[i]
+                adjacency_opponent_score += len(NEIGHBOR_INDICES[i])
+                for j in ADJACENT_INDICES[i]:
+                    if cells[j] is opponent:
+                        adjacency_opponent_score -= 1
 
         score, opponent_score = cls._score_optimized(board, player, player_count, opponent_count)
 
@@ -381,7 +436,51 @@ class Heuristic:
                player_count, opponent_count, \
 
     @classmethod
-    def _composite_normalized(cls, board: Board, player: Color) -> tuple[float, float, float, float, float]:
+    def _composite_incremental(cls, board: Board, player: Color,
+                               evaluator: IncrementalEvaluator) -> tuple[int, int, int, int, int, int, int, int]:
+        """
+        Reads the 6 base heuristics from an evaluator tracking the board, in the format of `_composite`.
+        """
+        opponent = Color.next(player)
+        player_count = evaluator.get_marble_count(player)
+        opponent_count = evaluator.get_marble_count(opponent)
+
+        score, opponent_score = cls._score_optimized(board, player, player_count, opponent_count)
+
+        # every side of an opponent marble not shared with another opponent marble counts
+        adjacency_opponent_score = len(HexDirection) * opponent_count - evaluator.get_adjacency(opponent)
+
+        return score, opponent_score, \
+               evaluator.get_centralization(player), evaluator.get_distance(opponent), \
+               evaluator.get_adjacency(player), adjacency_opponent_score, \
+               player_count, opponent_count
+
+    @classmethod
+    def _composite_batch(cls, player: Color, evaluator: BatchEvaluator) -> tuple[np.ndarray, ...]:
+        """
+        Reads the 6 base heuristics for a batch of positions, in the format of `_composite`,
+        with each value an array over the batch.
+        """
+        opponent = Color.next(player)
+        player_count = evaluator.get_marble_count(player)
+        opponent_count = evaluator.get_marble_count(opponent)
+
+        score = evaluator.get_score(player)
+        score = np.where(score >= WIN_SCORE, inf, score)
+
+        opponent_score = evaluator.get_score(opponent)
+        opponent_score = np.where(opponent_score >= WIN_SCORE, -inf, WIN_SCORE - opponent_score)
+
+        adjacency_opponent_score = len(HexDirection) * opponent_count - evaluator.get_adjacency(opponent)
+
+        return score, opponent_score, \
+               evaluator.get_centralization(player), evaluator.get_distance(opponent), \
+               evaluator.get_adjacency(player), adjacency_opponent_score, \
+               player_count, opponent_count
+
+    @classmethod
+    def _composite_normalized(cls, board: Board, player: Color,
+                              evaluator: IncrementalEvaluator = None) -> tuple[float, float, float, float, float]:
         """
         Uses composite function to calculate the base heuristics and applies normalization functions on the results.
 
@@ -394,7 +493,7 @@ class Heuristic:
         score, score_opponent, \
         manhattan_score, manhattan_opponent_score, \
         adjacency_score, adjacency_opponent_score, \
-        player_count, opponent_count = cls._composite(board, player)
+        player_count, opponent_count = cls._composite(board, player, evaluator)
 
         return cls._score_normalized(score), \
                cls._score_opponent_normalized(score_opponent), \
@@ -403,6 +502,16 @@ class Heuristic:
                cls._adjacency_normalized(adjacency_score, player_count), \
                cls._adjacency_opponent_normalized(adjacency_opponent_score, opponent_count)
 
+    @staticmethod
+    def _clamp_01(value):
+        """
+        Clamps a heuristic value, or an array of them, between `0.0` and `1.0`.
+        :return: The clamped heuristic value.
+        """
+        if isinstance(value, np.ndarray):
+            return np.clip(value, 0, 1)
+        return clamp_01(value)
+
     @classmethod
     def _map_limit_by_marble_count(cls, count: int, min: Number, max: Number) -> Number:
         """
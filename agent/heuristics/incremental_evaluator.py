@@ -0,0 +1,151 @@
+"""
+Contains logic for maintaining heuristic terms incrementally as moves are made.
+"""
+
+from core.board import Board, UndoRecord
+from core.cell_tables import CELLS, HEX_INDICES, ADJACENT_INDICES, BOARD_RADIUS, CENTER_DISTANCES
+from core.color import Color
+
+
+class IncrementalEvaluator:
+    """
+    Tracks the per-player terms that the heuristics are built from for a board.
+    Moves made through the evaluator update only the terms of the cells they
+    change and those cells' neighbors, so reading the terms at a leaf does not
+    require scanning the board.
+
+    The board must not be written to other than through the evaluator while
+    the evaluator is in use.
+    """
+
+    def __init__(self, board: Board):
+        """
+        Initializes an evaluator for the given board.
+        :param board: the Board to track
+        """
+        self._board = board
+        self._cells = [None] * len(CELLS)  # index -> Color or None
+
+        # per-player terms, indexed by `Color.value`
+        self._marble_counts = [0, 0, 0]
+        self._distances = [0, 0, 0]  # sum of manhattan distances from the center
+        self._adjacencies = [0, 0, 0]  # number of (marble, same colored neighbor) pairs
+        self._adjacency_squares = [0, 0, 0]  # sum of the squared same colored neighbor count of each marble
+
+        # index -> number of same colored neighbors of the marble at the index
+        self._neighbor_counts = [0] * len(CELLS)
+
+        for cell, color in board.enumerate_nonempty():
+            self._set(HEX_INDICES[cell], color)
+
+    @property
+    def board(self) -> Board:
+        """
+        Gets the board being tracked.
+        """
+        return self._board
+
+    def make_move(self, move_code: int) -> UndoRecord:
+        """
+        Applies a move to the board and updates the terms of the cells it changed.
+        :param move_code: an encoded Move valid on the board
+        :return: an UndoRecord to pass to `unmake_move`
+        """
+        record = self._board.make_move_code(move_code)
+        board = self._board
+        for cell, _ in record.changes:
+            self._set(HEX_INDICES[cell], board[cell])
+        return record
+
+    def unmake_move(self, record: UndoRecord):
+        """
+        Reverts the move that produced the given record and restores the terms of the cells it changed.
+        :param record: an UndoRecord returned by `make_move`
+        """
+        self._board.unmake_move(record)
+        board = self._board
+        for cell, _ in record.changes:
+            self._set(HEX_INDICES[cell], board[cell])
+
+    def get_marble_count(self, player: Color) -> int:
+        """
+        :return: Marble count for player.
+        """
+        return self._marble_counts[player.value]
+
+    def get_score(self, player: Color) -> int:
+        """
+        :return: Score for player.
+        """
+        opponent = Color.next(player)
+        return self._board.get_scores_optimized(player,
+            self._marble_counts[player.value],
+            self._marble_counts[opponent.value])[0]
+
+    def get_distance(self, player: Color) -> int:
+        """
+        :return: The sum of the manhattan distances of the player's marbles from the center.
+        """
+        return self._distances[player.value]
+
+    def get_centralization(self, player: Color) -> int:
+        """
+        :return: The sum of how far each of the player's marbles is from the edge of the board.
+        """
+        return BOARD_RADIUS * self._marble_counts[player.value] - self._distances[player.value]
+
+    def get_adjacency(self, player: Color) -> int:
+        """
+        :return: The number of same colored neighbors summed over each of the player's marbles.
+        """
+        return self._adjacencies[player.value]
+
+    def get_adjacency_squared(self, player: Color) -> float:
+        """
+        :return: The square of half the number of same colored neighbors summed over each of the player's marbles.
+        """
+        return self._adjacency_squares[player.value] / 4
+
+    def _set(self, i: int, value: Color):
+        """
+        Updates the terms for the cell at linear index `i` changing to `value`.
+        :param i: the linear index of the cell
+        :param value: the cell's new Color, or None if the cell is now empty
+        """
+        old_value = self._cells[i]
+        if old_value == value:
+            return
+
+        cells = self._cells
+        neighbor_counts = self._neighbor_counts
+
+        if old_value is not None:
+            color = old_value.value
+            count = neighbor_counts[i]
+            self._marble_counts[color] -= 1
+            self._distances[color] -= CENTER_DISTANCES[i]
+            self._adjacencies[color] -= 2 * count
+            self._adjacency_squares[color] -= count * count
+            for j in ADJACENT_INDICES[i]:
+                if cells[j] is old_value:
+                    # (n - 1)^2 - n^2
+                    self._adjacency_squares[color] -= 2 * neighbor_counts[j] - 1
+                    neighbor_counts[j] -= 1
+            neighbor_counts[i] = 0
+
+        cells[i] = value
+
+        if value is not None:
+            color = value.value
+            count = 0
+            for j in ADJACENT_INDICES[i]:
+                if cells[j] is value:
+                    # (n + 1)^2 - n^2
+                    self._adjacency_squares[color] += 2 * neighbor_counts[j] + 1
+                    neighbor_counts[j] += 1
+                    count += 1
+            neighbor_counts[i] = count
+            self._marble_counts[color] += 1
+            self._distances[color] += CENTER_DISTANCES[i]
+            self._adjacencies[color] += 2 * count
+            self._adjacency_squares[color] += count * count
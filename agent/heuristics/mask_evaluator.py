@@ -0,0 +1,199 @@
+"""
+Contains logic for computing heuristic terms straight from the masks of a BitBoard.
+"""
+
+import numpy as np
+
+from agent.heuristics.batch_evaluator import BatchEvaluator
+from agent.heuristics.incremental_evaluator import IncrementalEvaluator
+from core.bit_tables import DIRECTION_SHIFTS, DISTANCE_MASKS
+from core.bitboard import BitBoard, MaskUndoRecord
+from core.board import Board
+from core.cell_tables import BOARD_RADIUS
+from core.color import Color
+
+
+# the shifts of the directions that move cells to higher bits, each of
+# which pairs with the opposite direction's shift of the same size
+_NEIGHBOR_SHIFTS = tuple(shift for shift in DIRECTION_SHIFTS if shift > 0)
+
+# (distance, mask) for each distance from the center that adds to the sum of distances
+_DISTANCE_MASKS = tuple((i, mask) for i, mask in enumerate(DISTANCE_MASKS) if i)
+
+
+def find_mask_terms(mask: int) -> tuple[int, int, int, int]:
+    """
+    Computes the heuristic terms of one player's marbles from their mask.
+    Each marble's same colored neighbor count is summed bit-sliced: every
+    direction's neighbors are shifted onto the marbles they neighbor and added
+    into three masks holding the 1s, 2s and 4s bits of each marble's count.
+    :param mask: a mask in the bit layout of a `BitBoard`
+    :return: the marble count, the sum of manhattan distances from the center, the
+        sum of same colored neighbor counts, and the sum of their squares
+    """
+    ones = twos = fours = 0
+    for shift in _NEIGHBOR_SHIFTS:
+        # masks only hold cells on the board, so shifted masks need no clipping
+        for neighbors in (mask & mask >> shift, mask & mask << shift):
+            carry = ones & neighbors
+            ones ^= neighbors
+            fours |= twos & carry
+            twos ^= carry
+
+    distance = 0
+    for i, distance_mask in _DISTANCE_MASKS:
+        distance += i * (mask & distance_mask).bit_count()
+
+    # with each count as o + 2t + 4f over bits o, t, f: count^2 = o + 4t + 16f + 4ot + 8of + 16tf
+    num_ones, num_twos, num_fours = ones.bit_count(), twos.bit_count(), fours.bit_count()
+    adjacency = num_ones + 2 * num_twos + 4 * num_fours
+    adjacency_squares = (num_ones + 4 * num_twos + 16 * num_fours
+        + 4 * (ones & twos).bit_count() + 8 * (ones & fours).bit_count() + 16 * (twos & fours).bit_count())
+    return mask.bit_count(), distance, adjacency, adjacency_squares
+
+
+def create_evaluator(board: Board) -> IncrementalEvaluator:
+    """
+    Creates the evaluator that tracks a board's terms fastest.
+    :param board: a Board or BitBoard
+    :return: a MaskEvaluator for BitBoards, or an IncrementalEvaluator otherwise
+    """
+    return MaskEvaluator(board) if isinstance(board, BitBoard) else IncrementalEvaluator(board)
+
+
+def create_batch_evaluator(board: Board, move_codes: list[int]) -> BatchEvaluator:
+    """
+    Creates the evaluator that computes the terms of a board's children fastest.
+    :param board: the parent Board or BitBoard
+    :param move_codes: a sequence of encoded Moves valid on the board
+    :return: a MaskBatchEvaluator for BitBoards, or a BatchEvaluator otherwise
+    """
+    if isinstance(board, BitBoard):
+        return MaskBatchEvaluator(board, move_codes)
+    return BatchEvaluator(board, move_codes)
+
+
+class MaskEvaluator(IncrementalEvaluator):
+    """
+    Provides the terms of `IncrementalEvaluator` for a BitBoard, computed from
+    its masks when read rather than maintained cell by cell as moves are made.
+    Terms are cached against the mask they were computed from, so a player's
+    terms are only recomputed once their marbles have moved.
+    """
+
+    def __init__(self, board: BitBoard):
+        """
+        Initializes an evaluator for the given board.
+        :param board: the BitBoard to track
+        """
+        self._board = board
+
+        # [Color.value] -> (mask, marble count, distance, adjacency, adjacency squares)
+        self._terms = [None, (None,), (None,)]
+
+    def make_move(self, move_code: int) -> MaskUndoRecord:
+        """
+        Applies a move to the board.
+        :param move_code: an encoded Move valid on the board
+        :return: a MaskUndoRecord to pass to `unmake_move`
+        """
+        return self._board.make_move_code(move_code)
+
+    def unmake_move(self, record: MaskUndoRecord):
+        """
+        Reverts the move that produced the given record.
+        :param record: a MaskUndoRecord returned by `make_move`
+        """
+        self._board.unmake_move(record)
+
+    def get_marble_count(self, player: Color) -> int:
+        """
+        :return: Marble count for player.
+        """
+        return self._get_terms(player)[1]
+
+    def get_score(self, player: Color) -> int:
+        """
+        :return: Score for player.
+        """
+        opponent = Color.next(player)
+        return self._board.get_scores_optimized(player,
+            self.get_marble_count(player),
+            self.get_marble_count(opponent))[0]
+
+    def get_distance(self, player: Color) -> int:
+        """
+        :return: The sum of the manhattan distances of the player's marbles from the center.
+        """
+        return self._get_terms(player)[2]
+
+    def get_centralization(self, player: Color) -> int:
+        """
+        :return: The sum of how far each of the player's marbles is from the edge of the board.
+        """
+        terms = self._get_terms(player)
+        return BOARD_RADIUS * terms[1] - terms[2]
+
+    def get_adjacency(self, player: Color) -> int:
+        """
+        :return: The number of same colored neighbors summed over each of the player's marbles.
+        """
+        return self._get_terms(player)[3]
+
+    def get_adjacency_squared(self, player: Color) -> float:
+        """
+        :return: The square of half the number of same colored neighbors summed over each of the player's marbles.
+        """
+        return self._get_terms(player)[4] / 4
+
+    def _get_terms(self, player: Color) -> tuple[int, int, int, int, int]:
+        """
+        Gets the player's terms for the board's current masks, computing them if they have changed.
+        :return: a tuple of the mask the terms are for and the terms of `find_mask_terms`
+        """
+        mask = self._board.get_mask(player)
+        terms = self._terms[player.value]
+        if terms[0] != mask:
+            terms = (mask, *find_mask_terms(mask))
+            self._terms[player.value] = terms
+        return terms
+
+
+class MaskBatchEvaluator(BatchEvaluator):
+    """
+    Provides the terms of `BatchEvaluator` for the children of a BitBoard,
+    computed from each child's masks without stacking their cells.
+    Most moves leave one player's mask unchanged, so terms are computed once
+    per distinct mask.
+    """
+
+    def __init__(self, board: BitBoard, move_codes: list[int]):
+        """
+        Computes the terms of the children of a position.
+        :param board: the parent BitBoard
+        :param move_codes: a sequence of encoded Moves valid on the board
+        """
+        terms_by_mask = {}
+        child_terms = ([], [])
+        for move_code in move_codes:
+            for masks_terms, mask in zip(child_terms, board.get_child_masks(move_code)):
+                terms = terms_by_mask.get(mask)
+                if terms is None:
+                    terms = find_mask_terms(mask)
+                    terms_by_mask[mask] = terms
+                masks_terms.append(terms)
+
+        # per-player terms, indexed by `Color.value`
+        self._marble_counts = [None, None, None]
+        self._distances = [None, None, None]
+        self._adjacencies = [None, None, None]
+        self._adjacency_squares = [None, None, None]
+        self._layout_counts = [None, None, None]
+
+        for color, masks_terms in zip(Color, child_terms):
+            terms = np.array(masks_terms, dtype=np.int64).reshape(len(move_codes), 4)
+            self._marble_counts[color.value] = terms[:, 0]
+            self._distances[color.value] = terms[:, 1]
+            self._adjacencies[color.value] = terms[:, 2]
+            self._adjacency_squares[color.value] = terms[:, 3]
+            self._layout_counts[color.value] = board.get_score(Color.next(color)) + board.get_marble_count(color)
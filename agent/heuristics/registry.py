@@ -0,0 +1,154 @@
+"""
+Contains the registry of heuristics available to the searches, by name.
+"""
+
+from __future__ import annotations
+
+from numbers import Number
+
+from agent.heuristics.batch_evaluator import BatchEvaluator
+from agent.heuristics.heuristic_brandon import heuristic_offensive, heuristic_defensive
+from agent.heuristics.heuristic_jonathan import Heuristic
+from agent.heuristics.incremental_evaluator import IncrementalEvaluator
+from agent.heuristics.mask_evaluator import create_batch_evaluator
+from core.board import Board
+from core.color import Color
+
+
+class HeuristicEvaluator:
+    """
+    A heuristic bound to its evaluation entry points, held directly by searches.
+    Every heuristic evaluates a board from scratch; heuristics may also
+    provide entry points that read their terms from an IncrementalEvaluator
+    or a BatchEvaluator, and fall back to evaluating from scratch otherwise.
+
+    Evaluators pickle by name so that they can be sent to worker processes,
+    which see the heuristics registered when this module (or a module that
+    registers heuristics) is imported.
+    """
+
+    def __init__(self, name: str, evaluate: callable,
+                 evaluate_incremental: callable = None, evaluate_batch: callable = None,
+                 get_turn_bucket: callable = None):
+        """
+        Binds a heuristic to its entry points.
+        :param name: the name to register the heuristic under
+        :param evaluate: a Callable[Board, Color] -> Number
+        :param evaluate_incremental: a Callable[Board, Color, IncrementalEvaluator] -> Number, if supported
+        :param evaluate_batch: a Callable[Board, Color, BatchEvaluator] -> numpy.ndarray, if supported
+        :param get_turn_bucket: a Callable -> int, if the heuristic's values depend on the game's progress
+        """
+        self._name = name
+        self._evaluate = evaluate
+        self._evaluate_incremental = evaluate_incremental
+        self._evaluate_batch = evaluate_batch
+        self._get_turn_bucket = get_turn_bucket
+
+    def __reduce__(self):
+        return get_heuristic, (self._name,)
+
+    def __repr__(self):
+        return f"HeuristicEvaluator({self._name!r})"
+
+    @property
+    def name(self) -> str:
+        """
+        Gets the name the heuristic is registered under.
+        """
+        return self._name
+
+    def get_turn_bucket(self) -> int:
+        """
+        Gets the stage of the game the heuristic currently evaluates for.
+        Values from different buckets may differ for the same position, so should not be cached together.
+        :return: an int, always 0 for heuristics that do not depend on the game's progress
+        """
+        return self._get_turn_bucket() if self._get_turn_bucket else 0
+
+    def evaluate(self, board: Board, player: Color) -> Number:
+        """
+        Evaluates a board from scratch.
+        :param board: a Board
+        :param player: the Color to evaluate for
+        :return: the heuristic value
+        """
+        return self._evaluate(board, player)
+
+    def evaluate_incremental(self, board: Board, player: Color, evaluator: IncrementalEvaluator) -> Number:
+        """
+        Evaluates a board from the terms of an evaluator tracking it, if supported.
+        :param board: a Board
+        :param player: the Color to evaluate for
+        :param evaluator: an IncrementalEvaluator tracking the board
+        :return: the heuristic value
+        """
+        if self._evaluate_incremental is None:
+            return self._evaluate(board, player)
+        return self._evaluate_incremental(board, player, evaluator)
+
+    def evaluate_children(self, board: Board, player: Color, move_codes: list[int]) -> list[Number]:
+        """
+        Evaluates the children of a board all at once, if supported, or one at a time otherwise.
+        :param board: the parent Board; restored before returning
+        :param player: the Color to evaluate for
+        :param move_codes: a sequence of encoded Moves valid on the board
+        :return: the heuristic value of each move's child, in move order
+        """
+        if self._evaluate_batch is not None:
+            return self._evaluate_batch(board, player, create_batch_evaluator(board, move_codes)).tolist()
+
+        scores = []
+        for move_code in move_codes:
+            move_record = board.make_move_code(move_code)
+            scores.append(self._evaluate(board, player))
+            board.unmake_move(move_record)
+        return scores
+
+
+# name -> HeuristicEvaluator
+_heuristics = {}
+
+
+def register_heuristic(heuristic: HeuristicEvaluator) -> HeuristicEvaluator:
+    """
+    Makes a heuristic available by name, replacing any heuristic of the same name.
+    :param heuristic: a HeuristicEvaluator
+    :return: the HeuristicEvaluator
+    """
+    _heuristics[heuristic.name] = heuristic
+    return heuristic
+
+
+def get_heuristic(name: str) -> HeuristicEvaluator:
+    """
+    Finds a registered heuristic.
+    Raises KeyError if no heuristic is registered under the name.
+    :param name: the name of the heuristic
+    :return: a HeuristicEvaluator
+    """
+    return _heuristics[name]
+
+
+def list_heuristics() -> list[str]:
+    """
+    Lists the names of all registered heuristics, in registration order.
+    :return: a list of strs
+    """
+    return list(_heuristics)
+
+
+def _register_builtin_heuristics():
+    # the built-in heuristics read their terms from either kind of evaluator when given one
+    for name, evaluate in (
+        ("WEIGHTED_NORMALIZED", Heuristic.weighted_normalized),
+        ("WEIGHTED", Heuristic.weighted),
+        ("DYNAMIC", Heuristic.dynamic),
+        ("BRANDON_OFFENSIVE", heuristic_offensive),
+        ("BRANDON_DEFENSIVE", heuristic_defensive),
+    ):
+        register_heuristic(HeuristicEvaluator(name, evaluate,
+            evaluate_incremental=evaluate,
+            evaluate_batch=evaluate,
+            get_turn_bucket=Heuristic.get_turn_bucket if evaluate == Heuristic.dynamic else None))
+
+_register_builtin_heuristics()
@@ -0,0 +1,140 @@
+"""
+Contains logic for storing and looking up searched moves by position.
+"""
+
+from __future__ import annotations
+
+from agent.position_store import PositionStore, PositionStoreBuilder
+from agent.state_generator import StateGenerator
+from core.board import Board
+from core.color import Color
+from core.move import Move
+from core.move_encoding import decode_move
+
+
+class MoveTable:
+    """
+    A table of best moves and the depths they were searched to, keyed by
+    the Zobrist hash of the position with the side to move.
+
+    On disk, a table is a PositionStore, so loading a table only maps its file.
+    Moves added since the table was loaded are held in memory until it is saved.
+    """
+
+    def __init__(self, store: PositionStore = None):
+        """
+        Initializes a table.
+        :param store: the PositionStore holding the table's saved moves, or None for an empty table
+        """
+        self._store = store
+        self._builder = PositionStoreBuilder()
+
+    def __len__(self):
+        """
+        Gets the number of positions in the table.
+        """
+        if self._store is None:
+            return len(self._builder)
+        return len(self._store) + sum(1 for key, _, _ in self._builder if self._store.get(key) is None)
+
+    @staticmethod
+    def get_key(board: Board, player: Color) -> int:
+        """
+        Gets the key of a position in the table.
+        :param board: a Board
+        :param player: the Color to move
+        :return: an int
+        """
+        return board.get_hash(player)
+
+    def _get_entry(self, key: int) -> tuple[int, int] | None:
+        entry = self._builder.get(key)
+        if entry is None and self._store is not None:
+            entry = self._store.get(key)
+        return entry
+
+    def get_move(self, board: Board, player: Color) -> Move | None:
+        """
+        Finds the move for a position.
+        Moves are checked against the position's valid moves, so hash
+        collisions never produce an illegal move.
+        :param board: a Board
+        :param player: the Color to move
+        :return: a Move, or None if the position is not in the table
+        """
+        entry = self._get_entry(self.get_key(board, player))
+        if entry is None:
+            return None
+
+        move_code, _ = entry
+        if move_code not in StateGenerator.enumerate_codes(board, player):
+            return None
+
+        return decode_move(move_code)
+
+    def get_depth(self, board: Board, player: Color) -> int:
+        """
+        Gets the depth the move for a position was searched to.
+        :param board: a Board
+        :param player: the Color to move
+        :return: an int, or 0 if the position is not in the table
+        """
+        entry = self._get_entry(self.get_key(board, player))
+        return entry[1] if entry else 0
+
+    @property
+    def has_unsaved_moves(self) -> bool:
+        """
+        Determines if moves have been added since the table was loaded or saved.
+        """
+        return len(self._builder) > 0
+
+    def put(self, board: Board, player: Color, move_code: int, depth: int):
+        """
+        Stores the move for a position, unless the table already holds a
+        move for it that was searched deeper.
+        :param board: a Board
+        :param player: the Color to move
+        :param move_code: the code of the move to play, as generated against the board
+        :param depth: the depth the move was searched to
+        """
+        self.put_key(self.get_key(board, player), move_code, depth)
+
+    def put_key(self, key: int, move_code: int, depth: int):
+        """
+        Stores the move for a position by its key, as from `get_key`, unless
+        the table already holds a move for it that was searched deeper.
+        :param key: the key of the position
+        :param move_code: the code of the move to play, as generated against the position
+        :param depth: the depth the move was searched to
+        """
+        entry = self._get_entry(key)
+        if entry is None or entry[1] <= depth:
+            self._builder.put(key, move_code, depth)
+
+    def save(self, file_path: str):
+        """
+        Writes the table to a file, which the table then reads its moves from.
+        :param file_path: the path of the file to write
+        """
+        try:
+            self._builder.write(file_path, base=self._store)
+        except BaseException:
+            # the store is closed before being replaced, so reopen it if it was not
+            if self._store is not None:
+                self._store.close()
+                self._store = PositionStore(self._store.file_path)
+            raise
+
+        self._store = PositionStore(file_path)
+        self._builder = PositionStoreBuilder()
+
+    @classmethod
+    def load(cls, file_path: str) -> MoveTable:
+        """
+        Opens a table written by `save`.
+        Raises ValueError if the file is not a table.
+        :param file_path: the path of the file to read
+        :return: a MoveTable
+        """
+        return cls(PositionStore(file_path))
@@ -0,0 +1,14 @@
+"""
+Contains logic for storing and looking up precomputed opening moves.
+"""
+
+from agent.move_table import MoveTable
+
+
+class OpeningBook(MoveTable):
+    """
+    A table of best moves for positions near the start of the game.
+    Books are generated offline (see `headless.opening_book`) by searching
+    each position far deeper than a turn's time limit allows, so agents can
+    play book moves instantly and save their time for later in the game.
+    """
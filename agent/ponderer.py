@@ -1,9 +1,13 @@
+from __future__ import annotations
+
 from abc import abstractmethod
 from enum import Enum, auto
 from core.board import Board
 from core.color import Color
+from core.move import Move
+from core.move_encoding import encode_move, decode_move
 from agent.base import BaseAgent
-from agent.zobrist import Zobrist
+from agent.move_table import MoveTable
 from ui.debug import Debug, DebugType
 
 
@@ -11,6 +15,13 @@ class PonderingAgent(BaseAgent):
     """
     An abstract base class for agents with pondering capabilities.
     Exposes an interface around a refutation table for mapping boards to refutation moves.
+    The table maps the hashes of positions, with the side to move, to move
+    codes and the depths they were searched to, and codes are decoded as
+    they are read. Refutations may also be kept across games in a refutation
+    store, which is looked up when the table has none.
+    Refutations are only played if they were searched at least as deep as
+    the agent's last search on its own turn, which they would otherwise be
+    played in place of.
     """
 
     class SearchMode(Enum):
@@ -23,41 +34,72 @@ class PonderingAgent(BaseAgent):
     def __init__(self):
         super().__init__()
         self._refutation_table = {}
+        self._refutation_store = None
+        self._search_depth = None  # the depth reached by the last search on the agent's turn
 
-    def get_refutation_move(self, board):
+    def get_refutation_move(self, board: Board, player: Color) -> Move | None:
         """
         Gets the refutation move for the given board.
         :param board: a Board
-        :return: a Move if refutation move is cached else None
+        :param player: the Color to move
+        :return: a Move if a refutation move searched deep enough is cached else None
         """
-        board_hash = Zobrist.create_board_hash(board)
+        board_hash = board.get_hash(player)
+        min_depth = self._search_depth
+        move = None
+        if min_depth is not None:
+            entry = self._refutation_table.get(board_hash)
+            if entry is not None and entry[1] >= min_depth:
+                move = decode_move(entry[0])
+            elif (self._refutation_store is not None
+                    and self._refutation_store.get_depth(board, player) >= min_depth):
+                move = self._refutation_store.get_move(board, player)
 
-        if board_hash in self._refutation_table:
-            Debug.log(f"refutation table hit {board_hash} -> {self._refutation_table[board_hash]}",
+        if move is not None:
+            Debug.log(f"refutation table hit {board_hash} -> {move}",
                 DebugType.Agent)
         else:
             Debug.log(f"refutation table miss {board_hash} -> None",
                 DebugType.Agent)
 
-        return (self._refutation_table[board_hash]
-            if board_hash in self._refutation_table
-            else None)
+        return move
 
-    def set_refutation_move(self, board, refutation_move):
+    def set_refutation_move(self, board: Board, player: Color, refutation_move: Move, depth: int = 0):
         """
         Sets the refutation move for the given board.
         :param board: a Board
+        :param player: the Color to move
         :param refutation_move: a Move
+        :param depth: the depth the move was searched to
         """
-        board_hash = Zobrist.create_board_hash(board)
-        self._refutation_table[board_hash] = refutation_move
+        self._refutation_table[board.get_hash(player)] = (encode_move(refutation_move, board), depth)
 
     def clear_refutation_table(self):
         """
-        Clears the refutation table.
+        Clears the refutation table, recording its refutations in the refutation store first.
         """
+        self.store_refutations()
         self._refutation_table.clear()
 
+    def set_refutation_store(self, refutation_store: MoveTable | None):
+        """
+        Sets the store to record refutations in and to look them up in when the refutation table has none.
+        Refutation stores may be shared between agents, and are saved by their owner.
+        :param refutation_store: a MoveTable, or None to only use the refutation table
+        """
+        self._refutation_store = refutation_store
+
+    def store_refutations(self):
+        """
+        Records the refutation table in the refutation store, if any.
+        """
+        if self._refutation_store is None:
+            return
+
+        # copied at once, as pondering may still be adding refutations
+        for board_hash, (move_code, depth) in list(self._refutation_table.items()):
+            self._refutation_store.put_key(board_hash, move_code, depth)
+
     @abstractmethod
     def ponder(self, board: Board, player: Color,
               on_find: callable, on_complete: callable = None):
@@ -0,0 +1,212 @@
+"""
+Contains logic for storing search results for large numbers of positions on disk.
+"""
+
+from __future__ import annotations
+
+from mmap import mmap, ACCESS_READ
+from os import replace
+from struct import Struct
+from typing import Iterable, Iterator
+
+
+class PositionStore:
+    """
+    A read-only table of move codes and the depths they were searched to,
+    keyed by position hash, read from a file that is memory-mapped rather
+    than loaded. Opening a store only reads its header, and each lookup
+    binary searches the file's sorted records, so even very large stores
+    open instantly and only keep the pages they touch resident.
+    Stores are written by a PositionStoreBuilder.
+
+    On disk, a store is a short header followed by fixed-width records
+    sorted by hash, each holding a hash, a move code, and a search depth.
+    """
+
+    FILE_MAGIC = b"ABPS"
+    FILE_VERSION = 1
+
+    # magic, version, number of records
+    HEADER = Struct("<4sHI")
+
+    # position hash, move code, search depth
+    RECORD = Struct("<QHH")
+
+    # the position hash at the start of a record
+    RECORD_KEY = Struct("<Q")
+
+    def __init__(self, file_path: str):
+        """
+        Opens a store written by a PositionStoreBuilder.
+        Raises ValueError if the file is not a store.
+        :param file_path: the path of the file to read
+        """
+        self._file_path = file_path
+        with open(file_path, mode="rb") as file:
+            try:
+                self._data = mmap(file.fileno(), 0, access=ACCESS_READ)
+            except ValueError:  # raised for empty files, which cannot be mapped
+                raise ValueError(f"'{file_path}' is not a position store") from None
+
+        if len(self._data) < self.HEADER.size:
+            self.close()
+            raise ValueError(f"'{file_path}' is not a position store")
+
+        magic, version, self._num_records = self.HEADER.unpack_from(self._data)
+        if (magic != self.FILE_MAGIC or version != self.FILE_VERSION
+                or len(self._data) != self.HEADER.size + self._num_records * self.RECORD.size):
+            self.close()
+            raise ValueError(f"'{file_path}' is not a position store")
+
+    def __len__(self):
+        """
+        Gets the number of positions in the store.
+        """
+        return self._num_records
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    @property
+    def file_path(self) -> str:
+        """
+        Gets the path of the file the store was read from.
+        """
+        return self._file_path
+
+    def close(self):
+        """
+        Unmaps the store's file. The store may not be read from afterwards.
+        """
+        self._data.close()
+
+    def get(self, key: int) -> tuple[int, int] | None:
+        """
+        Finds the record for a position.
+        :param key: the position hash
+        :return: the move code and search depth, or None if the position is not in the store
+        """
+        lo, hi = 0, self._num_records
+        while lo < hi:
+            mid = (lo + hi) // 2
+            offset = self.HEADER.size + mid * self.RECORD.size
+            mid_key, = self.RECORD_KEY.unpack_from(self._data, offset)
+            if mid_key < key:
+                lo = mid + 1
+            elif mid_key > key:
+                hi = mid
+            else:
+                _, move_code, depth = self.RECORD.unpack_from(self._data, offset)
+                return move_code, depth
+        return None
+
+    def __iter__(self) -> Iterator[tuple[int, int, int]]:
+        """
+        Iterates over the store's records in hash order.
+        :return: an iterator of (hash, move code, search depth) tuples
+        """
+        for offset in range(self.HEADER.size, len(self._data), self.RECORD.size):
+            yield self.RECORD.unpack_from(self._data, offset)
+
+
+class PositionStoreBuilder:
+    """
+    Collects new search results in memory and merges them into a store file.
+    Where a position has several results, the one searched deepest is kept,
+    and the newest of those searched equally deep.
+    """
+
+    def __init__(self):
+        self._entries = {}  # position hash -> (move code, depth)
+
+    def __len__(self):
+        """
+        Gets the number of positions collected.
+        """
+        return len(self._entries)
+
+    def get(self, key: int) -> tuple[int, int] | None:
+        """
+        Finds the result collected for a position.
+        :param key: the position hash
+        :return: the move code and search depth, or None if no result was collected for the position
+        """
+        return self._entries.get(key)
+
+    def put(self, key: int, move_code: int, depth: int):
+        """
+        Collects the result for a position, unless a result searched deeper was already collected.
+        :param key: the position hash
+        :param move_code: the code of the best move
+        :param depth: the depth the move was searched to
+        """
+        entry = self._entries.get(key)
+        if entry is None or entry[1] <= depth:
+            self._entries[key] = (move_code, depth)
+
+    def update(self, records: Iterable[tuple[int, int, int]]):
+        """
+        Collects many results at once, such as the records of a PositionStore.
+        :param records: an iterable of (hash, move code, search depth) tuples
+        """
+        for key, move_code, depth in records:
+            self.put(key, move_code, depth)
+
+    def __iter__(self) -> Iterator[tuple[int, int, int]]:
+        """
+        Iterates over the collected results in hash order.
+        :return: an iterator of (hash, move code, search depth) tuples
+        """
+        for key in sorted(self._entries):
+            move_code, depth = self._entries[key]
+            yield key, move_code, depth
+
+    def write(self, file_path: str, base: PositionStore = None):
+        """
+        Writes the collected results to a store file, merged with the records of an existing store.
+        The file is written in full before it replaces any file at the path,
+        and the base store is read sequentially, so stores of any size can
+        be merged into without loading them. The base store is closed once
+        merged, so that it may be the store at the path being replaced.
+        :param file_path: the path of the file to write
+        :param base: a PositionStore whose records to keep, or None to write only the collected results
+        """
+        records = self._merge(base) if base is not None else iter(self)
+        temp_file_path = f"{file_path}.tmp"
+        num_records = 0
+
+        with open(temp_file_path, mode="wb") as file:
+            file.write(PositionStore.HEADER.pack(PositionStore.FILE_MAGIC, PositionStore.FILE_VERSION, 0))
+            for record in records:
+                file.write(PositionStore.RECORD.pack(*record))
+                num_records += 1
+            file.seek(0)
+            file.write(PositionStore.HEADER.pack(PositionStore.FILE_MAGIC, PositionStore.FILE_VERSION, num_records))
+
+        if base is not None:
+            base.close()
+        replace(temp_file_path, file_path)
+
+    def _merge(self, base: PositionStore) -> Iterator[tuple[int, int, int]]:
+        """
+        Merges the collected results into the records of a store, both in hash order.
+        """
+        new_records = iter(self)
+        new_record = next(new_records, None)
+        for base_record in base:
+            while new_record is not None and new_record[0] < base_record[0]:
+                yield new_record
+                new_record = next(new_records, None)
+
+            if new_record is not None and new_record[0] == base_record[0]:
+                yield new_record if new_record[2] >= base_record[2] else base_record
+                new_record = next(new_records, None)
+            else:
+                yield base_record
+
+        while new_record is not None:
+            yield new_record
+            new_record = next(new_records, None)
@@ -1,17 +1,54 @@
 from __future__ import annotations
 
 import random
+from array import array
 from copy import deepcopy
 from typing import List
 
+from core.bit_tables import BIT_INDICES, BOARD_MASK, EDGE_MASK, EXIT_MASKS, shift_mask
+from core.bitboard import BitBoard
 from core.board import Board
+from core.cell_tables import DIRECTIONS, NEIGHBOR_INDICES, RAYS, OFF_BOARD, EDGE_FLAGS, \
+    FORWARD_DIRECTION_INDICES, OPPOSITE_DIRECTION_INDICES
 from core.color import Color
-from core.hex import HexDirection, Hex
 from core.move import Move
+from core.move_encoding import decode_move, NUM_MOVE_IDS, MOVE_KIND_SHIFT, MOVE_KIND_SINGLE, \
+    MOVE_KIND_SIDESTEP, MOVE_KIND_INLINE, MOVE_KIND_PUSH, MOVE_KIND_CAPTURE
 from core.selection import Selection
 from parse.state_parser import StateParser
 
 
+def _setup_move_order_keys():
+    move_keys = [0] * NUM_MOVE_IDS
+    capture_keys = [0] * NUM_MOVE_IDS
+    for move_id in range(NUM_MOVE_IDS):
+        origin = move_id & 0x3F
+        size = (move_id >> 6 & 0x3) + 1
+        code_direction = move_id >> 8 & 0x3
+        direction = move_id >> 10 & 0x7
+        if code_direction >= len(FORWARD_DIRECTION_INDICES):
+            continue
+
+        # origin, then single moves before lines, lines by line direction then size, then direction
+        group = 0 if size == 1 else 1 + code_direction * 2 + size - 2
+        move_keys[move_id] = ((origin * 8 + group) * 8 + direction) << 16
+
+        # origin, line direction, size, then forward before backward
+        is_backward = direction != FORWARD_DIRECTION_INDICES[code_direction]
+        capture_keys[move_id] = ((origin * 8 + code_direction * 2 + size - 2) * 2 + is_backward) << 16
+    return tuple(move_keys), tuple(capture_keys)
+
+_move_order_keys = _setup_move_order_keys()
+
+# [move id] -> a key that sorts codes in the order `enumerate_codes` walks a Board
+# in, shifted past the 16 bits of a move code so that keys and codes may be packed
+# into one int and sorted without a key function
+MOVE_ORDER_KEYS = _move_order_keys[0]
+
+# [move id] -> as `MOVE_ORDER_KEYS`, for the order of `enumerate_captures`
+CAPTURE_ORDER_KEYS = _move_order_keys[1]
+
+
 class StateGenerator:
 
     @classmethod
@@ -27,13 +64,14 @@ class StateGenerator:
             print(F"{i + 1} => {StateParser.convert_board_to_text(boards[i])}")
 
     @staticmethod
-    def generate_random_move(board: Board, player: Color):
+    def generate_random_move(board: Board, player: Color, rng: random.Random = None):
         """
         Searches valid moves for a board and chooses one at random.
+        :param rng: the Random to choose with, defaulting to the shared one
         :return: A random move.
         """
         moves = StateGenerator.enumerate_board(board, player)
-        return random.choice(moves)
+        return (rng or random).choice(moves)
 
     @staticmethod
     def generate(board: Board, moves: List[Move]) -> List[Board]:
@@ -47,52 +85,292 @@ class StateGenerator:
 
         return boards
 
-    @classmethod
-    def enumerate_board(cls, board: Board, current_player: Color) -> List[Move]:
+    @staticmethod
+    def enumerate_board(board: Board, current_player: Color) -> List[Move]:
         """
-        Enumerates through every position on the board and finds every possible unique selection for a player.
-        From each selection, iterates through every possible move, finding only valid moves.
+        Finds every valid move for a player in a single pass over the board.
+        Moves are decoded from `enumerate_codes`, and are shared, so callers must not mutate them.
         :return: List of valid moves for a board.
         """
-        selections = []
-        for cell, _ in board.enumerate():
-            if board.cell_owned_by(cell, current_player):
-                possible_selections = cls._get_possible_selections(board, cell, current_player)
-                selections.extend([selection for selection in possible_selections if selection not in selections])
+        return [decode_move(move_code) for move_code in StateGenerator.enumerate_codes(board, current_player)]
+
+    @staticmethod
+    def enumerate_codes(board: Board, current_player: Color) -> array:
+        """
+        Finds every valid move for a player in a single pass over the board, as move codes.
+        Each selection line is generated once from its lowest-index cell by walking the
+        precomputed rays in `core.cell_tables`, and each of its six moves is then resolved
+        against those same rays.
+        Codes include their kind (see `core.move_encoding`).
+        Moves on a BitBoard are found from its masks instead, in the same order.
+        :return: An array('H') of move codes.
+        """
+        if isinstance(board, BitBoard):
+            return StateGenerator._enumerate_mask_codes(board, current_player)
+
+        state = [color for _, color in board.enumerate()]
+
+        move_codes = array("H")
+        for origin, color in enumerate(state):
+            if color is not current_player:
+                continue
+
+            for direction, target in enumerate(NEIGHBOR_INDICES[origin]):
+                if target != OFF_BOARD and state[target] is None:
+                    move_codes.append(origin | direction << 10)
+
+            for code_direction, line_direction in enumerate(FORWARD_DIRECTION_INDICES):
+                line = [origin]
+                for cell in RAYS[origin][line_direction][:Selection.MAX_SIZE - 1]:
+                    if state[cell] is not current_player:
+                        break
+
+                    line.append(cell)
+                    selection_code = origin | (len(line) - 1) << 6 | code_direction << 8
+                    for direction in range(len(DIRECTIONS)):
+                        if direction == line_direction:
+                            kind = StateGenerator._resolve_inline_move(state, line[-1], direction, len(line))
+                        elif direction == OPPOSITE_DIRECTION_INDICES[line_direction]:
+                            kind = StateGenerator._resolve_inline_move(state, origin, direction, len(line))
+                        elif StateGenerator._is_valid_sidestep_move(state, line, direction):
+                            kind = MOVE_KIND_SIDESTEP
+                        else:
+                            kind = None
+
+                        if kind is not None:
+                            move_codes.append(selection_code | direction << 10 | kind << MOVE_KIND_SHIFT)
+
+        return move_codes
+
+    @staticmethod
+    def enumerate_captures(board: Board, current_player: Color) -> array:
+        """
+        Finds every sumito move for a player that pushes an opposing marble off the board or onto its edge.
+        Walks the same selection lines as `enumerate_codes`, but only resolves their inline moves.
+        Moves on a BitBoard are found from its masks instead, in the same order.
+        :return: An array('H') of move codes.
+        """
+        if isinstance(board, BitBoard):
+            return StateGenerator._enumerate_mask_captures(board, current_player)
+
+        state = [color for _, color in board.enumerate()]
+
+        move_codes = array("H")
+        for origin, color in enumerate(state):
+            if color is not current_player:
+                continue
+
+            for code_direction, line_direction in enumerate(FORWARD_DIRECTION_INDICES):
+                line = [origin]
+                for cell in RAYS[origin][line_direction][:Selection.MAX_SIZE - 1]:
+                    if state[cell] is not current_player:
+                        break
+
+                    line.append(cell)
+                    selection_code = origin | (len(line) - 1) << 6 | code_direction << 8
+                    for front, direction in ((cell, line_direction),
+                                             (origin, OPPOSITE_DIRECTION_INDICES[line_direction])):
+                        kind = StateGenerator._resolve_capture(state, front, direction, len(line))
+                        if kind is not None:
+                            move_codes.append(selection_code | direction << 10 | kind << MOVE_KIND_SHIFT)
+
+        return move_codes
+
+    @staticmethod
+    def _enumerate_mask_codes(board: BitBoard, current_player: Color) -> array:
+        """
+        Finds every valid move for a player on a BitBoard, in the order of `enumerate_codes`.
+        Rather than resolving the moves of each marble in turn, each kind of
+        move is resolved for every selection at once by shifting the board's
+        masks (see `core.bit_tables`), so only valid moves are ever visited.
+        :return: An array('H') of move codes.
+        """
+        player_mask = board.get_mask(current_player)
+        opponent_mask = board.get_mask(Color.next(current_player))
+        empty_mask = BOARD_MASK & ~(player_mask | opponent_mask)
 
-        moves = []
-        for possible_selection in selections:
-            moves.extend(cls._get_valid_moves(board, possible_selection, current_player))
+        keyed_codes = []
+        inline_fronts = []
+        for direction in range(len(DIRECTIONS)):
+            can_move = shift_mask(empty_mask, OPPOSITE_DIRECTION_INDICES[direction])
+            StateGenerator._add_mask_codes(keyed_codes, MOVE_ORDER_KEYS,
+                player_mask & can_move, direction << 10, MOVE_KIND_SINGLE)
+            inline_fronts.append(StateGenerator._find_inline_fronts(opponent_mask, can_move, direction))
 
-        return moves
+        for code_direction, line_direction in enumerate(FORWARD_DIRECTION_INDICES):
+            backward = OPPOSITE_DIRECTION_INDICES[line_direction]
+            pairs = player_mask & shift_mask(player_mask, backward)
+            triples = pairs & shift_mask(pairs, backward)
+            for direction in range(len(DIRECTIONS)):
+                for size, origins in ((2, pairs), (3, triples)):
+                    selection_code = (size - 1) << 6 | code_direction << 8 | direction << 10
+                    if direction == line_direction or direction == backward:
+                        for kind, fronts in zip((MOVE_KIND_INLINE, MOVE_KIND_PUSH, MOVE_KIND_CAPTURE),
+                                                inline_fronts[direction][size - 2]):
+                            StateGenerator._add_mask_codes(keyed_codes, MOVE_ORDER_KEYS,
+                                origins & StateGenerator._find_line_origins(fronts, line_direction, size, direction),
+                                selection_code, kind)
+                    else:
+                        # every marble of the line needs an empty cell beside it
+                        can_move = shift_mask(empty_mask, OPPOSITE_DIRECTION_INDICES[direction])
+                        for _ in range(size - 1):
+                            can_move &= shift_mask(can_move, backward)
+                        StateGenerator._add_mask_codes(keyed_codes, MOVE_ORDER_KEYS,
+                            origins & can_move, selection_code, MOVE_KIND_SIDESTEP)
+
+        return StateGenerator._sort_keyed_codes(keyed_codes)
 
     @staticmethod
-    def _get_possible_selections(board: Board, origin_cell: Hex, current_player: Color) -> List[Selection]:
+    def _enumerate_mask_captures(board: BitBoard, current_player: Color) -> array:
         """
-        Gets every possible selection from a cell of origin on the board.
-        :return: List of selections from an origin cell.
+        Finds every capture for a player on a BitBoard, in the order of `enumerate_captures`.
+        Resolved from the board's masks as in `_enumerate_mask_codes`.
+        :return: An array('H') of move codes.
         """
-        selections = [
-            Selection(origin_cell)
-        ]
+        player_mask = board.get_mask(current_player)
+        opponent_mask = board.get_mask(Color.next(current_player))
+        edge_mask = EDGE_MASK & ~(player_mask | opponent_mask)
 
-        for direction in HexDirection:
-            next_cell = origin_cell
-            for i in range(Selection.MAX_SIZE - 1):
-                next_cell = Hex.add(next_cell, direction.value)
+        keyed_codes = []
+        for code_direction, line_direction in enumerate(FORWARD_DIRECTION_INDICES):
+            backward = OPPOSITE_DIRECTION_INDICES[line_direction]
+            pairs = player_mask & shift_mask(player_mask, backward)
+            triples = pairs & shift_mask(pairs, backward)
+            for direction in (line_direction, backward):
+                # pushes only count as captures if they push a marble onto the edge
+                can_push = shift_mask(edge_mask, OPPOSITE_DIRECTION_INDICES[direction])
+                inline_fronts = StateGenerator._find_inline_fronts(opponent_mask, can_push, direction)
+                for size, origins in ((2, pairs), (3, triples)):
+                    selection_code = (size - 1) << 6 | code_direction << 8 | direction << 10
+                    _, push_fronts, capture_fronts = inline_fronts[size - 2]
+                    for kind, fronts in ((MOVE_KIND_PUSH, push_fronts), (MOVE_KIND_CAPTURE, capture_fronts)):
+                        StateGenerator._add_mask_codes(keyed_codes, CAPTURE_ORDER_KEYS,
+                            origins & StateGenerator._find_line_origins(fronts, line_direction, size, direction),
+                            selection_code, kind)
 
-                if not board.cell_owned_by(next_cell, current_player):
-                    break
+        return StateGenerator._sort_keyed_codes(keyed_codes)
 
-                selections.append(Selection(origin_cell, next_cell))
+    @staticmethod
+    def _find_inline_fronts(opponent_mask: int, can_move: int, direction: int) -> tuple[tuple[int, int, int], ...]:
+        """
+        Finds the cells that may lead an inline move in a direction, by what the move would do.
+        Mirrors `_resolve_inline_move` on masks.
+        :param opponent_mask: the mask of the opposing marbles
+        :param can_move: the mask of the cells whose neighbor in the direction is free to move into
+        :param direction: the direction index of the move
+        :return: the masks of the fronts of moves that move, push and capture, for lines of 2 and 3 marbles
+        """
+        backward = OPPOSITE_DIRECTION_INDICES[direction]
+        facing = shift_mask(opponent_mask, backward)
+        push_1 = facing & shift_mask(can_move, backward)
+        capture_1 = facing & shift_mask(EXIT_MASKS[direction], backward)
+        push_2 = facing & shift_mask(push_1, backward)
+        capture_2 = facing & shift_mask(capture_1, backward)
+        return (can_move, push_1, capture_1), (can_move, push_1 | push_2, capture_1 | capture_2)
 
-        return selections
+    @staticmethod
+    def _find_line_origins(fronts: int, line_direction: int, size: int, direction: int) -> int:
+        """
+        Finds the lowest-index cells of the lines led by the given fronts in an inline move.
+        :param fronts: the mask of the cells leading the move
+        :param line_direction: the forward direction index of the lines
+        :param size: the number of marbles in the lines
+        :param direction: the direction index of the move
+        :return: a mask of the lines' origins
+        """
+        if direction != line_direction:
+            return fronts
+
+        backward = OPPOSITE_DIRECTION_INDICES[line_direction]
+        for _ in range(size - 1):
+            fronts = shift_mask(fronts, backward)
+        return fronts
+
+    @staticmethod
+    def _add_mask_codes(keyed_codes: list[int], keys: tuple[int, ...], origins: int, selection_code: int, kind: int):
+        """
+        Adds the code of a move for each selection origin in a mask, packed with its order key.
+        :param keyed_codes: the list to add to
+        :param keys: the order key of each move id
+        :param origins: the mask of the selections' lowest-index cells
+        :param selection_code: the bits of the move codes other than their origin and kind
+        :param kind: the kind of the moves
+        """
+        kind_code = kind << MOVE_KIND_SHIFT
+        while origins:
+            bit = origins & -origins
+            move_id = BIT_INDICES[bit.bit_length() - 1] | selection_code
+            keyed_codes.append(keys[move_id] | kind_code | move_id)
+            origins ^= bit
+
+    @staticmethod
+    def _sort_keyed_codes(keyed_codes: list[int]) -> array:
+        """
+        Sorts move codes packed with order keys and strips their keys.
+        :return: An array('H') of move codes.
+        """
+        keyed_codes.sort()
+        return array("H", [keyed_code & 0xFFFF for keyed_code in keyed_codes])
+
+    @staticmethod
+    def _resolve_capture(state: list[Color], front: int, direction: int, size: int) -> int:
+        """
+        Determines if a line of marbles may push opposing marbles inline, and if the
+        last marble pushed leaves the board or lands on its edge.
+        :param state: the color at each cell index
+        :param front: the index of the selection cell leading the move
+        :param size: the number of cells in the selection
+        :return: MOVE_KIND_CAPTURE or MOVE_KIND_PUSH if the move is a capture, otherwise None.
+        """
+        player = state[front]
+        ray = RAYS[front][direction]
+        if not ray or state[ray[0]] is None or state[ray[0]] is player:
+            return None
+
+        # fewer opposing marbles than selected marbles may be pushed
+        for i in range(1, size):
+            if i >= len(ray):
+                return MOVE_KIND_CAPTURE
+            color = state[ray[i]]
+            if color is None:
+                return MOVE_KIND_PUSH if EDGE_FLAGS[ray[i]] else None
+            if color is player:
+                return None
+        return None
+
+    @staticmethod
+    def _resolve_inline_move(state: list[Color], front: int, direction: int, size: int) -> int:
+        """
+        Determines if a line of marbles may move inline, pushing opposing marbles if necessary.
+        Mirrors `Board._is_valid_inline_move` on cell indices.
+        :param state: the color at each cell index
+        :param front: the index of the selection cell leading the move
+        :param size: the number of cells in the selection
+        :return: The move's kind if it is valid, otherwise None.
+        """
+        player = state[front]
+        ray = RAYS[front][direction]
+        for i in range(Board.MAX_SUMITO):
+            if i >= len(ray):
+                # only valid if opposing marbles are pushed off
+                return MOVE_KIND_CAPTURE if i > 0 else None
+            color = state[ray[i]]
+            if color is None:
+                return MOVE_KIND_PUSH if i > 0 else MOVE_KIND_INLINE
+            if color is player or i + 1 >= size:
+                return None
+        return None
 
     @staticmethod
-    def _get_valid_moves(board: Board, selection: Selection, current_player: Color) -> List[Move]:
+    def _is_valid_sidestep_move(state: list[Color], line: list[int], direction: int) -> bool:
         """
-        Iterates through a move in every direction from a selection on the board and filters for valid moves.
-        :return: List of valid moves from given selection.
+        Determines if a line of marbles may move broadside into empty cells.
+        :param state: the color at each cell index
+        :param line: the indices of the cells in the selection
+        :return: If the move is valid.
         """
-        moves = [Move(selection, direction) for direction in HexDirection]
-        return [move for move in moves if board.is_valid_move(move, current_player)]
+        for cell in line:
+            target = NEIGHBOR_INDICES[cell][direction]
+            if target == OFF_BOARD or state[target] is not None:
+                return False
+        return True
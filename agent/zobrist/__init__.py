@@ -1,5 +0,0 @@
-from agent.zobrist.hashing import create_board_hash, update_board_hash
-
-class Zobrist:
-    create_board_hash = create_board_hash
-    update_board_hash = update_board_hash
@@ -0,0 +1,79 @@
+"""
+Benchmarks searches on a fixed corpus of positions.
+
+Example:
+    python benchmark.py --engines brandon --depth 3 --time-limit 2 --save-baseline baseline.json
+    python benchmark.py --engines brandon --depth 3 --time-limit 2 --baseline baseline.json
+    python benchmark.py --engines brandon --depth 3 --time-limit 0 --board bitboard --baseline baseline.json
+"""
+
+from argparse import ArgumentParser
+
+from agent.heuristics.registry import list_heuristics
+from core.board_type import BoardType
+from headless.benchmark import Engine, POSITIONS_DIRECTORY, REGRESSION_THRESHOLD, load_positions, \
+    run_benchmark, write_results, read_results, compare_results
+from ui.debug import Debug, DebugType
+from ui.model.heuristic_type import HeuristicType
+
+
+def parse_args():
+    """
+    Parses the benchmark options from the command line.
+    :return: an argparse.Namespace
+    """
+    parser = ArgumentParser(description="Benchmarks searches on a fixed corpus of positions.")
+    parser.add_argument("--positions", default=POSITIONS_DIRECTORY,
+        help="directory of Test<#>.input positions")
+    parser.add_argument("--engines", nargs="+", choices=[engine.value for engine in Engine],
+        default=[Engine.BRANDON.value])
+    parser.add_argument("--heuristic", choices=list_heuristics(), default=HeuristicType.BRANDON_OFFENSIVE.name)
+    parser.add_argument("--board", choices=[board_type.value for board_type in BoardType],
+        default=BoardType.BOARD.value, help="board representation to search on")
+    parser.add_argument("--depth", type=int, default=3, help="fixed search depth (0 to skip)")
+    parser.add_argument("--time-limit", type=float, default=2.0, help="fixed search time in seconds (0 to skip)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes for parallel engines")
+    parser.add_argument("--baseline", default=None, help="path of a baseline to compare against")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD,
+        help="relative nodes/sec drop to flag as a regression")
+    parser.add_argument("--save-baseline", default=None, help="path to write results to as a new baseline")
+    parser.add_argument("--verbose", action="store_true", help="keep search debug logging")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if not args.verbose:
+        for debug_type in DebugType:
+            Debug.ACTIVE_DEBUG_TYPES[debug_type] = False
+
+    results = run_benchmark(
+        positions=load_positions(args.positions),
+        engines=[Engine(engine) for engine in args.engines],
+        heuristic_name=args.heuristic,
+        depth=args.depth or None,
+        time_limit=args.time_limit or None,
+        num_workers=args.workers,
+        board_type=BoardType(args.board),
+        on_result=lambda result: print(
+            f"{result.position} {result.engine} {result.mode}={result.limit}:"
+            f" depth {result.depth}, best move {result.best_move},"
+            f" {result.nodes} nodes in {result.seconds:.2f}s ({result.nodes_per_second:.0f} nodes/s),"
+            f" TT hit rate {result.tt_hit_rate * 100:.1f}%,"
+            f" EBF {result.effective_branching_factor:.2f}"),
+    )
+
+    total_nodes = sum(result.nodes for result in results)
+    total_seconds = sum(result.seconds for result in results)
+    print(f"total: {total_nodes} nodes in {total_seconds:.2f}s ({total_nodes / (total_seconds or 1):.0f} nodes/s)")
+
+    if args.baseline:
+        for line in compare_results(results, read_results(args.baseline), args.threshold):
+            print(line)
+
+    if args.save_baseline:
+        write_results(args.save_baseline, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Contains precomputed lookup tables for the bit layout of a `BitBoard`.
+The cell at (x, y) is held in bit `x + y * BIT_ROW_WIDTH` of a mask. Rows
+are one bit wider than the board, so a cell's neighbors are always the
+same number of bits away from it: shifting a whole mask by a direction's
+`DIRECTION_SHIFTS` moves every cell in it one step in that direction, and
+cells shifted off the board land on bits outside of `BOARD_MASK`.
+"""
+
+from core.cell_tables import CELLS, DIRECTIONS, OPPOSITE_DIRECTION_INDICES, \
+    NEIGHBOR_INDICES, EDGE_FLAGS, CENTER_DISTANCES, BOARD_RADIUS, OFF_BOARD
+from core.constants import BOARD_MAX_COLS
+
+
+# the number of bits given to each row of cells, leaving one unused bit
+# after each row for cells shifted past its end to land on
+BIT_ROW_WIDTH = BOARD_MAX_COLS + 1
+
+# [index] -> the bit of the cell at the linear index (see `core.cell_tables`)
+CELL_BITS = tuple(1 << (cell.x + cell.y * BIT_ROW_WIDTH) for cell in CELLS)
+
+
+def _setup_bit_indices():
+    table = [OFF_BOARD] * (BIT_ROW_WIDTH * BOARD_MAX_COLS)
+    for i, bit in enumerate(CELL_BITS):
+        table[bit.bit_length() - 1] = i
+    return tuple(table)
+
+# bit position -> linear index of the cell held there, or OFF_BOARD
+BIT_INDICES = _setup_bit_indices()
+
+# the bits of every cell on the board
+BOARD_MASK = sum(CELL_BITS)
+
+# [direction index] -> the number of bits to shift a mask left by to move its cells one
+# step in the direction; negative for directions in which cells move to lower bits
+DIRECTION_SHIFTS = tuple(d.value.x + d.value.y * BIT_ROW_WIDTH for d in DIRECTIONS)
+
+# [direction index] -> the bits of the cells whose neighbor in the direction is off the board
+EXIT_MASKS = tuple(sum(bit for i, bit in enumerate(CELL_BITS) if NEIGHBOR_INDICES[i][d] == OFF_BOARD)
+    for d in range(len(DIRECTIONS)))
+
+# the bits of the cells on the edge of the board, i.e. with an off-board neighbor
+EDGE_MASK = sum(bit for i, bit in enumerate(CELL_BITS) if EDGE_FLAGS[i])
+
+# [distance] -> the bits of the cells at that manhattan distance from the center, for
+# distances 0..BOARD_RADIUS
+DISTANCE_MASKS = tuple(sum(bit for i, bit in enumerate(CELL_BITS) if CENTER_DISTANCES[i] == distance)
+    for distance in range(BOARD_RADIUS + 1))
+
+
+def shift_mask(mask: int, direction: int) -> int:
+    """
+    Moves every cell of a mask one step in a direction, dropping cells that leave the board.
+    :param mask: a mask in the bit layout of a `BitBoard`
+    :param direction: a direction index (see `core.cell_tables`)
+    :return: an int
+    """
+    shift = DIRECTION_SHIFTS[direction]
+    return (mask << shift if shift > 0 else mask >> -shift) & BOARD_MASK
+
+
+def find_neighbor_masks(mask: int) -> tuple[int, ...]:
+    """
+    Finds, for each direction, the cells whose neighbor in that direction is in a mask.
+    :param mask: a mask in the bit layout of a `BitBoard`
+    :return: a tuple of ints, by direction index
+    """
+    return tuple(shift_mask(mask, OPPOSITE_DIRECTION_INDICES[d]) for d in range(len(DIRECTIONS)))
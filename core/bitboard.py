@@ -0,0 +1,539 @@
+"""
+Contains a bitboard-backed Abalone board.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+from core.bit_tables import CELL_BITS, BIT_INDICES, BIT_ROW_WIDTH
+from core.board import Board
+from core.cell_tables import CELLS, HEX_INDICES, NEIGHBOR_INDICES, RAYS, \
+    DIRECTION_INDICES, OFF_BOARD
+from core.color import Color
+from core.constants import BOARD_MAX_COLS
+from core.hex import Hex
+from core.zobrist import zobrist_keys, zobrist_side_key, NUM_COLORS
+from core.move import Move
+from core.move_encoding import encode_move, NUM_MOVE_IDS, MOVE_ID_MASK, MOVE_SOURCES, MOVE_TARGETS, \
+    PUSH_TARGETS
+from core.selection import Selection
+
+
+def _setup_bit_keys():
+    tables = [None]
+    for color in Color:
+        table = [0] * (BIT_ROW_WIDTH * BOARD_MAX_COLS)
+        for i, bit in enumerate(CELL_BITS):
+            table[bit.bit_length() - 1] = zobrist_keys[i * NUM_COLORS + color.value - 1]
+        tables.append(tuple(table))
+    return tables
+
+# [Color.value][bit position] -> the Zobrist key of a marble of the color at the bit's cell
+_BIT_KEYS = _setup_bit_keys()
+
+
+def _setup_move_bits():
+    move_bits = [0] * NUM_MOVE_IDS
+    move_keys = [None, [0] * NUM_MOVE_IDS, [0] * NUM_MOVE_IDS]
+    for move_id in range(NUM_MOVE_IDS):
+        cells = [i for i in MOVE_SOURCES[move_id] + MOVE_TARGETS[move_id] if i != OFF_BOARD]
+        for i in cells:
+            move_bits[move_id] |= CELL_BITS[i]
+            for color in Color:
+                move_keys[color.value][move_id] ^= zobrist_keys[i * NUM_COLORS + color.value - 1]
+    return tuple(move_bits), tuple(tuple(keys) if keys else None for keys in move_keys)
+
+_move_bits = _setup_move_bits()
+
+# [move id] -> the bits of the cells a move empties and fills with its own marbles (see
+# `MOVE_SOURCES` and `MOVE_TARGETS`), i.e. the bits it toggles in its player's mask
+_MOVE_BITS = _move_bits[0]
+
+# [Color.value][move id] -> the Zobrist keys of a marble of the color toggled by the
+# cells of `_MOVE_BITS`, i.e. the change a move makes to the hash besides pushes
+_MOVE_KEYS = _move_bits[1]
+
+
+@dataclass
+class MaskUndoRecord:
+    """
+    Records the masks and hash of a BitBoard before a move so that the move may be unmade.
+    The changed cells of a Board's UndoRecord are found from them when asked for.
+    """
+    black_mask: int
+    white_mask: int
+    hash: int
+    changed_bits: int
+
+    @property
+    def changes(self) -> list[tuple[Hex, Color]]:
+        """
+        Gets the cells changed by the move and their values before it.
+        :return: a list of (Hex, Color) tuples, as in `UndoRecord`
+        """
+        changes = []
+        bits = self.changed_bits
+        while bits:
+            bit = bits & -bits
+            value = (Color.BLACK if self.black_mask & bit
+                else Color.WHITE if self.white_mask & bit
+                else None)
+            changes.append((CELLS[BIT_INDICES[bit.bit_length() - 1]], value))
+            bits ^= bit
+        return changes
+
+
+class BitBoard:
+    """
+    An Abalone board stored as one occupancy mask per color.
+    A cell's bit (see `core.bit_tables`) is set in a mask if the cell holds a
+    marble of that color, so moves may be generated and positions evaluated
+    for all cells at once by shifting masks.
+    Implements the same API as `Board` so searches may run on either; moves
+    are made from precomputed per-move masks and keys, and unmade by
+    restoring the masks and hash they were made from.
+    """
+
+    MAX_SUMITO = Board.MAX_SUMITO
+
+    @staticmethod
+    def create_from_data(data: list[list[int]]) -> BitBoard:
+        """
+        Creates a bitboard from the given board data.
+        The original board data is cached within the board for score calculations.
+        :param data: an array of arrays of domain 0..2
+        :return: a BitBoard
+        """
+        board = BitBoard()
+        board._layout = data
+        i = 0
+        for line in data:
+            for val in line:
+                if val in (Color.BLACK.value, Color.WHITE.value):
+                    board._masks[val] |= CELL_BITS[i]
+                i += 1
+        board._update_hash((0, 0))
+        return board
+
+    @staticmethod
+    def create_from_board(board) -> BitBoard:
+        """
+        Creates a bitboard with the same layout and state as the given board.
+        :param board: a Board
+        :return: a BitBoard
+        """
+        bitboard = BitBoard()
+        bitboard._layout = board.layout
+        bitboard.copy_state(board)
+        return bitboard
+
+    def __init__(self):
+        """
+        Initializes an empty bitboard.
+        """
+        self._layout = None
+        self._layout_counts = None
+        self._masks = [0, 0, 0]  # indexed by `Color.value`; index 0 is unused
+        self._hash = 0
+        self.__items = None
+        self.__items_key = None
+        self.__items_nonempty = None
+        self.__items_nonempty_key = None
+
+    def __deepcopy__(self, memo):
+        # the starting layout is never written to, so copies may share it
+        board = BitBoard()
+        board._layout = self._layout
+        board._layout_counts = self._layout_counts
+        board._masks = self._masks.copy()
+        board._hash = self._hash
+        return board
+
+    @property
+    def layout(self) -> list[list[int]]:
+        """
+        Gets the board's starting layout.
+        Used for headlessly calculating game score.
+        """
+        return self._layout
+
+    @property
+    def masks(self) -> tuple[int, int]:
+        """
+        Gets the occupancy masks for black and white respectively.
+        :return: a tuple of ints
+        """
+        return self._masks[Color.BLACK.value], self._masks[Color.WHITE.value]
+
+    @property
+    def hash(self) -> int:
+        """
+        Gets the board's Zobrist hash, maintained as moves are applied.
+        Does not include the side to move; see `get_hash`.
+        """
+        return self._hash
+
+    def get_mask(self, player: Color) -> int:
+        """
+        Gets the occupancy mask for the given player.
+        :param player: a Color
+        :return: an int
+        """
+        return self._masks[player.value]
+
+    def get_hash(self, player: Color) -> int:
+        """
+        Gets the board's Zobrist hash with the given player to move.
+        :param player: a Color
+        :return: an int
+        """
+        return self._hash ^ zobrist_side_key if player == Color.WHITE else self._hash
+
+    def enumerate(self) -> list[tuple[Hex, Color]]:
+        """
+        Returns all positions and values on the game board a la `enumerate`.
+        :return: a list of (Hex, Color) tuples
+        """
+        key = self.masks
+        if self.__items_key != key:
+            self.__items = [(cell, self.get_index(i)) for i, cell in enumerate(CELLS)]
+            self.__items_key = key
+        return self.__items
+
+    def enumerate_nonempty(self) -> list[tuple[Hex, Color]]:
+        """
+        Enumerates all non-empty (cell, value) pairs.
+        :return: a list of (Hex, Color) tuples
+        """
+        key = self.masks
+        if self.__items_nonempty_key != key:
+            items = []
+            for color in Color:
+                mask = self._masks[color.value]
+                while mask:
+                    bit = mask & -mask
+                    items.append((CELLS[BIT_INDICES[bit.bit_length() - 1]], color))
+                    mask ^= bit
+            self.__items_nonempty = items
+            self.__items_nonempty_key = key
+        return self.__items_nonempty
+
+    def enumerate_pieces(self, player: Color) -> list[Hex]:
+        """
+        Enumerates all cells owned by the given player.
+        :return: a list of Hex
+        """
+        cells = []
+        mask = self._masks[player.value]
+        while mask:
+            bit = mask & -mask
+            cells.append(CELLS[BIT_INDICES[bit.bit_length() - 1]])
+            mask ^= bit
+        return cells
+
+    def cell_in_bounds(self, cell: Hex) -> bool:
+        """
+        :return: If the cell is in bounds.
+        """
+        return cell in HEX_INDICES
+
+    def cell_owned_by(self, cell: Hex, player: Color) -> bool:
+        """
+        :return: If the cell is owned by the player.
+        """
+        i = HEX_INDICES.get(cell)
+        return i is not None and bool(self._masks[player.value] & CELL_BITS[i])
+
+    def is_valid_move(self, move: Move, current_player: Color) -> bool:
+        """
+        :return: If the move is valid.
+        """
+        direction = DIRECTION_INDICES[move.direction]
+        occupied = self._masks[1] | self._masks[2]
+
+        if move.is_single():
+            target = NEIGHBOR_INDICES[self.index_of(move.selection.start)][direction]
+            return target != OFF_BOARD and not occupied & CELL_BITS[target]
+
+        if move.is_inline():
+            player_mask = self._masks[current_player.value]
+            target = NEIGHBOR_INDICES[self.index_of(move.get_front())][direction]
+            size = move.selection.get_size()
+            for i in range(1, self.MAX_SUMITO + 1):
+                if target == OFF_BOARD:
+                    return i > 1  # only valid if opposing marbles were pushed off
+                if not occupied & CELL_BITS[target]:
+                    return True
+                if player_mask & CELL_BITS[target] or i >= size:
+                    return False
+                target = NEIGHBOR_INDICES[target][direction]
+            return True
+
+        for cell in move.selection.to_array():
+            target = NEIGHBOR_INDICES[self.index_of(cell)][direction]
+            if target == OFF_BOARD or occupied & CELL_BITS[target]:
+                return False
+        return True
+
+    def get_marble_count(self, player: Color) -> int:
+        """
+        :return: Marble count for player.
+        """
+        return self._masks[player.value].bit_count()
+
+    def get_score(self, player: Color) -> int:
+        """
+        :return: Score for player.
+        """
+        opponent = Color.next(player)
+        return self._get_layout_count(opponent) - self.get_marble_count(opponent)
+
+    def get_scores_optimized(self, player: Color, player_count: int, opponent_count: int) -> tuple[int, int]:
+        """
+        :param player: The player.
+        :param player_count: Player marble count.
+        :param opponent_count: Opponent marble count.
+        :return: Score for player and opponent player.
+        """
+        opponent = Color.next(player)
+        return (self._get_layout_count(opponent) - opponent_count,
+                self._get_layout_count(player) - player_count)
+
+    def apply_move(self, move: Move):
+        """
+        Applies a move to the board, changing the position of cells.
+        """
+        self.make_move_code(encode_move(move))
+
+    def make_move(self, move: Move) -> MaskUndoRecord:
+        """
+        Applies a move to the board, recording the board's state so that it may be unmade.
+        :param move: a Move
+        :return: a MaskUndoRecord to pass to `unmake_move`
+        """
+        return self.make_move_code(encode_move(move))
+
+    def make_move_code(self, move_code: int) -> MaskUndoRecord:
+        """
+        Applies an encoded move to the board, recording the board's state so that it may be unmade.
+        The move's own marbles are moved by toggling its bits from `_MOVE_BITS`,
+        so only the marbles it pushes need to be found.
+        :param move_code: an encoded Move valid on the board
+        :return: a MaskUndoRecord to pass to `unmake_move`
+        """
+        masks = self._masks
+        move_id = move_code & MOVE_ID_MASK
+        player = 1 if masks[1] & CELL_BITS[move_id & 0x3F] else 2
+        opponent = 3 - player
+        move_bits = _MOVE_BITS[move_id]
+        record = MaskUndoRecord(masks[1], masks[2], self._hash, move_bits)
+
+        pushed_bits = self._find_pushed_bits(move_id, masks[opponent])
+        if pushed_bits:
+            masks[opponent] ^= pushed_bits
+            record.changed_bits |= pushed_bits
+            keys = _BIT_KEYS[opponent]
+            while pushed_bits:
+                bit = pushed_bits & -pushed_bits
+                self._hash ^= keys[bit.bit_length() - 1]
+                pushed_bits ^= bit
+
+        masks[player] ^= move_bits
+        self._hash ^= _MOVE_KEYS[player][move_id]
+        return record
+
+    def unmake_move(self, record: MaskUndoRecord):
+        """
+        Reverts the move that produced the given record.
+        Records must be unmade in the reverse order that they were made.
+        :param record: a MaskUndoRecord returned by `make_move`
+        """
+        self._masks[1] = record.black_mask
+        self._masks[2] = record.white_mask
+        self._hash = record.hash
+
+    def get_child_masks(self, move_code: int) -> tuple[int, int]:
+        """
+        Finds the occupancy masks the board would have after a move, without applying it.
+        :param move_code: an encoded Move valid on the board
+        :return: the black and white masks, as in `masks`
+        """
+        black_mask, white_mask = self._masks[1], self._masks[2]
+        move_id = move_code & MOVE_ID_MASK
+        if black_mask & CELL_BITS[move_id & 0x3F]:
+            return black_mask ^ _MOVE_BITS[move_id], white_mask ^ self._find_pushed_bits(move_id, white_mask)
+        return black_mask ^ self._find_pushed_bits(move_id, black_mask), white_mask ^ _MOVE_BITS[move_id]
+
+    @staticmethod
+    def _find_pushed_bits(move_id: int, opponent_mask: int) -> int:
+        """
+        Finds the bits a move toggles in its opponent's mask by pushing their marbles.
+        Shifting a line by one cell is equivalent to moving its nearest marble
+        past its far end, or off the board.
+        :param move_id: the id of a move valid on the board
+        :param opponent_mask: the mask of the opposing marbles
+        :return: an int, 0 if the move pushes nothing
+        """
+        nearest = PUSH_TARGETS[move_id]
+        if nearest == OFF_BOARD or not opponent_mask & CELL_BITS[nearest]:
+            return 0
+
+        pushed_bits = CELL_BITS[nearest]
+        for target in RAYS[nearest][move_id >> 10]:
+            if not opponent_mask & CELL_BITS[target]:
+                return pushed_bits | CELL_BITS[target]
+        return pushed_bits
+
+    def select_marbles_in_line(self, start, direction):
+        """
+        Selects all marbles in the line specified by the given start and direction.
+        Selection ends when the destination goes out of bounds or highlights a new color.
+        :param start: the Hex to start selecting from
+        :param direction: the HexDirection to select in
+        :return: a Selection
+        """
+        color = self[start]
+        if color is None:
+            return None
+
+        mask = self._masks[color.value]
+        d = DIRECTION_INDICES[direction]
+        end = self.index_of(start)
+        target = NEIGHBOR_INDICES[end][d]
+        while target != OFF_BOARD and mask & CELL_BITS[target]:
+            end = target
+            target = NEIGHBOR_INDICES[target][d]
+
+        return Selection(start, CELLS[end])
+
+    def to_array(self) -> list[list[int]]:
+        """
+        Converts the board state into an array of arrays of domain 0..2.
+        :return: a list[list[int]]
+        """
+        data = []
+        row = None
+        for cell, color in self.enumerate():
+            if row is None or cell.y != row:
+                data.append([])
+                row = cell.y
+            data[-1].append(color.value if color else 0)
+        return data
+
+    def copy_state(self, board):
+        """
+        Copies the state of the given board into this one.
+        :param board: a Board or BitBoard
+        """
+        if isinstance(board, BitBoard):
+            self._masks[:] = board._masks
+            self._hash = board._hash
+            return
+
+        masks_old = self.masks
+        masks = [0, 0, 0]
+        for cell, color in board.enumerate_nonempty():
+            masks[color.value] |= CELL_BITS[HEX_INDICES[cell]]
+        self._masks = masks
+        self._update_hash(masks_old)
+
+    def index_of(self, cell: Hex) -> int:
+        """
+        Finds the linear index of the given cell.
+        Raises IndexError if out of bounds.
+        :param cell: a Hex
+        :return: an int
+        """
+        i = HEX_INDICES.get(cell)
+        if i is None:
+            raise IndexError(f"grid cell '{cell}' out of range")
+        return i
+
+    def get_index(self, i: int) -> Color:
+        """
+        Gets the color at the given linear index.
+        :param i: an index from `index_of`
+        :return: a Color, or None if the cell is empty
+        """
+        bit = CELL_BITS[i]
+        if self._masks[1] & bit:
+            return Color.BLACK
+        if self._masks[2] & bit:
+            return Color.WHITE
+        return None
+
+    def _update_hash(self, masks_old: tuple[int, int]):
+        """
+        Toggles the keys of all pieces that changed since the given masks into the hash.
+        :param masks_old: the black and white masks before the change
+        """
+        for color, mask_old in zip(Color, masks_old):
+            keys = _BIT_KEYS[color.value]
+            delta = self._masks[color.value] ^ mask_old
+            while delta:
+                bit = delta & -delta
+                self._hash ^= keys[bit.bit_length() - 1]
+                delta ^= bit
+
+    def _get_layout_count(self, player: Color) -> int:
+        """
+        Counts the marbles the given player started with.
+        """
+        if self._layout_counts is None:
+            counts = [0, 0, 0]
+            for line in self._layout:
+                for val in line:
+                    if val in (Color.BLACK.value, Color.WHITE.value):
+                        counts[val] += 1
+            self._layout_counts = counts
+        return self._layout_counts[player.value]
+
+    def __contains__(self, cell):
+        """
+        Determines if the board contains the given `cell`.
+        :param cell: a Hex
+        :return: a bool
+        """
+        return cell in HEX_INDICES
+
+    def __getitem__(self, cell):
+        """
+        Gets the value stored on the board at the given `cell`.
+        Raises IndexError if out of bounds.
+        :param cell: a Hex
+        :return: a Color, or None if the cell is empty
+        """
+        return self.get_index(self.index_of(cell))
+
+    def __setitem__(self, cell, value):
+        """
+        Sets the value on the board at position `cell` to `value`.
+        Raises IndexError if out of bounds.
+        :param cell: a Hex
+        :param value: a Color, or None to clear the cell
+        """
+        self.set_index(self.index_of(cell), value)
+
+    def set_index(self, i: int, value: Color):
+        """
+        Sets the value on the board at linear index `i` to `value`.
+        :param i: an index from `index_of`
+        :param value: a Color, or None to clear the cell
+        """
+        self._set_indices(((i, value),))
+
+    def _set_indices(self, changes):
+        """
+        Sets the values at many linear indices at once, updating the hash once.
+        :param changes: an iterable of (index, Color or None) tuples
+        """
+        masks = self._masks
+        masks_old = self.masks
+        for i, value in changes:
+            bit = CELL_BITS[i]
+            masks[1] &= ~bit
+            masks[2] &= ~bit
+            if value is not None:
+                masks[value.value] |= bit
+        self._update_hash(masks_old)
@@ -4,14 +4,26 @@ Contains Abalone-specific hex grid logic.
 
 from __future__ import annotations
 
+from dataclasses import dataclass
+from core.cell_tables import CELLS, HEX_INDICES
 from core.constants import BOARD_SIZE
 from core.selection import Selection
 from core.move import Move
+from core.move_encoding import encode_move, find_move_changes
 from core.color import Color
 from core.hex import Hex
+from core.zobrist import zobrist_keys, zobrist_side_key, NUM_COLORS
 from lib.hex.hex_grid import HexGrid
 
 
+@dataclass
+class UndoRecord:
+    """
+    Records the cells changed by a move so that the move may be unmade.
+    """
+    changes: list[tuple[Hex, Color]]
+
+
 class Board(HexGrid):
     """
     A hex grid specific to the game of Abalone.
@@ -21,6 +33,8 @@ class Board(HexGrid):
 
     MAX_SUMITO = 3
 
+    _shared_attributes = HexGrid._shared_attributes + ("_layout",)
+
     @staticmethod
     def create_from_data(data: list[list[int]]):
         """
@@ -31,14 +45,14 @@ class Board(HexGrid):
         """
         board = Board()
         board._layout = data
-        for r, line in enumerate(data):
-            for q, val in enumerate(line):
-                q += board.offset(r)  # offset coords - board storage starts at x with size - 1
-                cell = Hex(q, r)
+        i = 0  # board storage is row-major, as is the data
+        for line in data:
+            for val in line:
                 try:
-                    board[cell] = Color(val)
+                    board.set_index(i, Color(val))
                 except ValueError:
-                    board[cell] = None
+                    board.set_index(i, None)
+                i += 1
         return board
 
     def __init__(self):
@@ -47,9 +61,14 @@ class Board(HexGrid):
         """
         super().__init__(size=BOARD_SIZE)
         self._layout = None
+        self._layout_counts = None
         self.__items = None
-        self.__items_dirty = None
         self.__items_nonempty = None
+        self.__items_nonempty_slots = None
+        self.__pieces = None
+        self.__piece_slots = None
+        self.__hash = 0
+        self._rebuild_items()
 
     @property
     def layout(self) -> list[list[int]]:
@@ -59,50 +78,45 @@ class Board(HexGrid):
         """
         return self._layout
 
+    @property
+    def hash(self) -> int:
+        """
+        Gets the board's Zobrist hash, maintained as cells are written to.
+        Does not include the side to move; see `get_hash`.
+        """
+        return self.__hash
+
+    def get_hash(self, player: Color) -> int:
+        """
+        Gets the board's Zobrist hash with the given player to move.
+        :param player: a Color
+        :return: an int
+        """
+        return self.__hash ^ zobrist_side_key if player == Color.WHITE else self.__hash
+
     def enumerate(self) -> list[tuple[Hex, Color]]:
         """
         Returns all positions and values on the game board a la `enumerate`.
         :return: a list of (Hex, Color) tuples
         """
-        if not self.__items:
-            items = []
-            for r, line in enumerate(self._data):
-                for q, val in enumerate(line):
-                    q += self.offset(r)
-                    item = (Hex(q, r), val)
-                    items.append(item)
-            self.__items = items
-
-        if self.__items_dirty:
-            self.__items_dirty = False
-            items = self.__items
-            i = 0
-            for r, line in enumerate(self._data):
-                for q, val in enumerate(line):
-                    q += self.offset(r)
-                    item = (Hex(q, r), val)
-                    items[i] = item
-                    i += 1
-
         return self.__items
 
     def enumerate_nonempty(self) -> list[tuple[Hex, Color]]:
         """
         Enumerates all non-empty (cell, value) pairs.
+        The list is maintained as cells are written to and is in no particular order.
         :return: a list of (Hex, Color) tuples
         """
-        if not self.__items_nonempty:
-            items = []
-            for r, line in enumerate(self._data):
-                for q, val in enumerate(line):
-                    if val is None:
-                        continue
-                    q += self.offset(r)
-                    item = (Hex(q, r), val)
-                    items.append(item)
-            self.__items_nonempty = items
         return self.__items_nonempty
 
+    def enumerate_pieces(self, player: Color) -> list[Hex]:
+        """
+        Enumerates all cells owned by the given player.
+        The list is maintained as cells are written to and is in no particular order.
+        :return: a list of Hex
+        """
+        return self.__pieces[player.value]
+
     def cell_in_bounds(self, cell: Hex) -> bool:
         """
         :return: If the cell is in bounds.
@@ -131,26 +145,14 @@ class Board(HexGrid):
         """
         :return: Marble count for player.
         """
-        count = 0
-        for _, color in self.enumerate():
-            if color == player:
-                count += 1
-
-        return count
+        return len(self.__pieces[player.value])
 
     def get_score(self, player: Color) -> int:
         """
         :return: Score for player.
         """
         opponent = Color.next(player)
-
-        layout_count = 0
-        for line in self._layout:
-            for data in line:
-                if data == opponent.value:
-                    layout_count += 1
-
-        return layout_count - self.get_marble_count(opponent)
+        return self._get_layout_count(opponent) - self.get_marble_count(opponent)
 
     def get_scores_optimized(self, player: Color, player_count: int, opponent_count: int) -> tuple[int, int]:
         """
@@ -160,17 +162,22 @@ class Board(HexGrid):
         :return: Score for player and opponent player.
         """
         opponent = Color.next(player)
+        return (self._get_layout_count(opponent) - opponent_count,
+                self._get_layout_count(player) - player_count)
 
-        player_layout_count = 0
-        opponent_layout_count = 0
-        for line in self._layout:
-            for data in line:
-                if data == player.value:
-                    player_layout_count += 1
-                if data == opponent.value:
-                    opponent_layout_count += 1
-
-        return opponent_layout_count - opponent_count, player_layout_count - player_count
+    def _get_layout_count(self, player: Color) -> int:
+        """
+        Counts the marbles the given player started with.
+        The starting layout never changes, so the counts are only taken once.
+        """
+        if self._layout_counts is None:
+            counts = [0, 0, 0]
+            for line in self._layout:
+                for val in line:
+                    if val in (Color.BLACK.value, Color.WHITE.value):
+                        counts[val] += 1
+            self._layout_counts = counts
+        return self._layout_counts[player.value]
 
     def apply_move(self, move: Move):
         """
@@ -178,6 +185,37 @@ class Board(HexGrid):
         """
         self._apply_sumito_move(move) if move.is_sumito(self) else self._apply_base_move(move)
 
+    def make_move(self, move: Move) -> UndoRecord:
+        """
+        Applies a move to the board, recording the changed cells so that it may be unmade.
+        :param move: a Move
+        :return: an UndoRecord to pass to `unmake_move`
+        """
+        return self.make_move_code(encode_move(move))
+
+    def make_move_code(self, move_code: int) -> UndoRecord:
+        """
+        Applies an encoded move to the board, recording the changed cells so that it may be unmade.
+        The changed cells are read from the tables in `core.move_encoding`.
+        :param move_code: an encoded Move valid on the board
+        :return: an UndoRecord to pass to `unmake_move`
+        """
+        data = self._data
+        changes = find_move_changes(data, move_code)
+        record = UndoRecord(changes=[(CELLS[i], data[i]) for i, _ in changes])
+        for i, value in changes:
+            self.set_index(i, value)
+        return record
+
+    def unmake_move(self, record: UndoRecord):
+        """
+        Reverts the move that produced the given record.
+        Records must be unmade in the reverse order that they were made.
+        :param record: an UndoRecord returned by `make_move`
+        """
+        for cell, value in record.changes:
+            self.set_index(HEX_INDICES[cell], value)
+
     def _is_valid_single_move(self, move: Move) -> bool:
         """
         :return: Is a valid single cell move.
@@ -294,32 +332,107 @@ class Board(HexGrid):
         # TODO: return a list of comma-separated "pieces", e.g. A1w
         return super().__str__()
 
-    def __setitem__(self, cell, value):
+    def __contains__(self, cell):
         """
-        Sets the value on the board at position `cell` to `value`.
+        Determines if the board contains the given `cell`.
         :param cell: a Hex
-        :param value: the value to set
+        :return: a bool
         """
-        super().__setitem__(cell, value)
-        if cell in self:
-            # mark enumeration struct as in need of recalculation
+        return cell in HEX_INDICES
 
-            # TODO(B): only change the value for the associated item
-            # how to reliably generate a linear index for an item by cell?
-            # most likely isn't possible for non-empty cells without linear
-            # search -- though still more performant than regenerating the
-            # entire board cache
-            self.__items_dirty = True
+    def __getitem__(self, cell):
+        """
+        Gets the value on the board at position `cell`.
+        Raises IndexError if out of bounds.
+        :param cell: a Hex
+        :return: a Color, or None if the cell is empty
+        """
+        i = HEX_INDICES.get(cell)
+        if i is None:
+            raise IndexError(f"grid cell '{cell}' out of range")
+        return self._data[i]
+
+    def index_of(self, cell: Hex) -> int:
+        """
+        Finds the linear index of the given cell (see `core.cell_tables`).
+        Cells are interned, so are looked up by identity rather than by coordinates.
+        Raises IndexError if out of bounds.
+        :param cell: a Hex
+        :return: an int
+        """
+        i = HEX_INDICES.get(cell)
+        if i is None:
+            raise IndexError(f"grid cell '{cell}' out of range")
+        return i
+
+    def set_index(self, i: int, value: Color):
+        """
+        Sets the value on the board at linear index `i` to `value`.
+        :param i: an index from `index_of`
+        :param value: a Color, or None to clear the cell
+        """
+        old_value = self._data[i]
+        self._data[i] = value
+
+        # update the enumeration structs in place
+        cell = CELLS[i]
+        item = (cell, value)
+        self.__items[i] = item
+
+        if old_value is not None:
+            self.__hash ^= zobrist_keys[i * NUM_COLORS + old_value.value - 1]
+            self._remove_slot(self.__pieces[old_value.value], self.__piece_slots, i)
+        if value is not None:
+            self.__hash ^= zobrist_keys[i * NUM_COLORS + value.value - 1]
+            self.__piece_slots[i] = len(self.__pieces[value.value])
+            self.__pieces[value.value].append(cell)
+
+        if old_value is None and value is not None:
+            self.__items_nonempty_slots[i] = len(self.__items_nonempty)
+            self.__items_nonempty.append(item)
+        elif old_value is not None and value is None:
+            self._remove_slot(self.__items_nonempty, self.__items_nonempty_slots, i)
+        elif value is not None:
+            self.__items_nonempty[self.__items_nonempty_slots[i]] = item
 
-            # TODO(B): possible mem optimization -- use dirty flag here as well
-            # length of nonempty sequence can be determined by current length
-            # plus delta (+1 if `None`->`not None`, -1 if `not None`->`None`)
-            self.__items_nonempty = None
+    @staticmethod
+    def _remove_slot(items: list, slots: list[int], i: int):
+        """
+        Removes the item for the cell at linear index `i` from `items` in O(1)
+        by moving the last item into its slot.
+        :param items: a list of Hex or (Hex, Color) tuples
+        :param slots: the slot in `items` of each cell's item, by linear index
+        :param i: the linear index of the cell to remove
+        """
+        slot = slots[i]
+        slots[i] = None
+        last = items.pop()
+        if slot < len(items):
+            items[slot] = last
+            last_cell = last if isinstance(last, Hex) else last[0]
+            slots[HEX_INDICES[last_cell]] = slot
+
+    def _rebuild_items(self):
+        """
+        Rebuilds the enumeration structs and hash from the grid data.
+        """
+        self.__items = []
+        self.__items_nonempty = []
+        self.__items_nonempty_slots = [None] * len(CELLS)
+        self.__pieces = [None, [], []]  # indexed by `Color.value`
+        self.__piece_slots = [None] * len(CELLS)
+        self.__hash = 0
+
+        for i, val in enumerate(self._data):
+            item = (CELLS[i], val)
+            self.__items.append(item)
+            if val is not None:
+                self.__items_nonempty_slots[i] = len(self.__items_nonempty)
+                self.__items_nonempty.append(item)
+                self.__piece_slots[i] = len(self.__pieces[val.value])
+                self.__pieces[val.value].append(CELLS[i])
+                self.__hash ^= zobrist_keys[i * NUM_COLORS + val.value - 1]
 
     def copy_state(self, board):
-        data = self._data
-        for r, line in enumerate(board._data):
-            for q, val in enumerate(line):
-                data[r][q] = val
-        self.__items = None
-        self.__items_nonempty = None
+        self._data[:] = board._data
+        self._rebuild_items()
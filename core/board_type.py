@@ -0,0 +1,29 @@
+"""
+Contains logic for selecting the board representation that searches run on.
+"""
+
+from __future__ import annotations
+
+from copy import deepcopy
+from enum import Enum
+from core.bitboard import BitBoard
+from core.board import Board
+
+
+class BoardType(Enum):
+    """
+    Enumerates the interchangeable board representations.
+    """
+    BOARD = "board"
+    BITBOARD = "bitboard"
+
+    def convert(self, board: Board) -> Board | BitBoard:
+        """
+        Creates a board of this type with the same layout and state as the given board.
+        :param board: a Board
+        :return: a Board or BitBoard
+        """
+        return {
+            BoardType.BOARD: lambda: deepcopy(board),
+            BoardType.BITBOARD: lambda: BitBoard.create_from_board(board),
+        }[self]()
@@ -0,0 +1,106 @@
+"""
+Contains precomputed lookup tables for the cells of an Abalone board.
+Cells are indexed linearly in row-major order, i.e. the order in which
+`Board.enumerate` yields them.
+"""
+
+from core.constants import BOARD_SIZE, BOARD_MAX_COLS, MAX_SELECTION_SIZE
+from core.hex import Hex, HexDirection, NEIGHBORS_SE
+
+
+# sentinel index for neighbors that fall outside of the board
+OFF_BOARD = -1
+
+# all six directions in `HexDirection` order; direction indices refer to this tuple
+DIRECTIONS = tuple(HexDirection)
+DIRECTION_INDICES = {direction: i for i, direction in enumerate(DIRECTIONS)}
+
+# [direction index] -> direction index of the opposite direction
+OPPOSITE_DIRECTION_INDICES = tuple(DIRECTION_INDICES[d.get_opposite()] for d in DIRECTIONS)
+
+# indices of the directions in which cell indices increase, in `HexDirection` order
+FORWARD_DIRECTION_INDICES = tuple(i for i, d in enumerate(DIRECTIONS) if d in NEIGHBORS_SE)
+
+# the longest line of cells needed to resolve a move: a selection plus its
+# target, or the pushed line in front of a selection plus its target
+MAX_RAY_LENGTH = MAX_SELECTION_SIZE + 1
+
+
+def _setup_cells():
+    cells = []
+    for r in range(BOARD_MAX_COLS):
+        offset = max(0, BOARD_SIZE - 1 - r)
+        width = BOARD_MAX_COLS - abs(BOARD_SIZE - 1 - r)
+        for q in range(offset, offset + width):
+            cells.append(Hex(q, r))
+    return tuple(cells)
+
+# index -> Hex
+CELLS = _setup_cells()
+NUM_CELLS = len(CELLS)
+
+# (x, y) -> index
+CELL_INDICES = {(cell.x, cell.y): i for i, cell in enumerate(CELLS)}
+
+# Hex -> index, hashed by identity since cells are interned
+HEX_INDICES = {cell: i for i, cell in enumerate(CELLS)}
+
+
+def _setup_neighbor_indices():
+    table = []
+    for cell in CELLS:
+        table.append(tuple(
+            CELL_INDICES.get((cell.x + d.value.x, cell.y + d.value.y), OFF_BOARD)
+                for d in DIRECTIONS
+        ))
+    return tuple(table)
+
+# [index][direction index] -> index or OFF_BOARD
+NEIGHBOR_INDICES = _setup_neighbor_indices()
+
+
+# [index] -> the on-board neighbor indices of the cell, in `HexDirection` order
+ADJACENT_INDICES = tuple(tuple(j for j in neighbors if j != OFF_BOARD) for neighbors in NEIGHBOR_INDICES)
+
+# [index] -> whether the cell lies on the edge of the board, i.e. has an off-board neighbor
+EDGE_FLAGS = tuple(OFF_BOARD in neighbors for neighbors in NEIGHBOR_INDICES)
+
+# the distance from the center to the edge of the board
+BOARD_RADIUS = BOARD_SIZE - 1
+CENTER_INDEX = CELL_INDICES[(BOARD_RADIUS, BOARD_RADIUS)]
+
+def _setup_center_distances():
+    center = CELLS[CENTER_INDEX]
+    return tuple((abs(cell.x - center.x) + abs(cell.y - center.y)
+        + abs(cell.x + cell.y - center.x - center.y)) // 2 for cell in CELLS)
+
+# [index] -> manhattan distance of the cell from the center cell, as an int
+CENTER_DISTANCES = _setup_center_distances()
+
+
+def _setup_rays():
+    table = []
+    for i in range(NUM_CELLS):
+        cell_rays = []
+        for d in range(len(DIRECTIONS)):
+            ray = []
+            j = NEIGHBOR_INDICES[i][d]
+            while j != OFF_BOARD and len(ray) < MAX_RAY_LENGTH:
+                ray.append(j)
+                j = NEIGHBOR_INDICES[j][d]
+            cell_rays.append(tuple(ray))
+        table.append(tuple(cell_rays))
+    return tuple(table)
+
+# [index][direction index] -> the on-board cell indices following the cell in
+# that direction, nearest first, up to `MAX_RAY_LENGTH` cells
+RAYS = _setup_rays()
+
+
+def get_cell_index(cell):
+    """
+    Finds the linear index of the given cell.
+    :param cell: a Hex
+    :return: an int, or None if the cell is out of bounds
+    """
+    return CELL_INDICES.get((cell.x, cell.y))
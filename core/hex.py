@@ -10,16 +10,51 @@ from lib.hex.axial_hex import AxialHex
 from lib.lerp import lerp
 
 
-# neighbor cache to avoid neighborhood recalculation
+# neighbor cache to avoid neighborhood recalculation, keyed by cell
 HEX_NEIGHBORS = {}
 HEX_NEIGHBORS_SE = {}
 
+# (x, y) -> the interned Hex at those coordinates; fixed once the module is loaded
+_hexes = {}
+
+# whether cells may still be added to `_hexes`
+_interning = True
+
 
 class Hex(AxialHex):
     """
     A hex cell specific to the game of Abalone.
+
+    The cells of the board and the ring of off-board cells around it are
+    interned: `Hex(x, y)` always returns the same instance for the same
+    coordinates, so these cells compare and hash by identity, which keeps
+    the many dicts and lists keyed by cells cheap. The interned cells are
+    fixed when this module is loaded, so the cache never grows.
+    Any other cell, such as one further off the board or one with the
+    fractional coordinates that `lerp` produces, is a new `FreeHex` instance
+    that compares and hashes by value instead; since the two kinds never
+    share coordinates, a free cell is never equal to an interned one.
     """
 
+    __slots__ = ()
+
+    __eq__ = object.__eq__
+    __hash__ = object.__hash__
+
+    def __new__(cls, x, y):
+        """
+        Finds the interned cell at the given coordinates, or creates a free cell if none is interned there.
+        :param x: the x-coordinate
+        :param y: the y-coordinate
+        :return: a Hex
+        """
+        cell = _hexes.get((x, y))
+        if cell is None:
+            if x % 1 or y % 1 or not _interning:
+                return AxialHex.__new__(FreeHex, x, y)
+            cell = _hexes[(x, y)] = AxialHex.__new__(Hex, int(x), int(y))
+        return cell
+
     def __str__(self):
         """
         Returns the current cell in Abalone move notation, e.g. A1 etc.
@@ -27,6 +62,15 @@ class Hex(AxialHex):
         """
         return f"{chr(BOARD_MAX_COLS - self.y + ord('A') - 1)}{self.x + 1}"
 
+    def add(self, other):
+        """
+        Calculates the sum of `self` and `other` non-destructively.
+        :param other: a Hex
+        :return: a Hex
+        """
+        x, y = self.x + other.x, self.y + other.y
+        return _hexes.get((x, y)) or Hex(x, y)
+
     def lerp(self, other, time):
         """
         Interpolates the cell between `self` and `other` at `time`%.
@@ -45,20 +89,48 @@ class Hex(AxialHex):
         Finds all six neighbors of this cell.
         :return: a list[Hex]
         """
-        self_tuple = (self.x, self.y)
-        if self_tuple not in HEX_NEIGHBORS:  # cache neighbors (ok with 61 cells)
-            HEX_NEIGHBORS[self_tuple] = [self.add(d.value) for d in HexDirection]
-        return HEX_NEIGHBORS[self_tuple]
+        neighbors = HEX_NEIGHBORS.get(self)
+        if neighbors is None:
+            neighbors = [self.add(d.value) for d in HexDirection]
+            if type(self) is Hex:  # only interned cells are cached, so the cache stays bounded
+                HEX_NEIGHBORS[self] = neighbors
+        return neighbors
 
     def neighbors_se(self):
         """
         Finds the SW/SE/E neighbors of this cell.
         :return: a list[Hex]
         """
-        self_tuple = (self.x, self.y)
-        if self_tuple not in HEX_NEIGHBORS_SE:
-            HEX_NEIGHBORS_SE[self_tuple] = [self.add(d.value) for d in NEIGHBORS_SE]
-        return HEX_NEIGHBORS_SE[self_tuple]
+        neighbors = HEX_NEIGHBORS_SE.get(self)
+        if neighbors is None:
+            neighbors = [self.add(d.value) for d in NEIGHBORS_SE]
+            if type(self) is Hex:
+                HEX_NEIGHBORS_SE[self] = neighbors
+        return neighbors
+
+
+class FreeHex(Hex):
+    """
+    A cell outside of the interned region around the board.
+    Compares and hashes by value, as distinct instances may share coordinates.
+    """
+
+    __slots__ = ()
+
+    __eq__ = AxialHex.__eq__
+    __hash__ = AxialHex.__hash__
+
+
+def _intern_hexes():
+    # every on-board cell and the ring of off-board cells around it, which
+    # covers the direction vectors and any neighbor a rule check steps onto
+    global _interning
+    for y in range(-1, BOARD_MAX_COLS + 1):
+        for x in range(-1, BOARD_MAX_COLS + 1):
+            Hex(x, y)
+    _interning = False
+
+_intern_hexes()
 
 
 class HexDirection(Enum):
@@ -0,0 +1,215 @@
+"""
+Contains logic for packing moves into 16-bit integers.
+
+A move code is laid out as follows, from the least significant bit:
+- bits 0-5: linear index of the selection's lowest-index cell (see `core.cell_tables`)
+- bits 6-7: selection size - 1
+- bits 8-9: index of the selection's line direction within `FORWARD_DIRECTION_INDICES`
+- bits 10-12: index of the move direction within `DIRECTIONS`
+- bits 13-15: the move's kind (see `MOVE_KIND_*`)
+
+Bits 0-12 identify a move on any board and are called its id. The kind
+depends on what the move pushes, so it is only known for codes generated
+against a board; moves with the same id compare equal regardless of kind.
+"""
+
+from __future__ import annotations
+
+from array import array
+from typing import TYPE_CHECKING
+
+from core.cell_tables import CELLS, HEX_INDICES, DIRECTIONS, DIRECTION_INDICES, \
+    FORWARD_DIRECTION_INDICES, OPPOSITE_DIRECTION_INDICES, NEIGHBOR_INDICES, RAYS, NUM_CELLS, OFF_BOARD
+from core.constants import MAX_SELECTION_SIZE
+from core.move import Move
+from core.selection import Selection
+
+if TYPE_CHECKING:
+    from core.board import Board
+
+
+# sentinel code denoting the absence of a move
+NO_MOVE = 0xFFFF
+
+MOVE_ID_MASK = 0x1FFF
+MOVE_KIND_SHIFT = 13
+
+# the number of distinct move ids, i.e. one more than the largest
+NUM_MOVE_IDS = MOVE_ID_MASK + 1
+
+# move kinds, in increasing order of how forcing they tend to be
+MOVE_KIND_SINGLE = 0  # a single marble moves into an empty cell
+MOVE_KIND_SIDESTEP = 1  # a line moves broadside into empty cells
+MOVE_KIND_INLINE = 2  # a line moves along itself into an empty cell
+MOVE_KIND_PUSH = 3  # a line pushes opposing marbles along the board
+MOVE_KIND_CAPTURE = 4  # a line pushes an opposing marble off the board
+
+
+def _setup_selection_codes():
+    table = {}
+    for i in range(NUM_CELLS):
+        table[(i, i)] = i
+        for code_direction, line_direction in enumerate(FORWARD_DIRECTION_INDICES):
+            for size, j in enumerate(RAYS[i][line_direction][:MAX_SELECTION_SIZE - 1], start=2):
+                code = i | (size - 1) << 6 | code_direction << 8
+                table[(i, j)] = code
+                table[(j, i)] = code
+    return table
+
+# (start index, end index) -> selection bits of a move code, for every valid selection
+_selection_codes = _setup_selection_codes()
+
+_decoded_moves = {}
+
+
+def _setup_move_cells():
+    sources = [()] * NUM_MOVE_IDS
+    targets = [()] * NUM_MOVE_IDS
+    push_targets = array("b", [OFF_BOARD]) * NUM_MOVE_IDS
+    for selection_code in set(_selection_codes.values()):
+        start = selection_code & 0x3F
+        size = (selection_code >> 6 & 0x3) + 1
+        line_direction = FORWARD_DIRECTION_INDICES[selection_code >> 8 & 0x3]
+        selection = (start, *RAYS[start][line_direction][:size - 1])
+        for direction in range(len(DIRECTIONS)):
+            move_id = selection_code | direction << 10
+            if size > 1 and direction == line_direction:
+                front, rear = selection[-1], selection[0]
+            elif size > 1 and direction == OPPOSITE_DIRECTION_INDICES[line_direction]:
+                front, rear = selection[0], selection[-1]
+            elif size == 1:
+                front, rear = start, start
+            else:
+                sources[move_id] = selection
+                targets[move_id] = tuple(NEIGHBOR_INDICES[i][direction] for i in selection)
+                continue
+
+            # inline moves only change the ends of the line
+            sources[move_id] = (rear,)
+            targets[move_id] = (NEIGHBOR_INDICES[front][direction],)
+            if size > 1:
+                push_targets[move_id] = NEIGHBOR_INDICES[front][direction]
+    return tuple(sources), tuple(targets), push_targets
+
+_move_cells = _setup_move_cells()
+
+# [move id] -> indices of the cells a move empties, i.e. its whole selection for
+# sidesteps and the rear of its selection otherwise
+MOVE_SOURCES = _move_cells[0]
+
+# [move id] -> indices of the cells a move fills with its own marbles, which may
+# be OFF_BOARD for moves that can never be valid
+MOVE_TARGETS = _move_cells[1]
+
+# [move id] -> index of the cell that an inline move of two or more marbles moves into,
+# i.e. the cell whose occupant is pushed, or OFF_BOARD for other moves
+PUSH_TARGETS = _move_cells[2]
+
+
+def get_move_id(move_code: int) -> int:
+    """
+    Strips the kind from a move code.
+    :param move_code: an int
+    :return: an int in the domain 0..NUM_MOVE_IDS
+    """
+    return move_code & MOVE_ID_MASK
+
+
+def get_move_kind(move_code: int) -> int:
+    """
+    Gets the kind of a move code generated against a board.
+    :param move_code: an int
+    :return: one of `MOVE_KIND_*`
+    """
+    return move_code >> MOVE_KIND_SHIFT
+
+
+def get_move_size(move_code: int) -> int:
+    """
+    Gets the number of marbles a move selects.
+    :param move_code: an int
+    :return: an int in the domain 1..3
+    """
+    return (move_code >> 6 & 0x3) + 1
+
+
+def encode_move(move: Move, board: Board = None) -> int:
+    """
+    Packs a move into an int.
+    Selections are normalized to start from their lowest-index cell, which is
+    how `StateGenerator` generates them.
+    :param move: a Move
+    :param board: the Board the move is to be made on, to determine whether
+        it pushes; if omitted, moves are never encoded as pushes
+    :return: an int in the domain 0..2^16
+    """
+    start = move.selection.start
+    end = move.selection.end or start
+    move_id = (_selection_codes[HEX_INDICES[start], HEX_INDICES[end]]
+        | DIRECTION_INDICES[move.direction] << 10)
+    if len(MOVE_SOURCES[move_id]) > 1:
+        kind = MOVE_KIND_SIDESTEP
+    elif get_move_size(move_id) == 1:
+        kind = MOVE_KIND_SINGLE
+    else:
+        kind = MOVE_KIND_INLINE
+        push_target = PUSH_TARGETS[move_id]
+        if board is not None and push_target != OFF_BOARD and board[CELLS[push_target]] is not None:
+            ray = RAYS[push_target][move_id >> 10]
+            opponent = board[CELLS[push_target]]
+            end = 0
+            while end < len(ray) and board[CELLS[ray[end]]] == opponent:
+                end += 1
+            kind = MOVE_KIND_CAPTURE if end == len(ray) else MOVE_KIND_PUSH
+    return move_id | kind << MOVE_KIND_SHIFT
+
+
+def decode_move(code: int) -> Move:
+    """
+    Unpacks a move from an int.
+    Decoded moves are cached and shared, so callers must not mutate them.
+    :param code: an int returned by `encode_move`
+    :return: a Move, or None if `code` is `NO_MOVE`
+    """
+    if code == NO_MOVE:
+        return None
+
+    code &= MOVE_ID_MASK
+    move = _decoded_moves.get(code)
+    if move is None:
+        start = code & 0x3F
+        size = (code >> 6 & 0x3) + 1
+        line_direction = FORWARD_DIRECTION_INDICES[code >> 8 & 0x3]
+        end = start
+        for _ in range(size - 1):
+            end = NEIGHBOR_INDICES[end][line_direction]
+        move = Move(Selection(CELLS[start], CELLS[end]), DIRECTIONS[code >> 10 & 0x7])
+        _decoded_moves[code] = move
+    return move
+
+
+def find_move_changes(cells: list, move_code: int, empty=None) -> list[tuple[int, object]]:
+    """
+    Finds the cells changed by a move without applying it.
+    :param cells: the occupant of each cell, by linear index
+    :param move_code: an encoded Move valid on the cells
+    :param empty: the occupant of empty cells
+    :return: a list of (index, occupant) tuples, one per changed cell
+    """
+    move_id = move_code & MOVE_ID_MASK
+    player = cells[move_id & 0x3F]
+    changes = ([(i, empty) for i in MOVE_SOURCES[move_id]]
+        + [(i, player) for i in MOVE_TARGETS[move_id]])
+
+    push_target = PUSH_TARGETS[move_id]
+    if push_target != OFF_BOARD:
+        opponent = cells[push_target]
+        if opponent != empty:
+            # the opposing line shifts by one, or its last marble is pushed off
+            ray = RAYS[push_target][move_id >> 10]
+            end = 0
+            while end < len(ray) and cells[ray[end]] == opponent:
+                end += 1
+            if end < len(ray):
+                changes.append((ray[end], opponent))
+    return changes
@@ -0,0 +1,27 @@
+"""
+Contains the Zobrist keys that boards hash their positions with.
+"""
+
+from random import Random
+from core.cell_tables import NUM_CELLS
+
+
+ZOBRIST_BITS = 64
+
+# keys are seeded so that hashes agree across processes and runs
+ZOBRIST_SEED = 3981
+
+# number of piece colors, i.e. keys per cell
+NUM_COLORS = 2
+
+
+def _setup_zobrist(num_bits):
+    rng = Random(ZOBRIST_SEED)
+    keys = [rng.getrandbits(num_bits) for _ in range(NUM_CELLS * NUM_COLORS)]
+    side_key = rng.getrandbits(num_bits)
+    return keys, side_key
+
+# [cell index * NUM_COLORS + color.value - 1] -> key, where a cell's index
+# is its linear index (see `core.cell_tables.HEX_INDICES`)
+# side key is toggled in when white is to move
+zobrist_keys, zobrist_side_key = _setup_zobrist(num_bits=ZOBRIST_BITS)
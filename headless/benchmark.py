@@ -0,0 +1,245 @@
+"""
+Contains logic for benchmarking searches on a fixed corpus of positions.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from dataclasses import dataclass, asdict, replace
+from enum import Enum
+from os import listdir, path
+from time import time
+
+from agent.brandon.lazy_smp_search import LazySMPSearch
+from agent.brandon.parallel_search import ParallelSearch
+from agent.brandon.search import Search
+from agent.heuristics.registry import get_heuristic
+from core.board import Board
+from core.board_type import BoardType
+from core.color import Color
+from lib.file_handler import FileHandler
+from parse.state_parser import StateParser
+from ui.model.heuristic_type import HeuristicType
+
+
+POSITIONS_DIRECTORY = path.join(path.dirname(__file__), "positions")
+
+# the relative nodes/sec drop flagged as a regression when comparing to a baseline
+REGRESSION_THRESHOLD = 0.1
+
+
+class Engine(Enum):
+    """
+    Enumerates the searches that can be benchmarked.
+    """
+    BRANDON = "brandon"
+    PARALLEL = "parallel"
+    LAZY_SMP = "lazy_smp"
+
+    def create(self, num_workers: int = None) -> Search:
+        """
+        Creates a search for the given engine.
+        :param num_workers: the number of worker processes for parallel engines
+        :return: a Search
+        """
+        return {
+            Engine.BRANDON: lambda: Search(),
+            Engine.PARALLEL: lambda: ParallelSearch(num_workers),
+            Engine.LAZY_SMP: lambda: LazySMPSearch(num_workers),
+        }[self]()
+
+
+@dataclass
+class Position:
+    """
+    A benchmark position.
+    """
+    name: str
+    board: Board
+    player: Color
+
+
+@dataclass
+class BenchmarkResult:
+    """
+    The outcome of searching a single position.
+    Nodes are the moves the search made, i.e. enumerated moves that were not pruned.
+    """
+    position: str
+    engine: str
+    mode: str
+    limit: float
+    depth: int
+    best_move: str
+    nodes: int
+    seconds: float
+    nodes_per_second: float
+    tt_hit_rate: float
+    effective_branching_factor: float
+    board: str = BoardType.BOARD.value
+
+    @property
+    def key(self) -> tuple[str, str, str, float]:
+        """
+        Identifies the benchmark run that produced this result, for comparison across runs.
+        Excludes the board type, so that runs on different board types can be compared.
+        :return: a tuple
+        """
+        return self.position, self.engine, self.mode, self.limit
+
+
+def load_positions(directory: str = POSITIONS_DIRECTORY) -> list[Position]:
+    """
+    Loads every `Test<#>.input` position in a directory, in numeric order.
+    :param directory: the directory to load from
+    :return: a list of Positions
+    """
+    file_names = [file_name for file_name in listdir(directory)
+        if re.fullmatch(r"Test\d+\.input", file_name)]
+    file_names.sort(key=lambda file_name: int(re.search(r"\d+", file_name).group()))
+
+    positions = []
+    for file_name in file_names:
+        text = FileHandler.read_file(path.join(directory, file_name))
+        state, player = StateParser.convert_text_to_state(text)
+        positions.append(Position(
+            name=path.splitext(file_name)[0],
+            board=Board.create_from_data(state),
+            player=Color(player),
+        ))
+    return positions
+
+
+def benchmark_position(search: Search, engine: Engine, position: Position,
+                       depth: int = None, time_limit: float = None,
+                       board_type: BoardType = BoardType.BOARD) -> BenchmarkResult:
+    """
+    Searches a position from scratch to a fixed depth or for a fixed time.
+    :param search: the Search to run, as created by `engine`
+    :param engine: the Engine of `search`
+    :param position: the Position to search, whose board is of type `board_type`
+    :param depth: the depth to search to, if not searching for a fixed time
+    :param time_limit: the number of seconds to search for, if not searching to a fixed depth
+    :param board_type: the BoardType of the position's board
+    :return: a BenchmarkResult
+    """
+    search.clear()
+    time_start = time()
+    search.start(position.board, position.player, depth=depth, time_limit=time_limit)
+    seconds = time() - time_start
+
+    stats = search.stats
+    return BenchmarkResult(
+        position=position.name,
+        engine=engine.value,
+        mode="time" if time_limit is not None else "depth",
+        limit=time_limit if time_limit is not None else depth,
+        depth=search.best_depth,
+        best_move=str(search.best_move),
+        nodes=stats.num_nodes_explored,
+        seconds=seconds,
+        nodes_per_second=stats.num_nodes_explored / (seconds or 1),
+        tt_hit_rate=stats.tt_hit_rate,
+        effective_branching_factor=stats.effective_branching_factor,
+        board=board_type.value,
+    )
+
+
+def run_benchmark(positions: list[Position], engines: list[Engine],
+                  heuristic_name: str = HeuristicType.BRANDON_OFFENSIVE.name,
+                  depth: int = None, time_limit: float = None, num_workers: int = None,
+                  board_type: BoardType = BoardType.BOARD,
+                  on_result: callable = None) -> list[BenchmarkResult]:
+    """
+    Benchmarks each engine on each position, to a fixed depth and/or for a fixed time.
+    Every search starts from an empty transposition table.
+    Searches behave identically on every board type, so runs on one board
+    type may be compared to a baseline from another to check as much.
+    :param positions: a list of Positions
+    :param engines: a list of Engines
+    :param heuristic_name: the name of the registered heuristic to search with
+    :param depth: the depth to search to, or None to skip fixed-depth runs
+    :param time_limit: the number of seconds to search for, or None to skip fixed-time runs
+    :param num_workers: the number of worker processes for parallel engines
+    :param board_type: the BoardType to search the positions on
+    :param on_result: a Callable[BenchmarkResult] called as each result is measured
+    :return: a list of BenchmarkResults
+    """
+    positions = [replace(position, board=board_type.convert(position.board)) for position in positions]
+    results = []
+    for engine in engines:
+        search = engine.create(num_workers)
+        search.heuristic = get_heuristic(heuristic_name)
+
+        # start any worker processes outside of the measured runs
+        if positions:
+            search.start(positions[0].board, positions[0].player, depth=1)
+
+        for position in positions:
+            for run_depth, run_time_limit in ((depth, None), (None, time_limit)):
+                if run_depth is None and run_time_limit is None:
+                    continue
+
+                result = benchmark_position(search, engine, position, run_depth, run_time_limit, board_type)
+                results.append(result)
+                if on_result:
+                    on_result(result)
+
+        search.close()
+    return results
+
+
+def write_results(file_path: str, results: list[BenchmarkResult]):
+    """
+    Writes benchmark results to a JSON file, e.g. as a baseline.
+    :param file_path: the path of the file to write
+    :param results: a list of BenchmarkResults
+    """
+    with open(file_path, mode="w", encoding="utf-8") as file:
+        json.dump([asdict(result) for result in results], file, indent=2)
+
+
+def read_results(file_path: str) -> list[BenchmarkResult]:
+    """
+    Reads benchmark results written by `write_results`.
+    :param file_path: the path of the file to read
+    :return: a list of BenchmarkResults
+    """
+    with open(file_path, mode="r", encoding="utf-8") as file:
+        return [BenchmarkResult(**data) for data in json.load(file)]
+
+
+def compare_results(results: list[BenchmarkResult], baseline: list[BenchmarkResult],
+                    threshold: float = REGRESSION_THRESHOLD) -> list[str]:
+    """
+    Compares benchmark results to a baseline.
+    Flags nodes/sec drops beyond the given threshold, and for fixed-depth
+    runs, changes in best move or node count, which indicate that the search
+    itself behaves differently rather than just faster or slower.
+    :param results: a list of BenchmarkResults
+    :param baseline: a list of BenchmarkResults from a previous run
+    :param threshold: the relative nodes/sec drop to flag as a regression
+    :return: a list of report lines
+    """
+    baseline_results = {result.key: result for result in baseline}
+    lines = []
+    for result in results:
+        base = baseline_results.get(result.key)
+        if not base:
+            lines.append(f"{result.position} {result.engine} {result.mode}={result.limit}: no baseline")
+            continue
+
+        speedup = result.nodes_per_second / (base.nodes_per_second or 1)
+        notes = []
+        if speedup < 1 - threshold:
+            notes.append("REGRESSION")
+        if result.mode == "depth" and result.best_move != base.best_move:
+            notes.append(f"best move changed from {base.best_move}")
+        if result.mode == "depth" and result.nodes != base.nodes:
+            notes.append(f"nodes changed from {base.nodes}")
+
+        lines.append(f"{result.position} {result.engine} {result.mode}={result.limit}:"
+            f" {result.nodes_per_second:.0f} nodes/s ({speedup:.2f}x baseline)"
+            + (f" [{'; '.join(notes)}]" if notes else ""))
+    return lines
@@ -0,0 +1,303 @@
+"""
+Contains logic for playing headless matches between agents.
+"""
+
+from __future__ import annotations
+
+import csv
+import json
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field, asdict, replace
+from os import cpu_count
+from random import Random
+from threading import Event
+from time import time, sleep
+
+from agent.heuristics.heuristic_jonathan import Heuristic
+from agent.opening_book import OpeningBook
+from agent.state_generator import StateGenerator
+from core.color import Color
+from core.constants import WIN_SCORE
+from core.game import Game
+from core.move import Move
+from ui.constants import FPS, OPENING_BOOK_FILEPATH
+from ui.debug import Debug, DebugType
+from ui.model.config import Config
+
+
+# labels for the players of a match, who alternate colors between games
+PLAYER_1 = "p1"
+PLAYER_2 = "p2"
+DRAW = "draw"
+
+
+@dataclass
+class GameResult:
+    """
+    The outcome of a single headless game.
+    """
+
+    game_id: int
+    black: str
+    white: str
+    winner: str
+    score_p1: int
+    score_p2: int
+    num_moves: int
+    move_times_p1: list[float] = field(default_factory=list)
+    move_times_p2: list[float] = field(default_factory=list)
+    moves: list[str] = field(default_factory=list)
+
+
+def describe_player(config: Config, color: Color) -> str:
+    """
+    Describes the agent and heuristic configured for a player.
+    :param config: a Config
+    :param color: the player's Color in the config
+    :return: a str
+    """
+    return (f"{config.get_player_agent_type(color).value}"
+        f" / {config.get_player_heuristic_type(color).value}"
+        f" / {config.get_player_time_limit(color)}s"
+        + (" / book" if config.get_player_opening_book(color) else ""))
+
+
+def swap_players(config: Config) -> Config:
+    """
+    Creates a copy of the given config with the two players' colors swapped.
+    :param config: a Config
+    :return: a Config
+    """
+    return replace(config,
+        player_type_p1=config.player_type_p2,
+        player_type_p2=config.player_type_p1,
+        time_limit_p1=config.time_limit_p2,
+        time_limit_p2=config.time_limit_p1,
+        heuristic_type_p1=config.heuristic_type_p2,
+        heuristic_type_p2=config.heuristic_type_p1,
+        agent_type_p1=config.agent_type_p2,
+        agent_type_p2=config.agent_type_p1,
+        opening_book_p1=config.opening_book_p2,
+        opening_book_p2=config.opening_book_p1,
+        refutation_store_p1=config.refutation_store_p2,
+        refutation_store_p2=config.refutation_store_p1)
+
+
+def request_move(agent, game: Game, time_limit: float) -> Move:
+    """
+    Runs an agent on the current position until it completes or runs out of time.
+    As in the app, book moves are played without searching, the best move
+    found so far is taken on timeout, and a random move is taken if the agent
+    found none.
+    :param agent: a BaseAgent
+    :param game: the Game to move in
+    :param time_limit: the time limit for the move in seconds
+    :return: a Move
+    """
+    book_move = agent.get_book_move(game.board, game.turn)
+    if book_move:
+        return book_move
+
+    best_move = None
+    completed = Event()
+
+    def set_best_move(move):
+        nonlocal best_move
+        if not completed.is_set():
+            best_move = move
+
+    agent.start(game.board, game.turn, set_best_move, completed.set)
+    completed.wait(time_limit)
+    completed.set()  # ignore moves found while stopping
+    agent.stop()
+
+    # the board is about to change, so wait for the search to let go of it
+    while agent.is_searching:
+        sleep(1 / FPS)
+
+    return best_move or StateGenerator.generate_random_move(game.board, game.turn)
+
+
+def play_game(config: Config, game_id: int = 0, swap: bool = False) -> GameResult:
+    """
+    Plays a game between the two computer players of a config.
+    As in the app, black opens with a book move if it has one, or else a
+    random move, and the game ends once the player to move has reached the
+    move limit or has lost `WIN_SCORE` marbles.
+    Random openings are seeded from the game id, so that games can be
+    replayed, and each pair of games shares one so that each player plays
+    it as black. Agents do not ponder on their opponent's time.
+    :param config: the Config to play with
+    :param game_id: identifies the game in its match
+    :param swap: whether or not player 2 plays black
+    :return: a GameResult
+    """
+    game_config = swap_players(config) if swap else config
+    players = {
+        Color.BLACK: PLAYER_2 if swap else PLAYER_1,
+        Color.WHITE: PLAYER_1 if swap else PLAYER_2,
+    }
+
+    opening_book = (OpeningBook.load(OPENING_BOOK_FILEPATH)
+        if config.opening_book_p1 or config.opening_book_p2
+        else None)
+
+    agents = {}
+    for color in Color:
+        agent = game_config.get_player_agent_type(color).create()
+        agent.set_heuristic_type(game_config.get_player_heuristic_type(color))
+        agent.set_time_limit(game_config.get_player_time_limit(color))
+        if game_config.get_player_opening_book(color):
+            agent.set_opening_book(opening_book)
+        agents[color] = agent
+
+    game = Game(starting_layout=game_config.layout)
+    turn_counts = {color: 0 for color in Color}
+    move_times = {PLAYER_1: [], PLAYER_2: []}
+    moves = []
+    Heuristic.set_turn_count_handler(lambda: turn_counts[game.turn])
+
+    # the search is deterministic, so the opening is what sets games apart
+    opening_rng = Random(game_id // 2)
+    opening_move = (agents[game.turn].get_book_move(game.board, game.turn)
+        or StateGenerator.generate_random_move(game.board, game.turn, opening_rng))
+    turn_counts[game.turn] += 1
+    game.apply_move(opening_move)
+    moves.append(str(opening_move))
+
+    while (turn_counts[game.turn] < game_config.move_limit
+           and game.board.get_score(Color.next(game.turn)) < WIN_SCORE):
+        player = game.turn
+        time_start = time()
+        move = request_move(agents[player], game, game_config.get_player_time_limit(player))
+        move_times[players[player]].append(time() - time_start)
+
+        game.apply_move(move)
+        turn_counts[player] += 1
+        moves.append(str(move))
+
+    for agent in agents.values():
+        agent.close()
+
+    scores = {players[color]: game.board.get_score(color) for color in Color}
+    if scores[PLAYER_1] == scores[PLAYER_2]:
+        winner = DRAW
+    else:
+        winner = PLAYER_1 if scores[PLAYER_1] > scores[PLAYER_2] else PLAYER_2
+
+    return GameResult(
+        game_id=game_id,
+        black=players[Color.BLACK],
+        white=players[Color.WHITE],
+        winner=winner,
+        score_p1=scores[PLAYER_1],
+        score_p2=scores[PLAYER_2],
+        num_moves=len(moves),
+        move_times_p1=move_times[PLAYER_1],
+        move_times_p2=move_times[PLAYER_2],
+        moves=moves,
+    )
+
+
+def _init_worker(verbose: bool):
+    """
+    Sets up logging for a game process.
+    """
+    if not verbose:
+        for debug_type in DebugType:
+            Debug.ACTIVE_DEBUG_TYPES[debug_type] = False
+
+
+def _play_game(args):
+    return play_game(*args)
+
+
+def run_match(config: Config, num_games: int, num_processes: int = None,
+              verbose: bool = False, on_result: callable = None) -> list[GameResult]:
+    """
+    Plays a match of games in parallel across processes.
+    Players alternate colors, with player 1 playing black in even-numbered games.
+    :param config: the Config to play with
+    :param num_games: the number of games to play
+    :param num_processes: the number of games to play at once, defaulting to one per core
+    :param verbose: whether or not to keep agent debug logging
+    :param on_result: a Callable[GameResult] called as each game finishes
+    :return: a list of GameResults, by game id
+    """
+    results = []
+    jobs = [(config, game_id, game_id % 2 == 1) for game_id in range(num_games)]
+    with ProcessPoolExecutor(max_workers=num_processes or cpu_count(),
+                             initializer=_init_worker, initargs=(verbose,)) as executor:
+        for result in executor.map(_play_game, jobs):
+            results.append(result)
+            if on_result:
+                on_result(result)
+    return results
+
+
+def summarize_match(config: Config, results: list[GameResult]) -> dict:
+    """
+    Summarizes the results of a match.
+    :param config: the Config the match was played with
+    :param results: a list of GameResults
+    :return: a dict of JSON-serializable summary data
+    """
+    def summarize_player(player, color, move_times):
+        all_move_times = [t for times in move_times for t in times]
+        return {
+            "player": describe_player(config, color),
+            "wins": sum(1 for result in results if result.winner == player),
+            "wins_as_black": sum(1 for result in results
+                if result.winner == player and result.black == player),
+            "mean_score": sum(getattr(result, f"score_{player}") for result in results) / (len(results) or 1),
+            "mean_move_time": sum(all_move_times) / (len(all_move_times) or 1),
+            "max_move_time": max(all_move_times, default=0),
+        }
+
+    return {
+        "layout": config.layout.name,
+        "move_limit": config.move_limit,
+        "num_games": len(results),
+        "draws": sum(1 for result in results if result.winner == DRAW),
+        PLAYER_1: summarize_player(PLAYER_1, Color.BLACK, [result.move_times_p1 for result in results]),
+        PLAYER_2: summarize_player(PLAYER_2, Color.WHITE, [result.move_times_p2 for result in results]),
+    }
+
+
+def write_json_summary(file_path: str, config: Config, results: list[GameResult]):
+    """
+    Writes a match summary and every game result to a JSON file.
+    :param file_path: the path of the file to write
+    :param config: the Config the match was played with
+    :param results: a list of GameResults
+    """
+    data = {
+        "summary": summarize_match(config, results),
+        "games": [asdict(result) for result in results],
+    }
+    with open(file_path, mode="w", encoding="utf-8") as file:
+        json.dump(data, file, indent=2)
+
+
+def write_csv_results(file_path: str, results: list[GameResult]):
+    """
+    Writes one row per game result to a CSV file.
+    Move times are reduced to their mean and max; moves are omitted.
+    :param file_path: the path of the file to write
+    :param results: a list of GameResults
+    """
+    columns = ["game_id", "black", "white", "winner", "score_p1", "score_p2", "num_moves",
+        "mean_move_time_p1", "max_move_time_p1", "mean_move_time_p2", "max_move_time_p2"]
+
+    with open(file_path, mode="w", encoding="utf-8", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(columns)
+        for result in results:
+            writer.writerow([
+                result.game_id, result.black, result.white, result.winner,
+                result.score_p1, result.score_p2, result.num_moves,
+                sum(result.move_times_p1) / (len(result.move_times_p1) or 1),
+                max(result.move_times_p1, default=0),
+                sum(result.move_times_p2) / (len(result.move_times_p2) or 1),
+                max(result.move_times_p2, default=0),
+            ])
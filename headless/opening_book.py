@@ -0,0 +1,116 @@
+"""
+Contains logic for generating opening books from deep self-play searches.
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor
+from copy import deepcopy
+from os import cpu_count
+
+from agent.brandon.search import Search
+from agent.heuristics.heuristic_jonathan import Heuristic
+from agent.heuristics.registry import get_heuristic
+from agent.opening_book import OpeningBook
+from agent.state_generator import StateGenerator
+from core.board import Board
+from core.board_layout import BoardLayout
+from core.color import Color
+from core.move_encoding import encode_move, NO_MOVE
+from ui.debug import Debug, DebugType
+
+
+# the layouts games are started from in practice
+DEFAULT_LAYOUTS = (BoardLayout.STANDARD, BoardLayout.GERMAN_DAISY, BoardLayout.BELGIAN_DAISY)
+
+
+def analyse_position(board: Board, player: Color, ply: int, time_limit: float,
+                     heuristic_name: str) -> tuple[int, int]:
+    """
+    Searches a position from scratch for a fixed time.
+    Searches are time-limited rather than depth-limited because fixed-depth
+    searches stop at depth 1 in quiet positions, which every opening is.
+    :param board: the Board to search
+    :param player: the Color to move
+    :param ply: the number of moves played to reach the position, for heuristics that depend on the game's progress
+    :param time_limit: the number of seconds to search for
+    :param heuristic_name: the name of a registered heuristic
+    :return: the code of the best move, or NO_MOVE if the player has no moves, and the depth it was searched to
+    """
+    Heuristic.set_turn_count_handler(lambda: ply // 2)
+    search = Search()
+    search.heuristic = get_heuristic(heuristic_name)
+    search.start(board, player, time_limit=time_limit)
+    return search.best_move_code, search.best_depth
+
+
+def _init_worker(verbose: bool):
+    """
+    Sets up logging for a search process.
+    """
+    if not verbose:
+        for debug_type in DebugType:
+            Debug.ACTIVE_DEBUG_TYPES[debug_type] = False
+
+
+def _analyse_position(args):
+    return analyse_position(*args)
+
+
+def build_opening_book(layouts: tuple[BoardLayout, ...] = DEFAULT_LAYOUTS, num_plies: int = 8,
+                       time_limit: float = 10.0, heuristic_name: str = "BRANDON_OFFENSIVE",
+                       num_branching_plies: int = 1, num_processes: int = None,
+                       opening_book: OpeningBook = None, verbose: bool = False,
+                       on_ply: callable = None) -> OpeningBook:
+    """
+    Builds an opening book by playing out every layout with deep searches for both sides.
+    Positions are expanded one ply at a time, and the positions of each ply
+    are searched in parallel across processes. Every reply is expanded for
+    the first `num_branching_plies` plies, so that the book still applies
+    after any opening move by the opponent, and only the book move is
+    expanded after that.
+    :param layouts: the BoardLayouts to start from, with black to move
+    :param num_plies: the number of plies from the start to cover
+    :param time_limit: the number of seconds to search each position for
+    :param heuristic_name: the name of the registered heuristic to search with
+    :param num_branching_plies: the number of plies from the start to expand every reply for
+    :param num_processes: the number of positions to search at once, defaulting to one per core
+    :param opening_book: an OpeningBook to extend, whose positions are not searched again
+    :param verbose: whether or not to keep search debug logging
+    :param on_ply: a Callable[int, int] called with each ply and its number of positions as it finishes
+    :return: the OpeningBook
+    """
+    opening_book = opening_book if opening_book is not None else OpeningBook()
+    positions = [(BoardLayout.setup_board(layout), Color.BLACK) for layout in layouts]
+
+    with ProcessPoolExecutor(max_workers=num_processes or cpu_count(),
+                             initializer=_init_worker, initargs=(verbose,)) as executor:
+        for ply in range(num_plies):
+            unsearched = [(board, player) for board, player in positions
+                if not opening_book.get_depth(board, player)]
+            jobs = [(board, player, ply, time_limit, heuristic_name) for board, player in unsearched]
+            for (board, player), (move_code, depth) in zip(unsearched, executor.map(_analyse_position, jobs)):
+                if move_code != NO_MOVE:
+                    opening_book.put(board, player, move_code, depth)
+
+            if on_ply:
+                on_ply(ply, len(positions))
+            if ply + 1 == num_plies:
+                break
+
+            child_positions = {}  # position hash -> (Board, Color), to expand transpositions once
+            for board, player in positions:
+                if ply < num_branching_plies:
+                    move_codes = StateGenerator.enumerate_codes(board, player)
+                else:
+                    move = opening_book.get_move(board, player)
+                    move_codes = [encode_move(move, board)] if move else []
+
+                for move_code in move_codes:
+                    child = deepcopy(board)
+                    child.make_move_code(move_code)
+                    child_positions[child.get_hash(Color.next(player))] = (child, Color.next(player))
+
+            positions = list(child_positions.values())
+
+    return opening_book
@@ -0,0 +1,209 @@
+"""
+Contains logic for counting and timing move generation, a la chess perft.
+"""
+
+from __future__ import annotations
+
+from copy import deepcopy
+from dataclasses import dataclass
+from time import time
+
+from agent.state_generator import StateGenerator
+from core.bitboard import BitBoard
+from core.board import Board
+from core.board_layout import BoardLayout
+from core.color import Color
+from core.move import Move
+from core.move_encoding import decode_move
+
+
+# leaf counts by depth from the starting position with black to move,
+# as produced by the original deepcopy-based move generator
+REFERENCE_COUNTS = {
+    BoardLayout.STANDARD: [44, 1936, 98912],
+    BoardLayout.GERMAN_DAISY: [80, 6244, 493480],
+    BoardLayout.BELGIAN_DAISY: [52, 2692, 149322],
+}
+
+
+@dataclass
+class PerftLevel:
+    """
+    The leaf count and timing of a perft run to a single depth.
+    """
+    depth: int
+    count: int
+    seconds: float
+
+    @property
+    def nodes_per_second(self) -> float:
+        """
+        Gets the number of leaves counted per second.
+        :return: a float
+        """
+        return self.count / (self.seconds or 1)
+
+
+def perft(board: Board, player: Color, depth: int) -> int:
+    """
+    Counts the positions reachable from the given position in exactly `depth` moves.
+    Positions reached by different move sequences are counted separately.
+    :param board: the Board or BitBoard to count from; restored before returning
+    :param player: the Color to move
+    :param depth: the number of moves to look ahead
+    :return: an int
+    """
+    if depth == 0:
+        return 1
+
+    moves = StateGenerator.enumerate_codes(board, player)
+    if depth == 1:
+        return len(moves)
+
+    count = 0
+    next_player = Color.next(player)
+    for move in moves:
+        move_record = board.make_move_code(move)
+        count += perft(board, next_player, depth - 1)
+        board.unmake_move(move_record)
+    return count
+
+
+def divide(board: Board, player: Color, depth: int) -> list[tuple[Move, int]]:
+    """
+    Counts the positions reachable through each root move, for narrowing down move generation bugs.
+    :param board: the Board or BitBoard to count from
+    :param player: the Color to move
+    :param depth: the number of moves to look ahead, including the root move
+    :return: a list of (Move, int) tuples in generation order
+    """
+    board = deepcopy(board)
+    counts = []
+    for move in StateGenerator.enumerate_codes(board, player):
+        move_record = board.make_move_code(move)
+        counts.append((decode_move(move), perft(board, Color.next(player), depth - 1)))
+        board.unmake_move(move_record)
+    return counts
+
+
+def perft_levels(board: Board, player: Color, max_depth: int, on_level: callable = None) -> list[PerftLevel]:
+    """
+    Runs perft to each depth from 1 to `max_depth`, timing each.
+    :param board: the Board or BitBoard to count from
+    :param player: the Color to move
+    :param max_depth: the deepest depth to count to
+    :param on_level: a Callable[PerftLevel] called as each depth is counted
+    :return: a list of PerftLevels
+    """
+    board = deepcopy(board)
+    levels = []
+    for depth in range(1, max_depth + 1):
+        time_start = time()
+        count = perft(board, player, depth)
+        level = PerftLevel(depth=depth, count=count, seconds=time() - time_start)
+        levels.append(level)
+        if on_level:
+            on_level(level)
+    return levels
+
+
+def cross_check(board: Board, player: Color, depth: int) -> list[str]:
+    """
+    Walks the move tree from the given position on a Board and a BitBoard
+    in lockstep, checking that both generate the same moves and reach the
+    same positions as each move is made and unmade.
+    Positions are compared by hash, which each board maintains from its own
+    storage, and in full only at the root, for speed.
+    :param board: the Board to walk from
+    :param player: the Color to move
+    :param depth: the number of moves to look ahead
+    :return: a list of mismatch descriptions, empty if the boards agree throughout
+    """
+    board = deepcopy(board)
+    bitboard = BitBoard.create_from_board(board)
+    mismatches = []
+    if board.to_array() != bitboard.to_array() or board.hash != bitboard.hash:
+        return ["root: positions differ"]
+
+    def walk(player, depth, line):
+        moves = StateGenerator.enumerate_codes(board, player)
+        if moves != StateGenerator.enumerate_codes(bitboard, player):
+            mismatches.append(f"{line or 'root'}: generated moves differ")
+            return
+
+        next_player = Color.next(player)
+        for move in moves:
+            move_line = f"{line} {decode_move(move)}".strip()
+            move_record = board.make_move_code(move)
+            bitboard_record = bitboard.make_move_code(move)
+            if board.hash != bitboard.hash:
+                mismatches.append(f"{move_line}: positions differ after the move")
+            elif depth > 1:
+                walk(next_player, depth - 1, move_line)
+
+            board.unmake_move(move_record)
+            bitboard.unmake_move(bitboard_record)
+            if board.hash != bitboard.hash:
+                mismatches.append(f"{move_line}: positions differ after unmaking the move")
+            if mismatches:
+                return
+
+    walk(player, depth, "")
+    return mismatches
+
+
+def check_apply_move(board: Board, player: Color, depth: int) -> list[str]:
+    """
+    Walks the move tree from the given position, checking every generated
+    move, including those at the leaves, against the rule checks and move
+    application used by the app: each move must pass `Board.is_valid_move`,
+    and `Board.apply_move` must reach the same position as `make_move_code`.
+    Positions are compared by hash, for speed.
+    :param board: the Board to walk from
+    :param player: the Color to move
+    :param depth: the number of moves to look ahead
+    :return: a list of mismatch descriptions, empty if both agree throughout
+    """
+    board = deepcopy(board)
+    scratch = deepcopy(board)
+    mismatches = []
+
+    def walk(player, depth, line):
+        next_player = Color.next(player)
+        for move_code in StateGenerator.enumerate_codes(board, player):
+            move = decode_move(move_code)
+            move_line = f"{line} {move}".strip()
+            if not board.is_valid_move(move, player):
+                mismatches.append(f"{move_line}: generated move is not valid")
+                return
+
+            scratch.apply_move(move)
+            move_record = board.make_move_code(move_code)
+            if scratch.hash != board.hash:
+                mismatches.append(f"{move_line}: apply_move and make_move_code reach different positions")
+                return
+
+            if depth > 1:
+                walk(next_player, depth - 1, move_line)
+
+            # the boards agree, so the record unmakes the move on both
+            board.unmake_move(move_record)
+            scratch.unmake_move(move_record)
+            if mismatches:
+                return
+
+    walk(player, depth, "")
+    return mismatches
+
+
+def check_levels(layout: BoardLayout, levels: list[PerftLevel]) -> list[str]:
+    """
+    Compares perft counts from a layout's starting position against `REFERENCE_COUNTS`.
+    :param layout: the BoardLayout the counts were taken from, with black to move
+    :param levels: a list of PerftLevels
+    :return: a list of mismatch descriptions, empty if all counts with a reference match
+    """
+    reference_counts = REFERENCE_COUNTS.get(layout, [])
+    return [f"depth {level.depth}: expected {reference_counts[level.depth - 1]}, got {level.count}"
+        for level in levels
+        if level.depth <= len(reference_counts) and level.count != reference_counts[level.depth - 1]]
@@ -2,17 +2,50 @@
 Generic logic for an axial hex coordinate.
 """
 
-from dataclasses import dataclass
 
-
-@dataclass(frozen=True)
 class AxialHex:
     """
-    An axial hex coordinate.
+    An immutable axial hex coordinate.
+    Coordinates are slotted rather than held in a `__dict__`, as grids
+    create and compare them constantly.
     """
 
-    x: int
-    y: int
+    __slots__ = ("x", "y")
+
+    def __new__(cls, x, y):
+        """
+        Creates a hex coordinate.
+        Coordinates are set here rather than in `__init__` so that subclasses
+        may return existing instances.
+        :param x: the x-coordinate
+        :param y: the y-coordinate
+        :return: an AxialHex
+        """
+        self = object.__new__(cls)
+        object.__setattr__(self, "x", x)
+        object.__setattr__(self, "y", y)
+        return self
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"cannot assign to field '{name}'")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"cannot delete field '{name}'")
+
+    def __repr__(self):
+        return f"{type(self).__name__}(x={self.x!r}, y={self.y!r})"
+
+    def __reduce__(self):
+        return type(self), (self.x, self.y)
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __hash__(self):
+        return hash((self.x, self.y))
 
     def __eq__(self, other):
         """
@@ -2,21 +2,71 @@
 Generic logic for a hexagon-shaped grid.
 """
 
+from copy import deepcopy
+
+
+# size -> (x, y) -> index of the cell in a grid of that size
+_index_tables = {}
+
+
+def _get_index_table(size):
+    """
+    Gets the table mapping each position in a grid of the given size to its
+    index in the grid's storage, shared by all grids of that size.
+    :param size: the length of a side of the grid in cells
+    :return: a dict of (x, y) to int
+    """
+    table = _index_tables.get(size)
+    if table is None:
+        table = {}
+        height = size * 2 - 1
+        for r in range(height):
+            offset = (height // 2 - r) * (r <= height // 2)
+            for q in range(offset, offset + height - abs(size - 1 - r)):
+                table[(q, r)] = len(table)
+        _index_tables[size] = table
+    return table
+
 
 class HexGrid:
     """
     A hexagon-shaped grid. Uses offset coordinates where each position is an
     object with `x` and `y` attributes.
+    Cells are stored in a single flat list in row-major order, and each
+    position is mapped to its index in that list through a precomputed table,
+    so values may also be read and written by index via `get_index` and
+    `set_index`.
     Implements container protocols for the use of `board[cell] = value` and
     `board in cell` syntax.
     """
 
+    # attributes that are never written to after initialization, so copies may share them
+    _shared_attributes = ("_indices",)
+
     def __init__(self, size):
         """
         Initializes a hexagon-shaped grid of the given size.
         :param size: the length of a side of the grid in cells
         """
-        self._data = self.generate_empty(size)
+        self._size = size
+        self._indices = _get_index_table(size)
+        self._data = [None] * len(self._indices)
+
+    def __deepcopy__(self, memo):
+        grid = type(self).__new__(type(self))
+        memo[id(self)] = grid
+        for name, value in self.__dict__.items():
+            grid.__dict__[name] = value if name in self._shared_attributes else deepcopy(value, memo)
+        return grid
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_indices"]  # rebuilt from the size
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._indices = _get_index_table(self._size)
 
     def offset(self, r):
         """
@@ -32,20 +82,22 @@ class HexGrid:
         :param r: the row to calculate the width of the grid at
         :return: an int
         """
-        return (len(self._data[r])
-                if r >= 0 and r < len(self._data)
+        return (self.height - abs(self._size - 1 - r)
+                if r >= 0 and r < self.height
                 else None)
 
     def to_array(self):
         data = []
-        for row in self._data:
+        i = 0
+        for r in range(self.height):
             data_row = []
-            for color in row:
+            for color in self._data[i:i + self.width(r)]:
                 if color:
                     data_row.append(color.value)
                 else:
                     data_row.append(0)
             data.append(data_row)
+            i += len(data_row)
 
         return data
 
@@ -55,7 +107,7 @@ class HexGrid:
         Determines the height of the grid.
         :return: an int
         """
-        return len(self._data)
+        return self._size * 2 - 1
 
     def __contains__(self, cell):
         """
@@ -63,10 +115,7 @@ class HexGrid:
         :param cell: an object with `x` and `y` coordinates
         :return: a bool
         """
-        q, r = cell.x, cell.y
-        q -= self.offset(r)
-        return (r >= 0 and r < self.height
-                and q >= 0 and q < self.width(r))
+        return (cell.x, cell.y) in self._indices
 
     def __getitem__(self, cell):
         """
@@ -75,12 +124,7 @@ class HexGrid:
         :param cell: an object with `x` and `y` coordinates
         :return: the value stored at the given cell
         """
-        if cell not in self:
-            raise IndexError(f"grid assignment cell '{cell}' out of range")
-
-        q, r = cell.x, cell.y
-        q -= self.offset(r)
-        return self._data[r][q]
+        return self._data[self.index_of(cell)]
 
     def __setitem__(self, cell, value):
         """
@@ -90,24 +134,34 @@ class HexGrid:
         :param value: the value to store
         :return: None
         """
-        if cell not in self:
+        self.set_index(self.index_of(cell), value)
+
+    def index_of(self, cell):
+        """
+        Finds the index of the given `cell` in the grid's storage.
+        Indices run from 0 in row-major order.
+        Raises IndexError if out of bounds.
+        :param cell: an object with `x` and `y` coordinates
+        :return: an int
+        """
+        i = self._indices.get((cell.x, cell.y))
+        if i is None:
             raise IndexError(f"grid cell '{cell}' out of range")
+        return i
 
-        q, r = cell.x, cell.y
-        q -= self.offset(r)
-        self._data[r][q] = value
+    def get_index(self, i):
+        """
+        Gets the value stored in the grid at the given index.
+        :param i: an index from `index_of`
+        :return: the value stored at the given index
+        """
+        return self._data[i]
 
-    @staticmethod
-    def generate_empty(size):
+    def set_index(self, i, value):
         """
-        Generates an empty board with side length `size`.
-        :param size: an int
-        :precondition size: must be non-negative
-        :return: an array of variable-length arrays, each corresponding to a cell in the hex grid
+        Stores the given `value` in the grid at the given index.
+        :param i: an index from `index_of`
+        :param value: the value to store
+        :return: None
         """
-        board = []
-        for i in reversed(range(size)):
-            board.insert(0, [None] * (size + i))
-            if i < size - 1:
-                board.append([None] * (size + i))
-        return board
+        self._data[i] = value
@@ -0,0 +1,79 @@
+"""
+Plays a headless match between two agents.
+
+Example:
+    python match.py --games 100 --p1-agent BRANDON --p2-agent DEFAULT --time-limit 2 --json match.json
+"""
+
+from argparse import ArgumentParser
+
+from core.board_layout import BoardLayout
+from core.player_type import PlayerType
+from headless.match import run_match, summarize_match, write_json_summary, write_csv_results
+from ui.model.agent_type import AgentType
+from ui.model.config import Config
+from ui.model.heuristic_type import HeuristicType
+from ui.constants import OPENING_BOOK_FILEPATH
+
+
+def parse_args():
+    """
+    Parses the match options from the command line.
+    :return: an argparse.Namespace
+    """
+    default = Config.from_default()
+    parser = ArgumentParser(description="Plays a headless match between two agents.")
+    parser.add_argument("--games", type=int, default=2, help="number of games; players alternate colors")
+    parser.add_argument("--processes", type=int, default=None, help="games played at once (default: one per core)")
+    parser.add_argument("--layout", choices=[layout.name for layout in BoardLayout], default=default.layout.name)
+    parser.add_argument("--move-limit", type=int, default=default.move_limit, help="moves per player")
+    parser.add_argument("--time-limit", type=float, default=None, help="seconds per move for both players")
+    for player in ("p1", "p2"):
+        parser.add_argument(f"--{player}-agent", choices=[agent_type.name for agent_type in AgentType],
+            default=getattr(default, f"agent_type_{player}").name)
+        parser.add_argument(f"--{player}-heuristic", choices=[heuristic_type.name for heuristic_type in HeuristicType],
+            default=getattr(default, f"heuristic_type_{player}").name)
+        parser.add_argument(f"--{player}-time-limit", type=float, default=getattr(default, f"time_limit_{player}"))
+        parser.add_argument(f"--{player}-book", action="store_true",
+            help=f"play moves from {OPENING_BOOK_FILEPATH} while in book")
+    parser.add_argument("--json", dest="json_path", default=None, help="path to write a JSON summary to")
+    parser.add_argument("--csv", dest="csv_path", default=None, help="path to write per-game CSV results to")
+    parser.add_argument("--verbose", action="store_true", help="keep agent debug logging")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    config = Config(
+        layout=BoardLayout[args.layout],
+        move_limit=args.move_limit,
+        player_type_p1=PlayerType.COMPUTER,
+        player_type_p2=PlayerType.COMPUTER,
+        time_limit_p1=args.time_limit or args.p1_time_limit,
+        time_limit_p2=args.time_limit or args.p2_time_limit,
+        heuristic_type_p1=HeuristicType[args.p1_heuristic],
+        heuristic_type_p2=HeuristicType[args.p2_heuristic],
+        agent_type_p1=AgentType[args.p1_agent],
+        agent_type_p2=AgentType[args.p2_agent],
+        opening_book_p1=args.p1_book,
+        opening_book_p2=args.p2_book,
+    )
+
+    results = run_match(config, args.games, args.processes, args.verbose,
+        on_result=lambda result: print(f"game {result.game_id}: {result.winner}"
+            f" ({result.score_p1}-{result.score_p2} in {result.num_moves} moves)"))
+
+    summary = summarize_match(config, results)
+    for player in ("p1", "p2"):
+        print(f"{player} ({summary[player]['player']}): {summary[player]['wins']} wins,"
+            f" mean move time {summary[player]['mean_move_time']:.2f}s")
+    print(f"draws: {summary['draws']}")
+
+    if args.json_path:
+        write_json_summary(args.json_path, config, results)
+    if args.csv_path:
+        write_csv_results(args.csv_path, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Generates an opening book from deep self-play searches.
+
+Example:
+    python opening_book.py --plies 8 --time-limit 10
+    python opening_book.py --plies 10 --time-limit 10 --extend
+"""
+
+from argparse import ArgumentParser
+from time import time
+
+from agent.heuristics.registry import list_heuristics
+from agent.opening_book import OpeningBook
+from core.board_layout import BoardLayout
+from headless.opening_book import DEFAULT_LAYOUTS, build_opening_book
+from ui.constants import OPENING_BOOK_FILEPATH
+from ui.model.heuristic_type import HeuristicType
+
+
+def parse_args():
+    """
+    Parses the opening book options from the command line.
+    :return: an argparse.Namespace
+    """
+    parser = ArgumentParser(description="Generates an opening book from deep self-play searches.")
+    parser.add_argument("--layouts", nargs="+", choices=[layout.name for layout in BoardLayout],
+        default=[layout.name for layout in DEFAULT_LAYOUTS])
+    parser.add_argument("--plies", type=int, default=8, help="plies from the start to cover")
+    parser.add_argument("--branching-plies", type=int, default=1,
+        help="plies from the start to cover every reply for, rather than only the book move")
+    parser.add_argument("--time-limit", type=float, default=10.0, help="search time per position in seconds")
+    parser.add_argument("--heuristic", choices=list_heuristics(), default=HeuristicType.BRANDON_OFFENSIVE.name)
+    parser.add_argument("--processes", type=int, default=None, help="positions searched at once (default: one per core)")
+    parser.add_argument("--output", default=OPENING_BOOK_FILEPATH, help="path to write the book to")
+    parser.add_argument("--extend", action="store_true",
+        help="add to the book at the output path, only searching positions it does not hold")
+    parser.add_argument("--verbose", action="store_true", help="keep search debug logging")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    time_start = time()
+
+    opening_book = build_opening_book(
+        layouts=tuple(BoardLayout[layout] for layout in args.layouts),
+        num_plies=args.plies,
+        time_limit=args.time_limit,
+        heuristic_name=args.heuristic,
+        num_branching_plies=args.branching_plies,
+        num_processes=args.processes,
+        opening_book=OpeningBook.load(args.output) if args.extend else None,
+        verbose=args.verbose,
+        on_ply=lambda ply, num_positions: print(f"ply {ply}: {num_positions} positions"
+            f" ({time() - time_start:.1f}s)"),
+    )
+
+    opening_book.save(args.output)
+    print(f"{len(opening_book)} positions written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -70,7 +70,7 @@ class StateParser:
 
         temp_positions = ""
 
-        current_state = Board.enumerate(board)
+        current_state = board.enumerate()
         for marbles, colour in current_state:
             if colour is not None:
                 if colour == Color.BLACK:
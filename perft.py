@@ -0,0 +1,70 @@
+"""
+Counts and times move generation from a layout's starting position.
+
+Example:
+    python perft.py --layout BELGIAN_DAISY --depth 3 --check
+    python perft.py --layout STANDARD --depth 3 --divide
+    python perft.py --layout BELGIAN_DAISY --depth 3 --board bitboard
+"""
+
+from argparse import ArgumentParser
+import sys
+
+from core.board_layout import BoardLayout
+from core.board_type import BoardType
+from core.color import Color
+from headless.perft import perft_levels, divide, check_levels, check_apply_move, cross_check
+
+
+def parse_args():
+    """
+    Parses the perft options from the command line.
+    :return: an argparse.Namespace
+    """
+    parser = ArgumentParser(description="Counts and times move generation from a layout's starting position.")
+    parser.add_argument("--layout", choices=[layout.name for layout in BoardLayout], default=BoardLayout.STANDARD.name)
+    parser.add_argument("--player", choices=[color.name for color in Color], default=Color.BLACK.name)
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--board", choices=[board_type.value for board_type in BoardType],
+        default=BoardType.BOARD.value, help="board representation to count on")
+    parser.add_argument("--divide", action="store_true", help="print the count under each root move")
+    parser.add_argument("--check", action="store_true",
+        help="compare counts against the reference counts, and moves and positions against"
+            " Board.apply_move and a BitBoard")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    layout = BoardLayout[args.layout]
+    board = BoardLayout.setup_board(layout)
+    count_board = BoardType(args.board).convert(board)
+    player = Color[args.player]
+
+    if args.divide:
+        total = 0
+        for move, count in divide(count_board, player, args.depth):
+            print(f"{move}: {count}")
+            total += count
+        print(f"total: {total}")
+        return
+
+    levels = perft_levels(count_board, player, args.depth, on_level=lambda level: print(
+        f"depth {level.depth}: {level.count} positions in {level.seconds:.2f}s"
+        f" ({level.nodes_per_second:.0f} positions/s)"))
+
+    if args.check:
+        if player != Color.BLACK:
+            sys.exit("reference counts are for black to move")
+
+        mismatches = (check_levels(layout, levels)
+            + check_apply_move(board, player, args.depth)
+            + cross_check(board, player, args.depth))
+        for mismatch in mismatches:
+            print(mismatch)
+        print("FAIL" if mismatches else "OK")
+        sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -10,6 +10,8 @@ import json
 import traceback
 
 from agent.heuristics.heuristic_jonathan import Heuristic
+from agent.move_table import MoveTable
+from agent.opening_book import OpeningBook
 from agent.state_generator import StateGenerator
 from agent.ponderer import PonderingAgent
 from core.color import Color
@@ -22,7 +24,8 @@ from ui.model.model import Model, GameHistoryItem
 from ui.view.view import View
 from ui.model.config import Config
 from ui.debug import Debug, DebugType
-from ui.constants import FPS, DEBUG_FILEPATH, DEBUG_LOADS_ON_START
+from ui.constants import FPS, DEBUG_FILEPATH, DEBUG_LOADS_ON_START, OPENING_BOOK_FILEPATH, \
+    REFUTATION_STORE_FILEPATH
 
 if TYPE_CHECKING:
     from core.hex import Hex
@@ -42,30 +45,42 @@ class App:
         self._model = Model()
         self._view = View()
         self._agents = {}
+        self._opening_book = None
+        self._refutation_store = None
         self._update_dispatcher = Dispatcher()
         self.paused = False
         self.allow_move = True
 
     def _start_game(self):
         """
-        Starts the game by applying a random move to the first player.
+        Starts the game by applying a book move, or else a random move, to the first player.
         """
         config = self._model.config
 
+        self._close_agents()
         self._agents = {
             Color.BLACK: config.agent_type_p1.create() if config.player_type_p1 is PlayerType.COMPUTER else None,
             Color.WHITE: config.agent_type_p2.create() if config.player_type_p2 is PlayerType.COMPUTER else None,
         }
 
         self._apply_heuristic_config(config)
+        self._apply_time_limit_config(config)
+        self._apply_opening_book_config(config)
+        self._apply_refutation_store_config(config)
         if config.get_player_type(self._model.game_turn) == PlayerType.COMPUTER:
-            self._apply_random_move()
+            agent = self._agents[self._model.game_turn]
+            book_move = agent.get_book_move(self._model.game_board, self._model.game_turn)
+            if book_move:
+                self._apply_move(book_move)
+            else:
+                self._apply_random_move()
 
     def _stop_game(self):
         if self.paused:
             self._set_pause(False)
         self._model.stop_timer()
         self._stop_agents()
+        self._save_refutation_store()
         self._update_dispatcher.clear()
 
     def _set_pause(self, pause: bool):
@@ -93,6 +108,7 @@ class App:
 
     def end_game(self):
         self._stop_game()
+        self._close_agents()
 
         score_p1 = self._model.game.board.get_score(Color.BLACK)
         score_p2 = self._model.game.board.get_score(Color.WHITE)
@@ -165,9 +181,10 @@ class App:
             return
 
         agent = self._agents[player_color]
-        agent_move = (agent.get_refutation_move(self._model.game_board)
-            if isinstance(agent, PonderingAgent)
-            else None)  # can we assume that every agent has a refutation table?
+        agent_move = agent.get_book_move(self._model.game_board, player_color)
+        if not agent_move and isinstance(agent, PonderingAgent):
+            # can we assume that every agent has a refutation table?
+            agent_move = agent.get_refutation_move(self._model.game_board, player_color)
 
         if agent_move:
             self._update_dispatcher.put(lambda: self._apply_move(agent_move))
@@ -244,6 +261,9 @@ class App:
         self._model.apply_config(config)
         self._reset_game()
         self._apply_heuristic_config(config)
+        self._apply_time_limit_config(config)
+        self._apply_opening_book_config(config)
+        self._apply_refutation_store_config(config)
         self._view.apply_config(config)
         self._view.render(self._model)
 
@@ -253,6 +273,70 @@ class App:
             if agent:
                 agent.set_heuristic_type(config.get_player_heuristic_type(color))
 
+    def _apply_time_limit_config(self, config: Config = None):
+        config = config or self._model.game_config
+        for color, agent in self._agents.items():
+            if agent:
+                agent.set_time_limit(config.get_player_time_limit(color))
+
+    def _apply_opening_book_config(self, config: Config = None):
+        config = config or self._model.game_config
+        for color, agent in self._agents.items():
+            if agent:
+                agent.set_opening_book(self._load_opening_book()
+                    if config.get_player_opening_book(color)
+                    else None)
+
+    def _load_opening_book(self) -> OpeningBook | None:
+        """
+        Loads the opening book the first time it is needed.
+        :return: an OpeningBook, or None if no valid book has been generated
+        """
+        if self._opening_book is None:
+            try:
+                self._opening_book = OpeningBook.load(OPENING_BOOK_FILEPATH)
+                Debug.log(f"Opening book loaded with {len(self._opening_book)} positions", DebugType.Game)
+            except (OSError, ValueError):
+                Debug.log(f"WARNING: {OPENING_BOOK_FILEPATH} could not be loaded", DebugType.Warning)
+        return self._opening_book
+
+    def _apply_refutation_store_config(self, config: Config = None):
+        config = config or self._model.game_config
+        for color, agent in self._agents.items():
+            if isinstance(agent, PonderingAgent):
+                agent.store_refutations()
+                agent.set_refutation_store(self._load_refutation_store()
+                    if config.get_player_refutation_store(color)
+                    else None)
+
+    def _load_refutation_store(self) -> MoveTable | None:
+        """
+        Loads the refutation store the first time it is needed, starting an empty one if none has been saved.
+        :return: a MoveTable, or None if the saved store is not valid
+        """
+        if self._refutation_store is None:
+            try:
+                self._refutation_store = MoveTable.load(REFUTATION_STORE_FILEPATH)
+                Debug.log(f"Refutation store loaded with {len(self._refutation_store)} positions", DebugType.Game)
+            except FileNotFoundError:
+                self._refutation_store = MoveTable()
+            except (OSError, ValueError):
+                Debug.log(f"WARNING: {REFUTATION_STORE_FILEPATH} could not be loaded", DebugType.Warning)
+        return self._refutation_store
+
+    def _save_refutation_store(self):
+        """
+        Saves the refutations found by pondering agents to the refutation store, if in use.
+        """
+        self._rally_agents(lambda agent: isinstance(agent, PonderingAgent) and agent.store_refutations())
+        if self._refutation_store is None or not self._refutation_store.has_unsaved_moves:
+            return
+
+        try:
+            self._refutation_store.save(REFUTATION_STORE_FILEPATH)
+        except OSError:
+            Debug.log(f"WARNING: {REFUTATION_STORE_FILEPATH} could not be saved", DebugType.Warning)
+
     def _apply_undo_item(self, item: GameHistoryItem):
         if not item or not item.move:
             self._apply_random_move()
@@ -341,13 +425,16 @@ class App:
         try:
             self._start_game()
             self._run_main_loop()
-            self._stop_agents()
+            self._close_agents()
         finally:
             self._write_history_dump()
 
     def _stop_agents(self):
         self._rally_agents(lambda agent: agent.stop())
 
+    def _close_agents(self):
+        self._rally_agents(lambda agent: agent.close())
+
     def _notify_agents(self, move):
         self._rally_agents(lambda agent: agent.apply_move(move))
 
@@ -17,4 +17,7 @@ DEBUG = True
 DEBUG_LOADS_ON_START = DEBUG
 DEBUG_FILEPATH = "debug.json"
 
+OPENING_BOOK_FILEPATH = "opening_book.bin"
+REFUTATION_STORE_FILEPATH = "refutations.bin"
+
 DEFAULT_THEME = ThemeLibrary.DEFAULT
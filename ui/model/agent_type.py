@@ -3,12 +3,16 @@ from enum import Enum
 from agent.default.agent import DefaultAgent
 from agent.brandon.agent import BrandonAgent
 from agent.brandon.agent_ponder import BrandonPonderer
+from agent.brandon.agent_parallel import BrandonParallelAgent
+from agent.brandon.agent_lazy_smp import BrandonLazySMPAgent
 
 
 class AgentType(Enum):
     DEFAULT = "Default"
-    BRANDON = "2-ply negascout"
+    BRANDON = "Negascout"
     BRANDON_PONDERER = "Ponderer"
+    BRANDON_PARALLEL = "Parallel negascout"
+    BRANDON_LAZY_SMP = "Lazy SMP negascout"
 
     def create(self):
         """
@@ -18,4 +22,6 @@ class AgentType(Enum):
             AgentType.DEFAULT: DefaultAgent,
             AgentType.BRANDON: BrandonAgent,
             AgentType.BRANDON_PONDERER: BrandonPonderer,
+            AgentType.BRANDON_PARALLEL: BrandonParallelAgent,
+            AgentType.BRANDON_LAZY_SMP: BrandonLazySMPAgent,
         }[self]()
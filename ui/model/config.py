@@ -25,6 +25,10 @@ class Config:
     agent_type_p1: AgentType = AgentType.BRANDON
     agent_type_p2: AgentType = AgentType.BRANDON_PONDERER
     theme: Theme = DEFAULT_THEME
+    opening_book_p1: bool = False
+    opening_book_p2: bool = False
+    refutation_store_p1: bool = False
+    refutation_store_p2: bool = False
 
     @classmethod
     def from_default(cls):
@@ -57,3 +61,15 @@ class Config:
             Color.BLACK: self.agent_type_p1,
             Color.WHITE: self.agent_type_p2
         }[color]
+
+    def get_player_opening_book(self, color: Color):
+        return {
+            Color.BLACK: self.opening_book_p1,
+            Color.WHITE: self.opening_book_p2
+        }[color]
+
+    def get_player_refutation_store(self, color: Color):
+        return {
+            Color.BLACK: self.refutation_store_p1,
+            Color.WHITE: self.refutation_store_p2
+        }[color]
@@ -3,28 +3,33 @@ from __future__ import annotations
 from enum import Enum
 from numbers import Number
 
-from agent.heuristics.heuristic_jonathan import Heuristic
-from agent.heuristics.heuristic_brandon import (
-    heuristic_offensive as heuristic_brandon_offensive,
-    heuristic_defensive as heuristic_brandon_defensive,
-)
-
+from agent.heuristics.registry import HeuristicEvaluator, get_heuristic
 from core.board import Board
 from core.color import Color
 
 
 class HeuristicType(Enum):
+    """
+    Enumerates the built-in heuristics selectable in the app.
+    Each member resolves to the heuristic registered under its name.
+    """
     WEIGHTED_NORMALIZED = "Weighted Normalized"
     WEIGHTED = "Weighted"
     DYNAMIC = "Dynamic"
     BRANDON_OFFENSIVE = "Offensive Brandon"
     BRANDON_DEFENSIVE = "Defensive Brandon"
 
+    def resolve(self) -> HeuristicEvaluator:
+        """
+        Finds the evaluator for this heuristic type, for searches to hold.
+        :return: a HeuristicEvaluator
+        """
+        return get_heuristic(self.name)
+
     def call(self, board: Board, player: Color) -> Number:
-        return {
-            HeuristicType.WEIGHTED_NORMALIZED: lambda: Heuristic.weighted_normalized(board, player),
-            HeuristicType.WEIGHTED: lambda: Heuristic.weighted(board, player),
-            HeuristicType.DYNAMIC: lambda: Heuristic.dynamic(board, player),
-            HeuristicType.BRANDON_OFFENSIVE: lambda: heuristic_brandon_offensive(board, player),
-            HeuristicType.BRANDON_DEFENSIVE: lambda: heuristic_brandon_defensive(board, player),
-        }[self]()
+        """
+        Evaluates the board for the given player.
+        Searches should hold the evaluator from `resolve` rather than calling this per node.
+        :return: the heuristic value
+        """
+        return self.resolve().evaluate(board, player)
@@ -29,6 +29,12 @@ class SettingsUI:
         "Belgian Daisy": BoardLayout.BELGIAN_DAISY,
     }
 
+    OPENING_BOOK_ON = "On"
+    OPENING_BOOK_OFF = "Off"
+
+    REFUTATION_STORE_ON = "On"
+    REFUTATION_STORE_OFF = "Off"
+
     def __init__(self, config, on_close):
         self.config = config or Config.from_default()
         self._window = None
@@ -88,6 +94,10 @@ class SettingsUI:
 
         agent_type_p1, agent_type_p2 = self._mount_agent_types(parent, 8)
 
+        opening_book_p1, opening_book_p2 = self._mount_opening_books(parent, 9)
+
+        refutation_store_p1, refutation_store_p2 = self._mount_refutation_stores(parent, 10)
+
         Button(parent, text="Confirm", command=lambda: (
             self._on_close(Config(
                 next((v for k, v in self.STARTING_LAYOUT_MAP.items() if layout.get() == k), starting_layout),
@@ -101,9 +111,13 @@ class SettingsUI:
                 AgentType(agent_type_p1.get()),
                 AgentType(agent_type_p2.get()),
                 ThemeLibrary.get_theme_by_name(theme.get()),
+                opening_book_p1.get() == self.OPENING_BOOK_ON,
+                opening_book_p2.get() == self.OPENING_BOOK_ON,
+                refutation_store_p1.get() == self.REFUTATION_STORE_ON,
+                refutation_store_p2.get() == self.REFUTATION_STORE_ON,
             )),
             self.destroy(),
-        )).grid(column=0, row=9, columnspan=5)
+        )).grid(column=0, row=11, columnspan=5)
 
         self._configure_grid(parent)
 
@@ -162,6 +176,26 @@ class SettingsUI:
         p2 = self._mount_dropdown(parent, row, 3, "w", self.config.agent_type_p2.value, *options)
         return p1, p2
 
+    def _mount_opening_books(self, parent, row):
+        options = [self.OPENING_BOOK_ON, self.OPENING_BOOK_OFF]
+        p1 = self._mount_dropdown(parent, row, 1, "e",
+                                  self.OPENING_BOOK_ON if self.config.opening_book_p1 else self.OPENING_BOOK_OFF, *options)
+        self._mount_label(parent, row, 2, "", "Opening Book")
+        p2 = self._mount_dropdown(parent, row, 3, "w",
+                                  self.OPENING_BOOK_ON if self.config.opening_book_p2 else self.OPENING_BOOK_OFF, *options)
+        return p1, p2
+
+    def _mount_refutation_stores(self, parent, row):
+        options = [self.REFUTATION_STORE_ON, self.REFUTATION_STORE_OFF]
+        p1 = self._mount_dropdown(parent, row, 1, "e",
+                                  self.REFUTATION_STORE_ON if self.config.refutation_store_p1 else self.REFUTATION_STORE_OFF,
+                                  *options)
+        self._mount_label(parent, row, 2, "", "Refutation Store")
+        p2 = self._mount_dropdown(parent, row, 3, "w",
+                                  self.REFUTATION_STORE_ON if self.config.refutation_store_p2 else self.REFUTATION_STORE_OFF,
+                                  *options)
+        return p1, p2
+
     def _mount_label(self, parent, row, col, anchor, label):
         Label(parent, text=label).grid(column=col, row=row, sticky=anchor, padx=8)
 